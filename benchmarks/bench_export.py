@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""导出流程性能测试：用假的 maya.cmds（benchmarks/fake_maya）生成平面、球体和散布的小网格，
+分别统计 GetGeometryInfo、WriteRootPrim、SaveUsd 的耗时、吞吐量、峰值内存和命令调用次数
+
+使用 cmds 数据源：cmds 没有批量查询面顶点UV编号的命令，GetGeometryInfo 的调用次数约等于UV数量。
+
+每个用例在独立的子进程中运行，峰值内存互不影响。Linux 上每个阶段开始前通过 /proc/self/clear_refs
+重置进程的峰值 RSS，peak_rss_mb 是该阶段内的峰值，start_rss_mb 是阶段开始时的 RSS；
+不支持重置的平台 peak_rss_mb 为空，只记录到该阶段结束为止的进程峰值 process_peak_rss_mb。
+结果与 JSON 基线比较，耗时超出基线
+--tolerance 比例的阶段标记为回退；--update-baseline 用本次结果覆盖基线。
+
+用法: python benchmarks/bench_export.py [--sizes 1000,10000,100000,1000000,5000000]
+                                        [--kinds grid,sphere,scatter] [--baseline 路径] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'export_baseline.json')
+STAGES = ('GetGeometryInfo', 'WriteRootPrim', 'SaveUsd')
+
+
+def _process_peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0), 1)
+
+
+def _status_mb(field):
+    """/proc/self/status 中的内存字段（MB），没有时返回 None"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """把进程的峰值 RSS（VmHWM）重置为当前 RSS，不支持时返回 False"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def run_case(kind, size, output_dir):
+    """在当前进程运行一个用例，返回 {阶段: 指标}"""
+    sys.path[:0] = [os.path.join(BENCH_DIR, 'fake_maya'), os.path.join(BENCH_DIR, '..', 'python-usd')]
+    import time
+    import maya.cmds as cmds
+    from behavior_tree.core import Blackboard
+    from action.create import CreateUsd, SetRootPrim, GetGeometryInfo, WriteRootPrim, SaveUsd
+
+    cmds.reset()
+    if kind == 'grid':
+        nodes = [cmds.add_grid('grid', size)]
+    elif kind == 'sphere':
+        nodes = [cmds.add_sphere('sphere', size)]
+    else:
+        nodes = cmds.add_scatter('scatter', size)
+    cmds.select(nodes)
+    vertices = sum(len(mesh['points']) for mesh in cmds._meshes.values())
+
+    blackboard = Blackboard()
+    blackboard.set('usd_path', os.path.join(output_dir, f"{kind}_{size}.usdc"))
+    blackboard.set('mesh_source', 'cmds')
+    blackboard.set('geo_selected', cmds.ls(sl=True))
+    CreateUsd(name='CreateUsd').execute(blackboard)
+    SetRootPrim(name='SetRootPrim').execute(blackboard)
+
+    results = {'vertices': vertices, 'meshes': len(nodes)}
+    for action in (GetGeometryInfo, WriteRootPrim, SaveUsd):
+        cmds.CALLS.clear()
+        start_rss = _status_mb('VmRSS')
+        reset = _reset_peak_rss()
+        start = time.perf_counter()
+        status = action(name=action.__name__).execute(blackboard)
+        seconds = time.perf_counter() - start
+        results[action.__name__] = {
+            'status': str(status),
+            'seconds': round(seconds, 4),
+            'vertices_per_second': round(vertices / seconds) if seconds else None,
+            'start_rss_mb': start_rss,
+            'peak_rss_mb': _status_mb('VmHWM') if reset else None,
+            'process_peak_rss_mb': _process_peak_rss_mb(),
+            'calls': dict(cmds.CALLS),
+        }
+    return results
+
+
+def _run_in_subprocess(kind, size, output_dir):
+    code = (f"import json, sys; sys.path.insert(0, {BENCH_DIR!r}); import logging; logging.disable(logging.INFO); "
+            f"from bench_export import run_case; print(json.dumps(run_case({kind!r}, {size}, {output_dir!r})))")
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    import tempfile
+    parser = argparse.ArgumentParser(description='导出流程性能测试')
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000')
+    parser.add_argument('--kinds', default='grid,sphere,scatter')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results, regressions = {}, []
+    # rss 为阶段内的峰值，不支持时为进程峰值并标记 *
+    print(f"{'case':>16} {'stage':>16} {'seconds':>9} {'Mvtx/s':>8} {'rss(MB)':>9} {'calls':>6} {'vs base':>8}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for kind in args.kinds.split(','):
+            for size in [int(size) for size in args.sizes.split(',')]:
+                case = f"{kind}:{size}"
+                results[case] = _run_in_subprocess(kind, size, output_dir)
+                for stage in STAGES:
+                    metrics = results[case][stage]
+                    base = baseline.get(case, {}).get(stage, {}).get('seconds')
+                    delta = ''
+                    if base:
+                        ratio = metrics['seconds'] / base - 1.0
+                        delta = f"{ratio:+.0%}"
+                        if ratio > args.tolerance:
+                            regressions.append(f"{case} {stage}")
+                    throughput = (metrics['vertices_per_second'] or 0) / 1e6
+                    rss = f"{metrics['peak_rss_mb']:.1f}" if metrics['peak_rss_mb'] is not None \
+                        else f"{metrics['process_peak_rss_mb']:.1f}*"
+                    print(f"{case:>16} {stage:>16} {metrics['seconds']:>9.4f} {throughput:>8.2f} "
+                          f"{rss:>9} {sum(metrics['calls'].values()):>6} {delta:>8}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"基线已更新: {args.baseline}")
+    if regressions:
+        print("性能回退: " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
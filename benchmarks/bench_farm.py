@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""批量导出吞吐量：用 fake 场景来源在不同进程数下运行同一批任务
+
+用法: python benchmarks/bench_farm.py [任务数] [每个任务的网格数] [网格边长]
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+
+from action.farm import run_farm
+
+
+def main(jobs=32, meshes=8, size=64):
+    jobs, meshes, size = int(jobs), int(meshes), int(size)
+    scene = {'meshes': meshes, 'rows': size, 'cols': size}
+    print(f"{'workers':>7} {'seconds':>9} {'jobs/s':>8} {'failed':>6}")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with tempfile.TemporaryDirectory() as output_dir:
+            report = run_farm([{'name': f"job_{i}", 'scene': scene} for i in range(jobs)], 'fake', workers,
+                              output_dir=output_dir)
+        print(f"{workers:>7} {report['seconds']:>9.3f} {report['jobs_per_second']:>8.2f} {report['failed']:>6}")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main(*sys.argv[1:])
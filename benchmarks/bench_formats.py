@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""输出格式性能测试：同一批合成网格分别保存为 usdc / usda / usdz，对比耗时、文件大小和读取耗时
+
+用法: python benchmarks/bench_formats.py [网格边长 ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+
+from pxr import Usd
+
+from action.formats import FORMATS, save_stage
+from action.mesh_source import FakeMeshSource
+from action.writer import author_mesh
+
+
+def make_stage(size):
+    source = FakeMeshSource()
+    source.add_grid('grid', size, size)
+    stage = Usd.Stage.CreateInMemory()
+    stage.DefinePrim('/Root', 'Xform')
+    author_mesh(stage, '/Root/grid', source.meshes['grid'])
+    return stage
+
+
+def main(*sizes):
+    sizes = sizes or (32, 128, 512, 1024)
+    print(f"{'faces':>9} {'format':>6} {'save(s)':>9} {'open(s)':>9} {'bytes':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            stage = make_stage(size)
+            for fmt in FORMATS:
+                metrics = save_stage(stage, os.path.join(temp_dir, f"grid_{size}.{fmt}"), fmt)
+                start = time.perf_counter()
+                opened = Usd.Stage.Open(metrics['path'])
+                opened.GetPrimAtPath('/Root/grid').GetAttribute('points').Get()
+                open_seconds = time.perf_counter() - start
+                print(f"{size * size:>9} {fmt:>6} {metrics['seconds']:>9.4f} {open_seconds:>9.4f} {metrics['bytes']:>12}")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""payload 布局的下游打开性能：同一批网格分别导出为单个 layer 和 payload 布局，
+在独立的子进程中统计打开、按需加载部分网格并读取已加载网格的点的耗时和峰值内存
+
+用法: python benchmarks/bench_payload.py [网格数] [网格边长] [加载的网格数]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def export(usd_path, meshes, size, layout=None):
+    """用导出树的动作导出 meshes 个 size x size 的平面网格"""
+    sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'python-usd'))
+    from behavior_tree.core import Blackboard, Status
+    from action.create import CreateUsd, SetRootPrim, GetGeometryInfo, WriteRootPrim, SaveUsd
+    from action.mesh_source import FakeMeshSource
+    source = FakeMeshSource()
+    blackboard = Blackboard()
+    for key, value in dict(usd_path=usd_path, mesh_source=source, export_layout=layout, authoring_mode='sdf',
+                           geo_selected=[source.add_grid(f"grid_{i}", size, size, 1.0 + i) for i in range(meshes)]
+                           ).items():
+        blackboard.set(key, value)
+    for action in (CreateUsd, SetRootPrim, GetGeometryInfo, WriteRootPrim, SaveUsd):
+        status = action(name=action.__name__).execute(blackboard)
+        if status != Status.SUCCESS:
+            raise RuntimeError(f"{action.__name__} 返回 {status}")
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0), 1)
+
+
+def open_case(usd_path, mode, load_count):
+    """在当前进程打开 usd_path 并读取已加载网格的点
+
+    all 全部加载；none 只读接口；some 只加载前 load_count 个 payload。
+    """
+    import time
+    from pxr import Usd, UsdGeom
+    start = time.perf_counter()
+    stage = Usd.Stage.Open(usd_path, Usd.Stage.LoadAll if mode == 'all' else Usd.Stage.LoadNone)
+    if mode == 'some':
+        # 未加载的 prim 不在 GetChildren() 的结果中
+        for prim in stage.GetPrimAtPath('/Root').GetAllChildren()[:load_count]:
+            prim.Load()
+    points = sum(len(UsdGeom.Mesh(prim).GetPointsAttr().Get()) for prim in stage.Traverse() if prim.IsA(UsdGeom.Mesh))
+    # 未加载的 payload 用 extentsHint 计算包围盒
+    bound = UsdGeom.BBoxCache(Usd.TimeCode.Default(), ['default'], useExtentsHint=True) \
+        .ComputeWorldBound(stage.GetPrimAtPath('/Root')).GetRange()
+    return {'seconds': round(time.perf_counter() - start, 4), 'prims': sum(1 for _ in stage.TraverseAll()),
+            'points': points, 'peak_rss_mb': _peak_rss_mb(), 'bound_max': list(bound.GetMax())}
+
+
+def _run_in_subprocess(call):
+    # Linux 的 ru_maxrss 在 exec 后保留，父进程必须保持很小，导出也放在子进程中
+    code = (f"import json, sys; sys.path.insert(0, {BENCH_DIR!r}); import logging; logging.disable(logging.INFO); "
+            f"import bench_payload; print(json.dumps(bench_payload.{call}))")
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(meshes=64, size=128, load_count=4):
+    meshes, size, load_count = int(meshes), int(size), int(load_count)
+    print(f"{'layout':>8} {'load':>6} {'seconds':>9} {'prims':>6} {'points':>10} {'rss(MB)':>8}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        flat_path = os.path.join(output_dir, 'flat.usdc')
+        payload_path = os.path.join(output_dir, 'payload.usdc')
+        _run_in_subprocess(f"export({flat_path!r}, {meshes}, {size})")
+        _run_in_subprocess(f"export({payload_path!r}, {meshes}, {size}, 'payload')")
+        for layout, usd_path, modes in (('flat', flat_path, ('all',)), ('payload', payload_path, ('all', 'none', 'some'))):
+            for mode in modes:
+                result = _run_in_subprocess(f"open_case({usd_path!r}, {mode!r}, {load_count})")
+                print(f"{layout:>8} {mode:>6} {result['seconds']:>9.4f} {result['prims']:>6} {result['points']:>10} "
+                      f"{result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main(*sys.argv[1:])
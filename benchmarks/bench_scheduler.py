@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""动画调度器性能测试：同时运行 N 个实时动画时单次刷新的耗时（不含 Maya 写入）
+
+用法: python benchmarks/bench_scheduler.py [动画数量 ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+
+import numpy as np
+
+from action.scheduler import Animation, AnimationScheduler, FakePlugWriter
+
+
+def main(*counts):
+    counts = counts or (1, 10, 100, 1000)
+    print(f"{'animations':>10} {'channels':>9} {'mean(ms)':>9} {'max(ms)':>9}")
+    for count in counts:
+        now = [0.0]
+        scheduler = AnimationScheduler(FakePlugWriter(), clock=lambda: now[0], install_job=False)
+        for index in range(count):
+            channels = {f"node{index}.{attr}": (lambda s, k=k: np.sin(s * k)) for k, attr in enumerate('xyzw')}
+            scheduler.add(Animation(f"node{index}", 10.0, channels))
+        # 按 60fps 的刷新时刻推进
+        for frame in range(1, 121):
+            scheduler.tick(frame / 60.0)
+        stats = scheduler.stats()
+        print(f"{count:>10} {count * 4:>9} {stats['mean_ms']:>9.4f} {stats['max_ms']:>9.4f}")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main(*[int(arg) for arg in sys.argv[1:]])
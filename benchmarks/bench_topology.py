@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""面拓扑解析性能测试：构造 polyInfo 格式的输出，验证解析耗时随面数线性增长
+
+用法: python benchmarks/bench_topology.py [最大面数]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+
+from action.topology import parse_face_to_vertex, validate_topology
+
+
+def make_poly_info(face_count):
+    """生成与 cmds.polyInfo(faceToVertex=True) 相同格式的四边面输出"""
+    return [f"FACE {f:>6}: {4 * f:>6} {4 * f + 1:>6} {4 * f + 2:>6} {4 * f + 3:>6} \n" for f in range(face_count)]
+
+
+def bench(face_count, repeat=3):
+    lines = make_poly_info(face_count)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts, indices = parse_face_to_vertex(lines)
+        validate_topology(counts, indices, 4 * face_count)
+        best = min(best, time.perf_counter() - start)
+    assert len(counts) == face_count and np.all(counts == 4)
+    return best
+
+
+def main(max_faces=4000000):
+    face_count = 1000
+    rows = []
+    while face_count <= max_faces:
+        seconds = bench(face_count)
+        rows.append((face_count, seconds))
+        face_count *= 4
+    print(f"{'faces':>10} {'seconds':>10} {'ns/face':>10}")
+    for faces, seconds in rows:
+        print(f"{faces:>10} {seconds:>10.4f} {seconds / faces * 1e9:>10.1f}")
+    # 单个面的耗时基本不变即说明是线性扩展
+    per_face = [seconds / faces for faces, seconds in rows[1:]]
+    print(f"ns/face 最大/最小: {max(per_face) / min(per_face):.2f}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""行为树启动耗时：逐次解析 JSON 并逐个写入黑板 vs 编译缓存
+
+只统计 JSON 解析、校验、动作类查找和黑板数据准备，不包含 json_to_node 本身（两条路径相同）。
+用法: python benchmarks/bench_tree_load.py [树 JSON 路径] [重复次数]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+
+from action.compiler import compile_tree, load_compiled, preload_blackboard
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'sample.json')
+
+
+def load_uncached(path):
+    """examples/sample.py 原来的流程：每次启动都解析 JSON 并逐个 set"""
+    with open(path, 'r', encoding='utf-8') as f:
+        behavior_json = json.load(f)
+    blackboard = {}
+    compile_tree(path)
+    if behavior_json.get('type') == 'Blackboard':
+        for key, value in behavior_json.get('custom_properties', {}).items():
+            blackboard[key] = value
+    return behavior_json, blackboard
+
+
+def load_cached(path, cache_dir):
+    compiled = load_compiled(path, cache_dir)
+    return compiled.tree, preload_blackboard({}, compiled.blackboard)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(path=SAMPLE, repeat=200):
+    repeat = int(repeat)
+    cache_dir = tempfile.mkdtemp()
+    try:
+        load_cached(path, cache_dir)  # 预热：第一次编译并写入缓存
+        uncached = timed(lambda: load_uncached(path), repeat)
+        cached = timed(lambda: load_cached(path, cache_dir), repeat)
+    finally:
+        shutil.rmtree(cache_dir)
+    print(f"{'path':>10} {'ms/load':>9}")
+    print(f"{'uncached':>10} {uncached:>9.4f}")
+    print(f"{'cached':>10} {cached:>9.4f}")
+    print(f"speedup {uncached / cached:.1f}x")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    main(*sys.argv[1:])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""启动导入检查：加载行为树（编译 + 导入用到的动作模块）不能引入 pxr / maya，且耗时不超过预算
+
+每次检查都在新的子进程中进行，避免已导入的模块影响结果；超出预算或引入了重量级依赖时返回非零。
+用法: python benchmarks/check_import_budget.py [树 JSON 路径] [预算毫秒]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SAMPLE = os.path.join(ROOT, 'examples', 'sample.json')
+HEAVY_MODULES = ('pxr', 'maya')
+
+_PROBE = r'''
+import importlib, json, sys, tempfile, time
+sys.path.insert(0, {package_dir!r})
+start = time.perf_counter()
+from action.compiler import load_compiled
+compiled = load_compiled({path!r}, tempfile.mkdtemp())
+loaded = []
+try:
+    for module_name in sorted(set(compiled.classes.values())):
+        importlib.import_module(module_name)
+        loaded.append(module_name)
+    error = None
+except ImportError as e:
+    error = str(e)
+seconds = time.perf_counter() - start
+heavy = sorted(name for name in sys.modules if name.split('.')[0] in {heavy!r})
+print(json.dumps({{'seconds': seconds, 'loaded': loaded, 'heavy': heavy, 'error': error}}))
+'''
+
+
+def probe(path):
+    code = _PROBE.format(package_dir=os.path.join(ROOT, 'python-usd'), path=os.path.abspath(path), heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(path=SAMPLE, budget_ms=200):
+    result = probe(path)
+    milliseconds = result['seconds'] * 1000
+    print(f"加载耗时 {milliseconds:.1f}ms (预算 {float(budget_ms):.0f}ms), 导入动作模块: {result['loaded']}")
+    if result['error']:
+        print(f"动作模块无法导入，只检查了编译阶段: {result['error']}")
+    ok = True
+    if result['heavy']:
+        print(f"失败: 加载行为树时引入了 {result['heavy']}")
+        ok = False
+    if milliseconds > float(budget_ms):
+        print("失败: 超出导入预算")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""性能测试用的假 maya 包，只提供 maya.cmds，不要放到正式环境的 sys.path 中"""
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""假的 maya.cmds：场景由生成的平面、球体和散布的小网格组成
+
+只实现导出流程用到的命令，返回值格式与 Maya 相同（扁平列表、polyInfo 文本），
+数据在调用时才从 NumPy 数组转换，转换的开销相当于 Maya 自己构造返回值的开销。
+CALLS 记录每个命令的调用次数。
+
+法线和UV都按面顶点保存：球体的经线接缝处顶点共用、UV拆开；面顶点组件按顶点升序、
+同一顶点的面降序排列，与面拓扑的顺序不同，读取时必须按组件编号对应。
+"""
+import collections
+import re
+
+import numpy as np
+
+CALLS = collections.Counter()
+
+# 网格名 -> {'points', 'counts', 'indices', 'normals'(逐面顶点), 'uvs'(UV坐标), 'uv_ids'(逐面顶点的UV编号)}
+_meshes = {}
+# 变换节点名 -> 形状节点名
+_transforms = {}
+_selection = []
+_time = [0.0]
+
+
+def _counted(fn):
+    def wrapper(*args, **kwargs):
+        CALLS[fn.__name__] += 1
+        return fn(*args, **kwargs)
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def reset():
+    _meshes.clear()
+    _transforms.clear()
+    _selection.clear()
+    CALLS.clear()
+
+
+def add_mesh(name, points, counts, indices, normals, uvs, uv_ids=None):
+    """添加网格，自动创建名为 name 的变换节点和 name + 'Shape' 的形状节点
+
+    normals 为逐面顶点的法线；uv_ids 为逐面顶点的UV编号，为空时 uvs 按顶点给出。
+    """
+    shape = f"{name}Shape"
+    indices = np.asarray(indices, dtype=np.int64)
+    _meshes[shape] = {
+        'points': np.asarray(points, dtype=np.float64),
+        'counts': np.asarray(counts, dtype=np.int64),
+        'indices': indices,
+        'normals': np.asarray(normals, dtype=np.float64),
+        'uvs': np.asarray(uvs, dtype=np.float64),
+        'uv_ids': indices if uv_ids is None else np.asarray(uv_ids, dtype=np.int64),
+    }
+    _transforms[name] = shape
+    return name
+
+
+def add_grid(name, vertices):
+    """约 vertices 个顶点的平面"""
+    side = max(2, int(round(np.sqrt(vertices))))
+    r, c = np.meshgrid(np.arange(side), np.arange(side), indexing='ij')
+    points = np.column_stack((c.ravel(), np.zeros(r.size), r.ravel())).astype(np.float64)
+    v = ((np.arange(side - 1)[:, None] * side) + np.arange(side - 1)[None, :]).ravel()
+    indices = np.column_stack((v, v + 1, v + side + 1, v + side)).ravel()
+    normals = np.tile((0.0, 1.0, 0.0), (len(indices), 1))
+    uvs = np.column_stack((c.ravel(), r.ravel())) / (side - 1)
+    return add_mesh(name, points, np.full(len(v), 4), indices, normals, uvs)
+
+
+def add_sphere(name, vertices, radius=1.0, center=(0.0, 0.0, 0.0)):
+    """约 vertices 个顶点的经纬球，经线接缝处的顶点共用，两侧的面使用不同的UV；
+    平直着色，同一个顶点在相邻各面上的法线不同"""
+    rings = max(3, int(round(np.sqrt(vertices / 2.0))))
+    segments = max(3, int(round(vertices / rings)) - 1)
+    theta = np.linspace(0.0, np.pi, rings)
+    phi = np.linspace(0.0, 2.0 * np.pi, segments + 1)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    # UV 每行 segments + 1 个，顶点每行 segments 个，最后一列UV对应第一列顶点
+    uvs = np.column_stack((p.ravel() / (2.0 * np.pi), 1.0 - t.ravel() / np.pi))
+    width = segments + 1
+    v = ((np.arange(rings - 1)[:, None] * width) + np.arange(segments)[None, :]).ravel()
+    uv_ids = np.column_stack((v, v + width, v + width + 1, v + 1)).ravel()
+    indices = uv_ids // width * segments + uv_ids % width % segments
+    t, p = t[:, :segments].ravel(), p[:, :segments].ravel()
+    directions = np.column_stack((np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)))
+    points = directions * radius + np.asarray(center)
+    # 面法线取四个顶点方向的平均
+    normals = directions[indices].reshape(-1, 4, 3).sum(axis=1)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return add_mesh(name, points, np.full(len(v), 4), indices, np.repeat(normals, 4, axis=0), uvs, uv_ids)
+
+
+def add_scatter(name, vertices, count=None, seed=0):
+    """把一个小球复制 count 份随机散布，总顶点数约为 vertices，返回变换节点列表"""
+    count = count or max(1, vertices // 100)
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-100.0, 100.0, (count, 3))
+    return [add_sphere(f"{name}_{i}", max(12, vertices // count), 1.0, centers[i]) for i in range(count)]
+
+
+@_counted
+def ls(*args, **kwargs):
+    if args and kwargs.get('flatten'):
+        return [name for component in _as_list(args[0]) for name in _flatten(component)]
+    if kwargs.get('sl') or kwargs.get('selection'):
+        return list(_selection)
+    if kwargs.get('type') == 'mesh':
+        return list(_meshes)
+    return list(_transforms) + list(_meshes)
+
+
+@_counted
+def select(*nodes, **kwargs):
+    if not kwargs.get('add'):
+        _selection.clear()
+    for node in nodes:
+        _selection.extend(node if isinstance(node, (list, tuple)) else [node])
+
+
+@_counted
+def objectType(node, isType=None):
+    node_type = 'transform' if node in _transforms else 'mesh' if node in _meshes else None
+    if node_type is None:
+        raise RuntimeError(f"No object matches name: {node}")
+    return node_type == isType if isType else node_type
+
+
+@_counted
+def listRelatives(node, shapes=False, type=None, **kwargs):
+    shape = _transforms.get(node)
+    return [shape] if shapes and shape else None
+
+
+def _mesh(component):
+    return _meshes[component.split('.')[0]]
+
+
+def _as_list(components):
+    return components if isinstance(components, (list, tuple)) else [components]
+
+
+def _face_ids(mesh):
+    """每个面顶点所在的面"""
+    if 'face_ids' not in mesh:
+        mesh['face_ids'] = np.repeat(np.arange(len(mesh['counts'])), mesh['counts'])
+    return mesh['face_ids']
+
+
+def _vertex_face_order(mesh):
+    """面顶点组件的顺序：顶点升序，同一顶点的面降序"""
+    if 'vertex_face_order' not in mesh:
+        mesh['vertex_face_order'] = np.lexsort((-_face_ids(mesh), mesh['indices']))
+    return mesh['vertex_face_order']
+
+
+def _flatten(component):
+    """展开 vtxFace[*][*] 或带范围的组件，与 ls -flatten 相同"""
+    node, _, name = component.partition('.')
+    if name == 'vtxFace[*][*]':
+        mesh = _meshes[node]
+        order = _vertex_face_order(mesh)
+        return [f"{node}.vtxFace[{vertex}][{face}]"
+                for vertex, face in zip(mesh['indices'][order].tolist(), _face_ids(mesh)[order].tolist())]
+    kind = name.partition('[')[0]
+    ranges = [range(int(start), int(stop or start) + 1) for start, stop in re.findall(r'\[(\d+)(?::(\d+))?\]', name)]
+    if len(ranges) == 1:
+        return [f"{node}.{kind}[{index}]" for index in ranges[0]]
+    return [f"{node}.{kind}[{vertex}][{face}]" for vertex in ranges[0] for face in ranges[1]]
+
+
+@_counted
+def xform(component, query=False, translation=False, worldSpace=False, **kwargs):
+    return _mesh(component)['points'].ravel().tolist()
+
+
+@_counted
+def polyInfo(component, faceToVertex=False):
+    mesh = _mesh(component)
+    counts, indices = mesh['counts'], mesh['indices']
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    lines = []
+    for face, (start, count) in enumerate(zip(starts.tolist(), counts.tolist())):
+        vertices = ' '.join(f"{index:6d}" for index in indices[start:start + count].tolist())
+        lines.append(f"FACE {face:6d}: {vertices} \n")
+    return lines
+
+
+@_counted
+def polyNormalPerVertex(component, query=False, xyz=False):
+    mesh = _mesh(component)
+    # 只支持 vtxFace[*][*]，顺序与 ls -flatten 相同
+    return mesh['normals'][_vertex_face_order(mesh)].ravel().tolist()
+
+
+@_counted
+def polyUVSet(mesh, query=False, allUVSets=False):
+    return ['map1'] if len(_meshes[mesh]['uvs']) else None
+
+
+@_counted
+def polyEditUV(component, query=False, u=False, v=False):
+    return _mesh(component)['uvs'].ravel().tolist()
+
+
+@_counted
+def polyListComponentConversion(component, fromUV=False, toVertexFace=False, **kwargs):
+    """只支持单个UV转换为使用它的面顶点，同一顶点的连续面合并为范围"""
+    node = component.split('.')[0]
+    mesh = _meshes[node]
+    if 'uv_order' not in mesh:
+        mesh['uv_order'] = np.argsort(mesh['uv_ids'], kind='stable')
+        mesh['uv_sorted'] = mesh['uv_ids'][mesh['uv_order']]
+    uv = int(re.search(r'\[(\d+)\]', component).group(1))
+    start, stop = np.searchsorted(mesh['uv_sorted'], (uv, uv + 1))
+    positions = mesh['uv_order'][start:stop]
+    pairs = sorted(zip(mesh['indices'][positions].tolist(), _face_ids(mesh)[positions].tolist()))
+    result = []
+    for vertex, face in pairs:
+        if result and result[-1][0] == vertex and result[-1][2] == face - 1:
+            result[-1][2] = face
+        else:
+            result.append([vertex, face, face])
+    return [f"{node}.vtxFace[{vertex}][{first}:{last}]" if last > first else f"{node}.vtxFace[{vertex}][{first}]"
+            for vertex, first, last in result]
+
+
+@_counted
+def currentTime(frame=None, update=True, **kwargs):
+    if frame is not None:
+        _time[0] = frame
+    return _time[0]
+
+
+@_counted
+def warning(message):
+    pass
@@ -1,39 +1,53 @@
 # -*- coding: utf-8 -*-
 # Jcen
-import json
+import os
+import sys
 import time
 
 from behavior_tree.core import (
-    BehaviorTree, Action, Condition, Status, Blackboard, MockBackendFetcher
+    Action, Condition, Status, MockBackendFetcher
 )
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-usd'))
+from action.compiler import build_tree, load_compiled
+from action.memo import VersionedBlackboard
+
+# 两次 tick 之间的间隔（秒）
+TICK_INTERVAL = 0.05
+
+
+def tick_until_done(trees, interval=TICK_INTERVAL):
+    """轮流 tick 多棵行为树，直到全部不再返回 RUNNING
+
+    耗时动作在后台执行并返回 RUNNING，这里不会阻塞，多个发布可以同时推进。
+    """
+    statuses = [None] * len(trees)
+    while True:
+        for index, tree in enumerate(trees):
+            if statuses[index] in (None, Status.RUNNING):
+                statuses[index] = tree.tick()
+        if Status.RUNNING not in statuses:
+            return statuses
+        time.sleep(interval)
 
 
 if __name__ == "__main__":
 
-    # 你的JSON数据
-    with open(r'./sample.json', 'r', encoding='utf-8') as f:
-        behavior_json = json.load(f)
-
-    blackboard = Blackboard()
-    root_node = BehaviorTree.json_to_node(behavior_json, blackboard=blackboard)
-
-    bt = BehaviorTree(root=root_node, blackboard=blackboard)
-    blackboard = bt.blackboard
-    # （可选）设置黑板数据（影响条件判断）
-    # 1. 配置项目与流程的对应关系
-
-    # 设置usd创建usd的一些数据
-    if behavior_json.get('type') == 'Blackboard':
-        for key, value in behavior_json.get('custom_properties', {}).items():
-            blackboard.set(key, value)
-    if behavior_json.get('json_file'):
-        with open(behavior_json.get('json_file'), 'r', encoding='utf-8') as f:
-            blackboard_data = json.load(f)
-        for key, value in blackboard_data.items():
-            blackboard.set(key, value)
-
-    status = bt.tick()
+    # 校验过的树和黑板数据按文件哈希缓存在 .bt_cache，sample.json 没有变化时不再重新解析
+    compiled = load_compiled(r'./sample.json')
+    # 带版本号的黑板让 @memoize 的动作在输入没有变化时跳过
+    bt = build_tree(compiled, VersionedBlackboard())
+
+    # 设置环境变量 BT_TRACE=trace.json 时记录每个节点的耗时，可用 chrome://tracing 或 Perfetto 打开
+    trace_path = os.environ.get('BT_TRACE')
+    if trace_path:
+        from action.tracing import Tracer
+        with Tracer() as tracer:
+            status = tick_until_done([bt])[0]
+        tracer.save_chrome_trace(trace_path)
+        tracer.log_summary()
+    else:
+        status = tick_until_done([bt])[0]
 
 
     print(f"行为树执行状态: {status}")
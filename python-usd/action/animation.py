@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""形变动画导出：逐帧批量读取点和法线写成时间采样，可选拆分为 value clips"""
+import bisect
+import logging
+import os
+
+import numpy as np
+from pxr import Sdf, Usd, Vt
+
+from .layers import new_layer
+from .mesh_source import extract_geometry
+from .writer import author_mesh_spec
+
+
+# 不拆分 clip 时每隔多少帧把已保存的采样写入 layer，释放内存中的数组
+FLUSH_FRAMES = 100
+
+
+class SampleTrack(object):
+    """单个属性的时间采样
+
+    与上一帧完全相同的帧不保存；一段相同帧的最后一帧在值发生变化时补上，
+    保证线性插值结果与逐帧采样一致。只保存过一帧的属性视为常量。
+    已经写出的采样用 discard_before() 丢弃，内存中只保留尚未写出的部分。
+    """
+
+    __slots__ = ('frames', 'values', 'count', '_pending', '_last')
+
+    def __init__(self):
+        self.frames = []
+        self.values = []
+        self.count = 0
+        self._pending = None
+        self._last = None
+
+    def _append(self, frame, value):
+        self.frames.append(frame)
+        self.values.append(value)
+        self.count += 1
+
+    def add(self, frame, value):
+        if self._last is not None and np.array_equal(value, self._last):
+            self._pending = (frame, value)
+            return
+        if self._pending is not None:
+            self._append(*self._pending)
+            self._pending = None
+        self._append(frame, value)
+        self._last = value
+
+    @property
+    def constant(self):
+        return self.count <= 1
+
+    def value_at(self, frame):
+        """跳过的帧都等于它之前最近一个保存的帧"""
+        return self.values[max(0, bisect.bisect_right(self.frames, frame) - 1)]
+
+    def samples(self, start=None, end=None):
+        """[start, end] 范围内的采样，两端补上边界帧的值，供 value clip 使用"""
+        if start is None:
+            return list(zip(self.frames, self.values))
+        samples = [(start, self.value_at(start))]
+        samples.extend((f, v) for f, v in zip(self.frames, self.values) if start < f < end)
+        if end > start:
+            samples.append((end, self.value_at(end)))
+        return samples
+
+    def discard_before(self, frame):
+        """丢弃 frame 之前的采样，保留 frame 处生效的那一个供 value_at 使用"""
+        keep = max(0, bisect.bisect_right(self.frames, frame) - 1)
+        del self.frames[:keep]
+        del self.values[:keep]
+
+
+def _write_track(layer, attr_path, type_name, vt_type, samples):
+    """在 layer 上创建属性 spec（已存在时复用）并写入时间采样"""
+    prim_spec = Sdf.CreatePrimInLayer(layer, attr_path.GetPrimPath())
+    if not layer.GetAttributeAtPath(attr_path):
+        Sdf.AttributeSpec(prim_spec, attr_path.name, type_name, Sdf.VariabilityVarying, declaresCustom=False)
+    for frame, value in samples:
+        layer.SetTimeSample(attr_path, float(frame), vt_type.FromNumpy(value))
+
+
+def _write_clip(clip_layer, tracks):
+    """tracks 为 {属性路径: (类型, Vt 类型, 采样)}，写入 clip layer 并保存"""
+    with Sdf.ChangeBlock():
+        for attr_path, (type_name, vt_type, samples) in tracks.items():
+            over = Sdf.CreatePrimInLayer(clip_layer, attr_path.GetPrimPath())
+            over.specifier = Sdf.SpecifierOver
+            _write_track(clip_layer, attr_path, type_name, vt_type, samples)
+    clip_layer.Save()
+
+
+class _ClipWriter(object):
+    """每个 clip 的帧读完后立即写出它的 clip layer，最后写 manifest 和 clips 元数据
+
+    clip 写出后不再保留 layer；后来才出现变化的属性，之前的 clip 重新打开补上它的常量值。
+    """
+
+    def __init__(self, frames, clip_frames, clip_dir, anchor_dir):
+        os.makedirs(clip_dir, exist_ok=True)
+        self.clip_dir = clip_dir
+        self.anchor_dir = anchor_dir
+        # (结束帧的序号, 起始帧, 结束帧, clip 路径)
+        self.clips = []
+        for index, offset in enumerate(range(0, len(frames), clip_frames)):
+            last = min(offset + clip_frames, len(frames) - 1)
+            self.clips.append((last, float(frames[offset]), float(frames[last]),
+                               os.path.join(clip_dir, f"clip.{index:04d}.usdc")))
+        self.ends = {clip[0] for clip in self.clips}
+        self.written = 0
+        self.saved = set()
+
+    def _save(self, clip_path, tracks):
+        if not tracks:
+            return
+        # 本次导出保存过的 clip 重新打开追加，否则新建并覆盖旧文件
+        _write_clip(Sdf.Layer.FindOrOpen(clip_path) if clip_path in self.saved else new_layer(clip_path), tracks)
+        self.saved.add(clip_path)
+
+    def flush(self, position, animated, promoted):
+        """读完第 position 帧后写出所有在这一帧结束的 clip，promoted 为刚出现变化的属性"""
+        # 之前的 clip 中，刚出现变化的属性一直等于它的第一个值
+        for _, start, end, clip_path in self.clips[:self.written]:
+            self._save(clip_path, {attr_path: (type_name, vt_type, [(start, track.values[0]), (end, track.values[0])])
+                                   for attr_path, (type_name, vt_type, track) in promoted.items()})
+        while self.written < len(self.clips) and self.clips[self.written][0] == position:
+            _, start, end, clip_path = self.clips[self.written]
+            self._save(clip_path, {attr_path: (type_name, vt_type, track.samples(start, end))
+                                   for attr_path, (type_name, vt_type, track) in animated.items()})
+            self.written += 1
+        for _, _, track in animated.values():
+            track.discard_before(self.clips[self.written - 1][2])
+
+    def finish(self, layer, root_path, animated):
+        """写 manifest 并在 root_path 上写 clips 元数据，返回 clip 数量"""
+        manifest_path = os.path.join(self.clip_dir, 'manifest.usda')
+        manifest = new_layer(manifest_path)
+        with Sdf.ChangeBlock():
+            for attr_path, (type_name, _, _) in animated.items():
+                over = Sdf.CreatePrimInLayer(manifest, attr_path.GetPrimPath())
+                over.specifier = Sdf.SpecifierOver
+                Sdf.AttributeSpec(over, attr_path.name, type_name, Sdf.VariabilityVarying, declaresCustom=False)
+        manifest.Save()
+
+        relative = lambda path: './' + os.path.relpath(path, self.anchor_dir).replace(os.sep, '/')
+        root_spec = layer.GetPrimAtPath(root_path)
+        root_spec.SetInfo('clips', {
+            'default': {
+                'assetPaths': Sdf.AssetPathArray([relative(clip[3]) for clip in self.clips]),
+                'primPath': str(root_path),
+                'active': Vt.Vec2dArray([(clip[1], index) for index, clip in enumerate(self.clips)]),
+                'times': Vt.Vec2dArray([time for clip in self.clips for time in ((clip[1], clip[1]), (clip[2], clip[2]))]),
+                'manifestAssetPath': Sdf.AssetPath(relative(manifest_path)),
+            }
+        })
+        return len(self.clips)
+
+
+def export_animation(source, meshes, layer, root_path, frames, clip_frames=None, clip_dir=None, anchor_dir=None):
+    """导出形变动画
+
+    第一帧提取完整网格（拓扑在整个范围内不变），之后每帧只批量读取点和法线。
+    从不变化的属性保留为默认值；变化的点写成时间采样，变化的法线改为不带索引的逐帧采样。
+    clip_frames 不为空时把时间采样拆分到 clip_dir 下的 value clips，anchor_dir 为根 layer 所在目录，
+    每个 clip 的帧读完就写出；否则每 FLUSH_FRAMES 帧把采样写入 layer。
+    """
+    root_path = Sdf.Path(str(root_path))
+    frames = [float(frame) for frame in frames]
+    source.set_time(frames[0])
+    # {属性路径: (网格, 属性名, 采样)}
+    tracks = {}
+    with Sdf.ChangeBlock():
+        for mesh in meshes:
+            geo = extract_geometry(source, mesh)
+            mesh_path = root_path.AppendChild(geo.name)
+            author_mesh_spec(layer, mesh_path, geo)
+            # 第一帧直接使用提取的点和法线，不再重复读取
+            for name, attr_name, value in (('points', 'points', geo.points),
+                                           ('normals', 'primvars:normals', geo.normals)):
+                if len(value):
+                    track = SampleTrack()
+                    track.add(frames[0], value)
+                    tracks[mesh_path.AppendProperty(attr_name)] = (mesh, name, track)
+
+    animated = {}
+
+    def promote():
+        """把新出现变化的属性改为时间采样，返回 {属性路径: (类型, Vt 类型, 采样)}"""
+        promoted = {}
+        for attr_path, (_, name, track) in tracks.items():
+            if track.constant or attr_path in animated:
+                continue
+            prim_spec = layer.GetPrimAtPath(attr_path.GetPrimPath())
+            if name == 'points':
+                promoted[attr_path] = (Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray, track)
+            else:
+                # 索引会随帧变化，动画法线改为不带索引的 faceVarying 采样
+                prim_spec.RemoveProperty(prim_spec.properties['primvars:normals:indices'])
+                promoted[attr_path] = (Sdf.ValueTypeNames.Normal3fArray, Vt.Vec3fArray, track)
+            # 默认值由时间采样代替
+            layer.GetAttributeAtPath(attr_path).ClearDefaultValue()
+        animated.update(promoted)
+        return promoted
+
+    clips = _ClipWriter(frames, int(clip_frames), clip_dir, anchor_dir) if clip_frames else None
+    for position, frame in enumerate(frames):
+        if position:
+            # 时间切换代价高，先切换到这一帧再读取所有网格
+            source.set_time(frame)
+            for mesh, name, track in tracks.values():
+                track.add(frame, source.read_points(mesh) if name == 'points' else source.read_normals(mesh))
+        if clips is not None:
+            if position in clips.ends:
+                with Sdf.ChangeBlock():
+                    promoted = promote()
+                clips.flush(position, animated, promoted)
+        elif position == len(frames) - 1 or position % FLUSH_FRAMES == FLUSH_FRAMES - 1:
+            with Sdf.ChangeBlock():
+                promote()
+                for attr_path, (type_name, vt_type, track) in animated.items():
+                    _write_track(layer, attr_path, type_name, vt_type, track.samples())
+                    track.discard_before(frame)
+
+    stats = {'meshes': len(meshes), 'frames': len(frames), 'animated_attributes': len(animated),
+             'constant_attributes': len(tracks) - len(animated),
+             'samples': sum(track.count for _, _, track in animated.values()), 'clips': 0}
+    if clips is not None and animated:
+        stats['clips'] = clips.finish(layer, root_path, animated)
+
+    logging.info(f"动画导出 {stats['meshes']} 个网格 {stats['frames']} 帧: {stats['animated_attributes']} 个属性有动画, "
+                 f"{stats['constant_attributes']} 个属性为常量, 保存 {stats['samples']} 个采样, {stats['clips']} 个 clip")
+    return stats
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""非阻塞动作：耗时工作放到线程池或 asyncio 事件循环执行，完成前每次 tick 返回 RUNNING"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from behavior_tree.core import Action, Blackboard, Status
+
+# 线程池大小，决定同时进行的耗时动作数量
+DEFAULT_MAX_WORKERS = 8
+
+_executor = None
+_loop = None
+_lock = threading.Lock()
+# 正在执行的 run 对应的取消事件；每次运行一个新事件，取消后再次 tick 启动的新运行不会影响旧运行看到的事件
+_run_cancel_event = contextvars.ContextVar('bt_run_cancel_event', default=None)
+
+
+def get_executor():
+    """所有异步动作共用的线程池"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix='bt-action')
+        return _executor
+
+
+def get_event_loop():
+    """在后台线程运行的事件循环，用于 async def 形式的 run()"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='bt-asyncio', daemon=True).start()
+        return _loop
+
+
+class AsyncAction(Action):
+    """耗时动作基类，子类实现 run(blackboard) 返回 Status（或 bool，None 视为成功）
+
+    run 为普通函数时在线程池执行，为 async def 时作为 asyncio 任务执行。
+    第一次 tick 启动任务，之后每次 tick 查看状态：未完成返回 RUNNING，完成后返回 run 的结果，
+    抛出异常或超过 timeout 秒返回 FAILURE。cancel() 取消正在执行的任务，
+    线程中的 run 需要通过 wait() / cancelled 配合退出；被取消的运行退出之前再次 tick 返回 RUNNING，
+    不会与新的运行重叠。
+    """
+
+    # 超时秒数，None 表示不限制；可由 JSON 节点属性覆盖
+    timeout = None
+
+    def __init__(self, **kwargs):
+        super().__init__(name=kwargs.get('name'), blackboard=kwargs.get('blackboard'))
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self._future = None
+        self._stopping = None
+        self._started = None
+        self._cancel_event = threading.Event()
+
+    def run(self, blackboard: Blackboard):
+        raise NotImplementedError
+
+    @property
+    def running(self):
+        return self._future is not None
+
+    def _current_cancel_event(self):
+        """在 run 中为本次运行的事件，在其它地方为最近一次运行的事件"""
+        return _run_cancel_event.get() or self._cancel_event
+
+    @property
+    def cancelled(self):
+        return self._current_cancel_event().is_set()
+
+    def wait(self, seconds):
+        """可被取消的等待，取消时返回 True"""
+        return self._current_cancel_event().wait(seconds)
+
+    def cancel(self):
+        """取消正在执行的任务，等它退出后下一次 tick 重新开始"""
+        if self._future is None:
+            return False
+        self._cancel_event.set()
+        self._future.cancel()
+        self._stopping, self._future = self._future, None
+        logging.info(f"取消动作: {self.__class__.__name__}")
+        return True
+
+    def _run_thread(self, blackboard, event):
+        token = _run_cancel_event.set(event)
+        try:
+            return self.run(blackboard)
+        finally:
+            _run_cancel_event.reset(token)
+
+    async def _run_async(self, blackboard, event):
+        # 每个 asyncio 任务有自己的 context，这里的设置只对本次运行可见
+        _run_cancel_event.set(event)
+        return await self.run(blackboard)
+
+    def _start(self, blackboard):
+        event = self._cancel_event = threading.Event()
+        self._started = time.monotonic()
+        if asyncio.iscoroutinefunction(self.run):
+            self._future = asyncio.run_coroutine_threadsafe(self._run_async(blackboard, event), get_event_loop())
+        else:
+            self._future = get_executor().submit(self._run_thread, blackboard, event)
+
+    def execute(self, blackboard: Blackboard) -> Status:
+        if self._future is None:
+            if self._stopping is not None and not self._stopping.done():
+                # 被取消的运行还没有退出
+                return Status.RUNNING
+            self._stopping = None
+            self._start(blackboard)
+            return Status.RUNNING
+        if not self._future.done():
+            timeout = getattr(self, 'timeout', None)
+            if timeout is not None and time.monotonic() - self._started > float(timeout):
+                logging.warning(f"{self.__class__.__name__} 超时 ({timeout}s)")
+                self.cancel()
+                return Status.FAILURE
+            return Status.RUNNING
+
+        future, self._future = self._future, None
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.warning(f"{self.__class__.__name__} 执行失败: {e}")
+            return Status.FAILURE
+        if result is None or isinstance(result, bool):
+            return Status.FAILURE if result is False else Status.SUCCESS
+        return result
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""几何缓存：按网格内容哈希缓存写好的网格 spec，重复导出时直接复制，跳过去重和逐属性写入"""
+import hashlib
+import os
+import time
+
+from pxr import Sdf
+
+# 写入格式变化时递增，旧缓存自动失效
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+_CACHE_PRIM = 'Mesh'
+
+
+def geometry_hash(geo):
+    """网格拓扑、点、法线和UV的内容哈希，与网格名无关"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CACHE_VERSION}".encode())
+    for key in ('points', 'face_vertex_counts', 'face_vertex_indices', 'normals', 'uvs'):
+        array = getattr(geo, key)
+        digest.update(f"{key}{array.shape}{array.dtype}".encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+class GeometryCache(object):
+    """磁盘上的网格缓存
+
+    每个条目是一个只包含 /Mesh 的 usdc 文件，去重统计保存在它的 customLayerData 中，
+    文件修改时间作为最近使用时间。索引每次都从目录内容重建，不单独保存，
+    多个进程共用同一目录时不会互相覆盖索引。
+    总大小超过 max_bytes 或条目数超过 max_entries 时按最近最少使用淘汰。
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self.scan()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.usdc")
+
+    def scan(self):
+        """从目录内容重建索引 {key: {'size', 'atime'}}，跳过其它进程正在写的临时文件"""
+        index = {}
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext != '.usdc' or '.' in key:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                # 已被其它进程淘汰
+                continue
+            index[key] = {'size': stat.st_size, 'atime': stat.st_mtime}
+        return index
+
+    def _open(self, key):
+        try:
+            return Sdf.Layer.FindOrOpen(self._entry_path(key))
+        except RuntimeError:
+            return None
+
+    def author(self, layer, path, geo, author):
+        """命中时把缓存的 spec 复制到 layer 的 path，未命中时调用 author() 写入并存入缓存
+
+        其它进程写入的条目同样可以命中。返回网格的去重统计。
+        """
+        key = geometry_hash(geo)
+        cached = self._open(key) if os.path.exists(self._entry_path(key)) else None
+        if cached:
+            parent = Sdf.Path(path).GetParentPath()
+            if parent != Sdf.Path.absoluteRootPath:
+                Sdf.CreatePrimInLayer(layer, parent)
+            Sdf.CopySpec(cached, f"/{_CACHE_PRIM}", layer, path)
+            self._touch(key)
+            self.hits += 1
+            return {name: dict(report) for name, report in cached.customLayerData.get('report', {}).items()}
+        self.misses += 1
+        report = author()
+        self._store(key, layer, path, report)
+        return report
+
+    def _touch(self, key):
+        now = time.time()
+        try:
+            os.utime(self._entry_path(key), (now, now))
+        except OSError:
+            return
+        self.index[key] = {'size': os.path.getsize(self._entry_path(key)), 'atime': now}
+
+    def _store(self, key, layer, path, report):
+        cached = Sdf.Layer.CreateAnonymous()
+        Sdf.CreatePrimInLayer(cached, f"/{_CACHE_PRIM}")
+        Sdf.CopySpec(layer, path, cached, f"/{_CACHE_PRIM}")
+        cached.defaultPrim = _CACHE_PRIM
+        cached.customLayerData = {'report': report}
+        # 先写临时文件再改名，避免其它进程读到写了一半的缓存
+        temp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp.usdc")
+        cached.Export(temp_path)
+        os.replace(temp_path, self._entry_path(key))
+        self._touch(key)
+        self.evict()
+
+    def evict(self):
+        """重新扫描目录，按最近最少使用淘汰，直到总大小和条目数都不超过上限"""
+        self.index = self.scan()
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['atime']):
+            over_size = self.max_bytes is not None and total > self.max_bytes
+            over_count = self.max_entries is not None and len(self.index) > self.max_entries
+            if not (over_size or over_count):
+                break
+            total -= self.index.pop(key)['size']
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.index),
+            'bytes': sum(entry['size'] for entry in self.index.values()),
+        }
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""超大网格分块写入：按面中心做空间二分，每块不超过 max_faces 个面
+
+submesh: 网格写成 Xform，每块是一个独立的子网格，带 extent，父级带 extentsHint，
+         之后可以按块停用或裁剪，只加载需要的部分；
+subset:  网格照常写成一个 Mesh，每块写成 face 类型的 GeomSubset（family 为 chunk，partition），
+         块的包围盒记录在 subset 的 customData['extent'] 中。
+submesh 模式逐块提取、写入并释放，临时数据只有一块的大小；配合 export_stream 时同时只有一个完整网格在内存中。
+"""
+import logging
+
+import numpy as np
+from pxr import Sdf, UsdGeom, Vt
+
+from .geometry import GeometryBuffer
+from .writer import author_mesh_spec
+
+CHUNK_MODES = ('submesh', 'subset')
+# subset 模式的 family 名
+CHUNK_FAMILY = 'chunk'
+
+
+def _face_offsets(face_vertex_counts):
+    """每个面在 face_vertex_indices 中的起始位置"""
+    return np.concatenate(([0], np.cumsum(face_vertex_counts[:-1], dtype=np.int64)))
+
+
+def _face_varying(geo, faces, offsets):
+    """faces 这些面的面顶点在 face_vertex_indices 中的位置"""
+    counts = geo.face_vertex_counts[faces]
+    starts = np.cumsum(counts, dtype=np.int64) - counts
+    return np.repeat(offsets[faces] - starts, counts) + np.arange(int(counts.sum()))
+
+
+def split_faces(geo, max_faces):
+    """按面中心沿包围盒最长轴反复对半分，返回面编号数组列表（每组升序，按空间顺序排列）"""
+    counts = geo.face_vertex_counts
+    if len(counts) <= max_faces:
+        return [np.arange(len(counts))]
+    centers = np.add.reduceat(geo.points[geo.face_vertex_indices], _face_offsets(counts), axis=0) / counts[:, None]
+    groups, pending = [], [np.arange(len(counts))]
+    while pending:
+        faces = pending.pop()
+        if len(faces) <= max_faces:
+            groups.append(np.sort(faces))
+            continue
+        positions = centers[faces]
+        axis = int(np.argmax(positions.max(axis=0) - positions.min(axis=0)))
+        half = len(faces) // 2
+        # argpartition 只保证两半分开，不做完整排序
+        order = np.argpartition(positions[:, axis], half)
+        pending.append(faces[order[half:]])
+        pending.append(faces[order[:half]])
+    return groups
+
+
+def extract_chunk(geo, faces, name, offsets=None):
+    """取出 faces 这些面组成新的 GeometryBuffer，只保留用到的顶点并重新编号"""
+    offsets = _face_offsets(geo.face_vertex_counts) if offsets is None else offsets
+    face_varying = _face_varying(geo, faces, offsets)
+    used, indices = np.unique(geo.face_vertex_indices[face_varying], return_inverse=True)
+    return GeometryBuffer(
+        name,
+        geo.points[used],
+        geo.face_vertex_counts[faces],
+        indices.ravel(),
+        geo.normals[face_varying] if len(geo.normals) else None,
+        geo.uvs[face_varying] if len(geo.uvs) else None
+    )
+
+
+def _extent(points):
+    return Vt.Vec3fArray.FromNumpy(np.stack((points.min(axis=0), points.max(axis=0))))
+
+
+def _attribute(prim_spec, name, type_name, value, variability=Sdf.VariabilityVarying):
+    attr = Sdf.AttributeSpec(prim_spec, name, type_name, variability, declaresCustom=False)
+    attr.default = value
+    return attr
+
+
+def author_submeshes(layer, path, geo, groups):
+    """path 处写 Xform，每组面写成一个子网格，返回 {子网格名: 去重统计}"""
+    reports = {}
+    prim_spec = Sdf.CreatePrimInLayer(layer, path)
+    prim_spec.specifier = Sdf.SpecifierDef
+    prim_spec.typeName = 'Xform'
+    _attribute(prim_spec, 'extentsHint', Sdf.ValueTypeNames.Float3Array, _extent(geo.points))
+    offsets = _face_offsets(geo.face_vertex_counts)
+    for index, faces in enumerate(groups):
+        chunk = extract_chunk(geo, faces, f"chunk_{index:04d}", offsets)
+        with Sdf.ChangeBlock():
+            chunk_spec = Sdf.CreatePrimInLayer(layer, f"{path}/{chunk.name}")
+            reports[chunk.name] = author_mesh_spec(layer, chunk_spec.path, chunk)
+            _attribute(chunk_spec, UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array, _extent(chunk.points))
+        # 写完立即释放这一块的数组
+        del chunk
+    return reports
+
+
+def author_subsets(layer, path, geo, groups):
+    """path 处写完整网格，每组面写成一个 GeomSubset，返回网格的去重统计"""
+    with Sdf.ChangeBlock():
+        report = author_mesh_spec(layer, path, geo)
+        mesh_spec = layer.GetPrimAtPath(path)
+        _attribute(mesh_spec, UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array, _extent(geo.points))
+        _attribute(mesh_spec, f"subsetFamily:{CHUNK_FAMILY}:familyType", Sdf.ValueTypeNames.Token,
+                   UsdGeom.Tokens.partition, Sdf.VariabilityUniform)
+        offsets = _face_offsets(geo.face_vertex_counts)
+        for index, faces in enumerate(groups):
+            subset = Sdf.PrimSpec(mesh_spec, f"chunk_{index:04d}", Sdf.SpecifierDef, 'GeomSubset')
+            _attribute(subset, UsdGeom.Tokens.elementType, Sdf.ValueTypeNames.Token, UsdGeom.Tokens.face,
+                       Sdf.VariabilityUniform)
+            _attribute(subset, UsdGeom.Tokens.familyName, Sdf.ValueTypeNames.Token, CHUNK_FAMILY,
+                       Sdf.VariabilityUniform)
+            _attribute(subset, UsdGeom.Tokens.indices, Sdf.ValueTypeNames.IntArray,
+                       Vt.IntArray.FromNumpy(faces.astype(np.int32)))
+            face_varying = _face_varying(geo, faces, offsets)
+            subset.customData = {'extent': _extent(geo.points[geo.face_vertex_indices[face_varying]])}
+    return report
+
+
+def author_chunked(layer, root_path, geos, max_faces, mode='submesh', on_authored=None):
+    """把 geos 写到 root_path 下，面数超过 max_faces 的网格分块写入
+
+    返回 ({网格名或 网格名/块名: 去重统计}, {网格名: 分块统计})。
+    """
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"未知的分块模式: {mode}，可选 {', '.join(CHUNK_MODES)}")
+    max_faces = max(1, int(max_faces))
+    reports, stats = {}, {}
+    for geo in geos:
+        path = f"{root_path}/{geo.name}"
+        if geo.face_count <= max_faces:
+            with Sdf.ChangeBlock():
+                reports[geo.name] = author_mesh_spec(layer, path, geo)
+        else:
+            groups = split_faces(geo, max_faces)
+            if mode == 'subset':
+                reports[geo.name] = author_subsets(layer, path, geo, groups)
+            else:
+                for name, report in author_submeshes(layer, path, geo, groups).items():
+                    reports[f"{geo.name}/{name}"] = report
+            stats[geo.name] = {
+                'mode': mode,
+                'faces': geo.face_count,
+                'chunks': len(groups),
+                'max_chunk_faces': max(len(faces) for faces in groups),
+            }
+            logging.info(f"{geo.name}: {geo.face_count} 个面分成 {len(groups)} 块 ({mode})")
+        if on_authored:
+            on_authored(geo)
+        del geo
+    return reports, stats
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""行为树编译缓存：JSON 只校验一次，解析好的节点、动作类和黑板数据按文件哈希缓存
+
+农场上大量短任务反复加载同一棵树，命中缓存时只需读取并哈希 JSON 文件，
+不再解析 JSON、读取 json_file、查找动作类和校验节点。
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import pickle
+
+from .registry import find_action, registry_signature
+
+# 编译结果格式的版本，格式变化时递增，旧缓存自动失效
+COMPILER_VERSION = 1
+
+# 需要动作类的节点类型
+_LEAF_TYPES = ('Action', 'Condition')
+# 只在节点编辑器中使用的字段
+_EDITOR_FIELDS = ('x', 'y')
+
+
+class CompiledTree(object):
+    """校验过的树 JSON、json_file 合并后的黑板数据，以及 {动作类名: 模块名}"""
+
+    __slots__ = ('source', 'hash', 'tree', 'blackboard', 'classes', 'dependencies')
+
+    def __init__(self, source, hash, tree, blackboard, classes, dependencies):
+        self.source = source
+        self.hash = hash
+        self.tree = tree
+        self.blackboard = blackboard
+        self.classes = classes
+        self.dependencies = dependencies
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _compile_node(node, path, base_dir, classes, dependencies, resolver, errors):
+    if not isinstance(node, dict) or not isinstance(node.get('type'), str):
+        errors.append(f"{path}: 节点缺少 type")
+        return None
+    node = {key: value for key, value in node.items() if key not in _EDITOR_FIELDS}
+    path = f"{path}/{node.get('name') or node['type']}"
+    if node['type'] in _LEAF_TYPES:
+        class_name = node.get('class')
+        if not class_name:
+            errors.append(f"{path}: {node['type']} 节点缺少 class")
+        elif class_name not in classes:
+            try:
+                classes[class_name] = resolver(class_name)
+            except ValueError as e:
+                errors.append(f"{path}: {e}")
+    if node.get('bt_file'):
+        dependencies.append(os.path.join(base_dir, node['bt_file']))
+    children = node.get('children') or []
+    if not isinstance(children, list):
+        errors.append(f"{path}: children 必须是列表")
+        children = []
+    node['children'] = [_compile_node(child, path, base_dir, classes, dependencies, resolver, errors)
+                        for child in children]
+    return node
+
+
+def compile_tree(path, resolver=None):
+    """校验树 JSON 并查找全部动作类所在的模块（不导入），有错误时一次性抛出 ValueError
+
+    相对路径的 json_file、bt_file 相对于树 JSON 所在目录，与当前工作目录无关。
+    """
+    resolver = resolver or find_action
+    path = os.path.abspath(path)
+    base_dir = os.path.dirname(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        behavior_json = json.load(f)
+
+    classes, dependencies, errors = {}, [], []
+    tree = _compile_node(behavior_json, '', base_dir, classes, dependencies, resolver, errors)
+    if errors:
+        raise ValueError("行为树校验失败:\n" + "\n".join(errors))
+
+    # 与 examples/sample.py 相同：根节点为 Blackboard 时把自定义属性和 json_file 写入黑板
+    blackboard = {}
+    if behavior_json.get('type') == 'Blackboard':
+        blackboard.update(behavior_json.get('custom_properties', {}))
+    if behavior_json.get('json_file'):
+        json_file = os.path.join(base_dir, behavior_json['json_file'])
+        with open(json_file, 'r', encoding='utf-8') as f:
+            blackboard.update(json.load(f))
+        dependencies.append(json_file)
+
+    return CompiledTree(path, file_hash(path), tree, blackboard, classes,
+                        {dependency: file_hash(dependency) for dependency in dependencies})
+
+
+def _cache_path(cache_dir, path, digest, signature):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}.{digest}.{signature}.v{COMPILER_VERSION}.pickle")
+
+
+def _load_cached(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            compiled = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ImportError, AttributeError, TypeError, ValueError) as e:
+        # 缓存损坏或引用的类已经改名、删除时重新编译
+        logging.debug(f"行为树缓存 {cache_path} 无法读取: {e}")
+        return None
+    if not isinstance(compiled, CompiledTree):
+        return None
+    for dependency, digest in compiled.dependencies.items():
+        if not os.path.exists(dependency) or file_hash(dependency) != digest:
+            return None
+    return compiled
+
+
+def load_compiled(path, cache_dir=None, resolver=None):
+    """读取编译缓存，缓存默认放在 JSON 旁边的 .bt_cache
+
+    JSON、其依赖的文件或动作模块（增删、修改）变化后重新编译；传入 resolver 时不检查动作模块。
+    """
+    path = os.path.abspath(path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), '.bt_cache')
+    cache_path = _cache_path(cache_dir, path, file_hash(path), 'custom' if resolver else registry_signature())
+    compiled = _load_cached(cache_path) if os.path.exists(cache_path) else None
+    if compiled is not None:
+        logging.debug(f"使用行为树缓存: {cache_path}")
+        return compiled
+
+    compiled = compile_tree(path, resolver)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+    logging.info(f"编译行为树 {path}: {len(compiled.classes)} 个动作类, 缓存到 {cache_path}")
+    return compiled
+
+
+def preload_blackboard(blackboard, data):
+    """一次写入全部黑板数据，黑板支持 update() 时不逐个 set"""
+    if hasattr(blackboard, 'update'):
+        blackboard.update(data)
+    else:
+        for key, value in data.items():
+            blackboard.set(key, value)
+    return blackboard
+
+
+def build_tree(compiled, blackboard=None):
+    """从编译结果创建行为树，只导入用到的动作模块"""
+    from behavior_tree.core import BehaviorTree, Blackboard
+    for module_name in set(compiled.classes.values()):
+        importlib.import_module(module_name)
+    blackboard = blackboard if blackboard is not None else Blackboard()
+    root_node = BehaviorTree.json_to_node(compiled.tree, blackboard=blackboard)
+    bt = BehaviorTree(root=root_node, blackboard=blackboard)
+    preload_blackboard(bt.blackboard, compiled.blackboard)
+    return bt
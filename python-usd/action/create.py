@@ -5,20 +5,47 @@ from behavior_tree.core import (
     Action, Blackboard, Status, Inverter, Condition, Repeater, UntilFail
 )
 import logging
+
+from .memo import memoize, STAGE_REVISION
+from .registry import lazy_import
+
+# 第一次用到时才导入，加载行为树时不会引入 Maya 和 USD
+cmds = lazy_import('maya.cmds')
+Usd = lazy_import('pxr.Usd')
+Sdf = lazy_import('pxr.Sdf')
 logging.basicConfig(
     level=logging.INFO,
     format='%(levelname)s: %(message)s'
 )
 
 
+def clear_children(layer, path):
+    """删除 layer 中 path 下的全部子 prim spec"""
+    prim_spec = layer.GetPrimAtPath(path)
+    if prim_spec:
+        with Sdf.ChangeBlock():
+            for name in list(prim_spec.nameChildren.keys()):
+                del prim_spec.nameChildren[name]
+
+
+def set_keep_composition(blackboard, keep):
+    """本次导出是否必须保留组合关系（payload、value clip），值不变时不重新写入"""
+    if bool(blackboard.get('usd_keep_composition')) != keep:
+        blackboard.set('usd_keep_composition', keep)
+
+
 class SelectModel(Action):
     def execute(self, blackboard: Blackboard) -> Status:
-        import maya.cmds as cmds
+        if blackboard.get('headless'):
+            # 批量模式没有交互选择，使用任务给定的 'geo_selected'
+            return Status.SUCCESS if blackboard.get('geo_selected') else Status.FAILURE
         selected = cmds.ls(sl=True)
         if not selected:
             cmds.warning("请先选中模型")
             return Status.FAILURE
-        blackboard.set('geo_selected', selected)
+        # 选择没有变化时不重新写入，下游记忆的动作可以直接跳过
+        if selected != blackboard.get('geo_selected'):
+            blackboard.set('geo_selected', selected)
         return Status.SUCCESS
 
 
@@ -26,204 +53,199 @@ class GetGeometryInfo(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('geo_selected'):
             return Status.FAILURE
-        blackboard.set('GeoList', [])
-        import maya.cmds as cmds
-        from pxr import Sdf, Gf
-        # 确保是多边形网格
-        for obj in blackboard.get('geo_selected'):
-            print(obj)
-            # 获取形状节点（如果是变换节点）
-            if cmds.objectType(obj, isType='transform'):
-                shapes = cmds.listRelatives(obj, shapes=True, type='mesh')
-                if shapes:
-                    for mesh in shapes:
-                        if not cmds.objectType(mesh, isType='mesh'):
-                            cmds.warning(f"{mesh}不是多边形网格")
-                            return Status.FAILURE
-
-                        # 提取顶点位置
-                        points = cmds.xform(f"{mesh}.vtx[*]", query=True, translation=True, worldSpace=True)
-                        points = [Gf.Vec3f(points[i], points[i + 1], points[i + 2]) for i in range(0, len(points), 3)]
-
-                        # 提取面信息
-                        face_count = cmds.polyEvaluate(mesh, face=True)
-                        face_vertex_counts = []
-                        face_vertex_indices = []
-
-                        for face in range(face_count):
-                            # 获取每个面的顶点索引
-                            vtx_indices = cmds.polyInfo(f"{mesh}.f[{face}]", faceToVertex=True)[0]
-                            vtx_indices = list(map(int, vtx_indices.split()[-1:][0].split(',')))
-                            face_vertex_counts.append(len(vtx_indices))
-                            face_vertex_indices.extend(vtx_indices)
-
-                        # 提取法线
-                        normals = []
-                        # 获取顶点数量来确定法线数量
-                        vertex_count = cmds.polyEvaluate(mesh, vertex=True)
-
-                        try:
-                            # 尝试获取第一个顶点的法线来判断是否存在法线数据
-                            first_normal = cmds.polyNormalPerVertex(f"{mesh}.vtx[0]", query=True, xyz=True)
-                            if first_normal:
-                                # 逐顶点提取法线
-                                for i in range(vertex_count):
-                                    normal = cmds.polyNormalPerVertex(f"{mesh}.vtx[{i}]", query=True, xyz=True)
-                                    if normal:  # 确保成功获取法线
-                                        normals.append(Gf.Vec3f(normal[0], normal[1], normal[2]))
-                        except:
-                            # 如果获取法线失败，视为没有法线数据
-                            cmds.warning(f"{mesh}没有可用的顶点法线数据")
-
-                        # 提取UV
-                        uvs = []
-                        try:
-                            # 检查是否存在UV集
-                            uv_sets = cmds.polyUVSet(mesh, query=True, allUVSets=True)
-                            if uv_sets and len(uv_sets) > 0:
-                                uv_count = cmds.polyEvaluate(mesh, uv=True)
-                                for i in range(uv_count):
-                                    uv = cmds.polyEditUV(f"{mesh}.map[{i}]", query=True, u=True, v=True)
-                                    uvs.append(Gf.Vec2f(uv[0], uv[1]))
-                        except:
-                            cmds.warning(f"{mesh}没有可用的UV数据")
-                        blackboard.get('GeoList').append({
-                            'points': points,
-                            'face_vertex_counts': face_vertex_counts,
-                            'face_vertex_indices': face_vertex_indices,
-                            'normals': normals,
-                            'uvs': uvs,
-                            'name': mesh
-                        })
-            else:
-                if not cmds.objectType(obj, isType='mesh'):
-                    cmds.warning(f"{obj}不是多边形网格")
-                    return Status.FAILURE
-
-                # 提取顶点位置
-                points = cmds.xform(f"{obj}.vtx[*]", query=True, translation=True, worldSpace=True)
-                points = [Gf.Vec3f(points[i], points[i + 1], points[i + 2]) for i in range(0, len(points), 3)]
-
-                # 提取面信息
-                face_count = cmds.polyEvaluate(obj, face=True)
-                face_vertex_counts = []
-                face_vertex_indices = []
-
-                for face in range(face_count):
-                    # 获取每个面的顶点索引
-                    vtx_indices = cmds.polyInfo(f"{obj}.f[{face}]", faceToVertex=True)[0]
-                    vtx_indices = list(map(int, vtx_indices.split()[-1:][0].split(',')))
-                    face_vertex_counts.append(len(vtx_indices))
-                    face_vertex_indices.extend(vtx_indices)
-
-                # 提取法线
-                normals = []
-                # 获取顶点数量来确定法线数量
-                vertex_count = cmds.polyEvaluate(obj, vertex=True)
-
-                try:
-                    # 尝试获取第一个顶点的法线来判断是否存在法线数据
-                    first_normal = cmds.polyNormalPerVertex(f"{obj}.vtx[0]", query=True, xyz=True)
-                    if first_normal:
-                        # 逐顶点提取法线
-                        for i in range(vertex_count):
-                            normal = cmds.polyNormalPerVertex(f"{obj}.vtx[{i}]", query=True, xyz=True)
-                            if normal:  # 确保成功获取法线
-                                normals.append(Gf.Vec3f(normal[0], normal[1], normal[2]))
-                except:
-                    # 如果获取法线失败，视为没有法线数据
-                    cmds.warning(f"{obj}没有可用的顶点法线数据")
-
-                # 提取UV
-                uvs = []
-                try:
-                    # 检查是否存在UV集
-                    uv_sets = cmds.polyUVSet(obj, query=True, allUVSets=True)
-                    if uv_sets and len(uv_sets) > 0:
-                        uv_count = cmds.polyEvaluate(obj, uv=True)
-                        for i in range(uv_count):
-                            uv = cmds.polyEditUV(f"{obj}.map[{i}]", query=True, u=True, v=True)
-                            uvs.append(Gf.Vec2f(uv[0], uv[1]))
-                except:
-                    cmds.warning(f"{obj}没有可用的UV数据")
-                blackboard.get('GeoList').append({
-                    'points': points,
-                    'face_vertex_counts': face_vertex_counts,
-                    'face_vertex_indices': face_vertex_indices,
-                    'normals': normals,
-                    'uvs': uvs,
-                    'name': obj
-                })
-                # return {
-                #     'points': points,
-                #     'face_vertex_counts': face_vertex_counts,
-                #     'face_vertex_indices': face_vertex_indices,
-                #     'normals': normals,
-                #     'uvs': uvs,
-                #     'name': obj
-                # }
+        from .mesh_source import get_mesh_source, extract_geometry
+        # 数据源可通过黑板 'mesh_source' 替换，默认走 OpenMaya 批量接口
+        source = get_mesh_source(blackboard.get('mesh_source'))
+        try:
+            # 确保是多边形网格
+            meshes = source.resolve_meshes(blackboard.get('geo_selected'))
+            if blackboard.get('export_stream'):
+                # 流式模式只登记待导出的网格，由 WriteRootPrim 逐个提取、写入、释放
+                from .streaming import MeshStream
+                blackboard.set('GeoStream', MeshStream(source, meshes, blackboard.get('stream_max_inflight', 1)))
+                return Status.SUCCESS
+            # GeoList 中保存 GeometryBuffer，数据都是连续的 NumPy 数组
+            geo_list = [extract_geometry(source, mesh) for mesh in meshes]
+        except ValueError as e:
+            logging.warning(str(e))
+            return Status.FAILURE
+        # 场景修改没有通知，每次都重新提取；内容与上次相同时保留原来的 GeoList，下游记忆的动作可以跳过
+        from .cache import geometry_hash
+        digest = [(geo.name, geometry_hash(geo)) for geo in geo_list]
+        if blackboard.get('GeoList') is None or digest != blackboard.get('GeoList_hash'):
+            blackboard.set('GeoList', geo_list)
+            blackboard.set('GeoList_hash', digest)
+        return Status.SUCCESS
 
 
+@memoize(reads=('GeoList', 'stage', 'ROOT', 'geo_cache_dir', 'geo_cache_max_bytes', 'geo_cache_max_entries',
+                'instancing', 'authoring_mode', 'chunk_faces', 'chunk_mode', 'export_layout', 'payload_group_size',
+                'usd_path'),
+         writes=(STAGE_REVISION, 'primvar_dedup', 'geo_cache_stats', 'instancing_stats', 'chunk_stats',
+                 'payload_stats', 'usd_keep_composition'),
+         skip_if=('export_stream',))
 class WriteRootPrim(Action):
     def execute(self, blackboard: Blackboard) -> Status:
-        if not blackboard.get('GeoList') or not blackboard.get('ROOT'):
+        stream = blackboard.get('GeoStream')
+        if not (stream or blackboard.get('GeoList')) or not blackboard.get('ROOT'):
+            return Status.FAILURE
+        if blackboard.get('export_layout') == 'payload' and not blackboard.get('usd_path'):
+            return Status.FAILURE
+        from .writer import author_mesh, author_meshes_sdf
+        root_prim = blackboard.get('ROOT')
+        stage = blackboard.get('stage')
+        geos = stream or blackboard.get('GeoList')
+        # 流式模式下写入后立即释放，下一个网格才会被提取
+        on_authored = stream.release if stream else None
+        cache = None
+        if blackboard.get('geo_cache_dir'):
+            # 内容没有变化的网格直接复制上次写好的 spec
+            from .cache import GeometryCache, DEFAULT_MAX_BYTES
+            cache = GeometryCache(
+                blackboard.get('geo_cache_dir'),
+                blackboard.get('geo_cache_max_bytes', DEFAULT_MAX_BYTES),
+                blackboard.get('geo_cache_max_entries')
+            )
+        # 重新执行时 stage 仍是上一次的，先清掉上次写入的网格，取消选择的网格不会残留，也不会重复创建 spec
+        clear_children(stage.GetEditTarget().GetLayer(), root_prim.GetPath())
+        keep_composition = False
+        try:
+            if blackboard.get('export_layout') == 'payload':
+                # 每 'payload_group_size' 个网格写成一个 layer 作为 payload，根 layer 只保留层级、包围盒和统计
+                import os
+                from .layers import author_payloads, mesh_layer_dir
+                usd_path = os.path.abspath(blackboard.get('usd_path'))
+                # 内存中的 stage 不加载这些 payload，相对路径要到保存后才能解析
+                rules = stage.GetLoadRules()
+                rules.AddRule(root_prim.GetPath(), Usd.StageLoadRules.NoneRule)
+                stage.SetLoadRules(rules)
+                dedup, payload_stats = author_payloads(stage.GetEditTarget().GetLayer(), root_prim.GetPath(), geos,
+                                                       mesh_layer_dir(usd_path), os.path.dirname(usd_path),
+                                                       blackboard.get('payload_group_size', 1),
+                                                       on_authored=on_authored)
+                blackboard.set('payload_stats', payload_stats)
+                # 展平会把 payload 内容合并回根 layer
+                keep_composition = True
+            elif blackboard.get('chunk_faces'):
+                # 面数超过 'chunk_faces' 的网格按空间分块，'chunk_mode' 可选 submesh（默认）或 subset
+                from .chunking import author_chunked
+                dedup, chunk_stats = author_chunked(stage.GetEditTarget().GetLayer(), root_prim.GetPath(), geos,
+                                                    blackboard.get('chunk_faces'),
+                                                    blackboard.get('chunk_mode', 'submesh'), on_authored)
+                blackboard.set('chunk_stats', chunk_stats)
+            elif blackboard.get('instancing') and not stream:
+                # 只差刚体变换的重复网格只写一次原型，其余写成实例（references 或 pointinstancer）
+                from .instancing import find_instances, author_instanced
+                dedup, instancing_stats = author_instanced(
+                    stage.GetEditTarget().GetLayer(), root_prim.GetPath(), find_instances(geos),
+                    blackboard.get('instancing'))
+                blackboard.set('instancing_stats', instancing_stats)
+            elif blackboard.get('authoring_mode') == 'sdf':
+                # 直接在 layer 上创建 spec，整批网格只触发一次变更通知
+                dedup = author_meshes_sdf(stage.GetEditTarget().GetLayer(), root_prim.GetPath(), geos, on_authored,
+                                          cache)
+            else:
+                dedup = {}
+                for geo in geos:
+                    # 创建网格，法线和UV去重后写成索引 primvar
+                    dedup[geo.name] = author_mesh(stage, f"{root_prim.GetPath()}/{geo.name}", geo, cache)
+                    if on_authored:
+                        on_authored(geo)
+                    del geo
+        except (ValueError, RuntimeError) as e:
+            # RuntimeError 包括 pxr 的 Tf.ErrorException
+            logging.warning(str(e))
+            return Status.FAILURE
+        finally:
+            if cache is not None:
+                blackboard.set('geo_cache_stats', cache.stats())
+                logging.info(f"几何缓存: {cache.stats()}")
+        for mesh_name, reports in dedup.items():
+            for name, report in reports.items():
+                logging.info(f"{mesh_name}.{name}: {report['count']} -> {report['unique']} 个值, "
+                             f"{report['bytes_before']} -> {report['bytes_after']} 字节")
+        blackboard.set('primvar_dedup', dedup)
+        set_keep_composition(blackboard, keep_composition)
+        if stream:
+            from .streaming import log_stream_stats
+            blackboard.set('stream_stats', stream.stats())
+            log_stream_stats(stream.stats())
+            blackboard.set('GeoStream', None)
+
+        return Status.SUCCESS
+
+
+class PipelineExport(Action):
+    """GetGeometryInfo + WriteRootPrim + SaveUsd 的流水线版本，提取与写入、导出同时进行"""
+
+    def execute(self, blackboard: Blackboard) -> Status:
+        if not blackboard.get('geo_selected') or not blackboard.get('ROOT') or not blackboard.get('usd_path'):
             return Status.FAILURE
-        from pxr import UsdGeom, Sdf
-        for geo in blackboard.get('GeoList'):
-            # 创建网格
-            root_prim = blackboard.get('ROOT')
-            stage = blackboard.get('stage')
-            mesh = UsdGeom.Mesh.Define(stage, f"{root_prim.GetPath()}/{geo['name']}")
-
-            # 设置点
-            mesh.CreatePointsAttr(geo['points'])
-
-            # 设置面拓扑
-            mesh.CreateFaceVertexCountsAttr(geo['face_vertex_counts'])
-            mesh.CreateFaceVertexIndicesAttr(geo['face_vertex_indices'])
-
-            # 设置法线 - 修复部分
-            if geo['normals']:
-                # 创建法线属性
-                normals_attr = mesh.CreateNormalsAttr(geo['normals'])
-
-                # 替代方法设置法线插值：使用SetNormalsInterpolation
-                # 检查是否有此方法，有则使用
-                if hasattr(mesh, 'SetNormalsInterpolation'):
-                    mesh.SetNormalsInterpolation(UsdGeom.Tokens.vertex)
-                else:
-                    # 更通用的方法：直接设置属性
-                    interpolation_attr = mesh.GetNormalsInterpolationAttr()
-                    if not interpolation_attr.IsDefined():
-                        interpolation_attr = mesh.CreateNormalsInterpolationAttr()
-                    interpolation_attr.Set(UsdGeom.Tokens.vertex)
-
-            # 设置UV
-            if geo['uvs']:
-                # 创建UV集
-                uv_set = UsdGeom.PrimvarsAPI(mesh).CreatePrimvar(
-                    "st",
-                    Sdf.ValueTypeNames.Float2Array,
-                    UsdGeom.Tokens.varying
-                )
-                uv_set.Set(geo['uvs'])
-
-                # 创建UV绑定
-                mesh.CreatePrimvar("uvSet", Sdf.ValueTypeNames.Token).Set("st")
+        from .mesh_source import get_mesh_source
+        from .pipeline import ExportPipeline
+        source = get_mesh_source(blackboard.get('mesh_source'))
+        pipeline = ExportPipeline(
+            blackboard.get('stage'),
+            blackboard.get('ROOT').GetPath(),
+            blackboard.get('usd_path'),
+            blackboard.get('stream_max_inflight', 2),
+            blackboard.get('usd_format')
+        )
+        try:
+            meshes = source.resolve_meshes(blackboard.get('geo_selected'))
+            blackboard.set('pipeline_stats', pipeline.run(source, meshes))
+            blackboard.set('save_metrics', pipeline.save_metrics)
+        except Exception as e:
+            logging.warning(f"导出失败: {e}")
+            return Status.FAILURE
+        blackboard.set('primvar_dedup', pipeline.dedup)
+        return Status.SUCCESS
+
+
+class ExportAnimation(Action):
+    """代替 GetGeometryInfo + WriteRootPrim 导出形变动画，点和法线写成时间采样"""
 
+    def execute(self, blackboard: Blackboard) -> Status:
+        if not blackboard.get('geo_selected') or not blackboard.get('ROOT') or not blackboard.get('usd_path'):
+            return Status.FAILURE
+        import os
+        from .animation import export_animation
+        from .mesh_source import get_mesh_source
+        stage = blackboard.get('stage')
+        # 'frame_range' 为 (起始帧, 结束帧)，默认使用 stage 的时间范围
+        start, end = blackboard.get('frame_range') or (stage.GetStartTimeCode(), stage.GetEndTimeCode())
+        step = blackboard.get('frame_step', 1)
+        frames = [start + i * step for i in range(int((end - start) / step) + 1)]
+        # 'clip_frames' 不为空时每隔这么多帧拆分一个 value clip，保存时不能展平
+        clip_frames = blackboard.get('clip_frames')
+        usd_path = os.path.abspath(blackboard.get('usd_path'))
+        source = get_mesh_source(blackboard.get('mesh_source'))
+        clear_children(stage.GetRootLayer(), blackboard.get('ROOT').GetPath())
+        try:
+            meshes = source.resolve_meshes(blackboard.get('geo_selected'))
+            stats = export_animation(source, meshes, stage.GetRootLayer(), blackboard.get('ROOT').GetPath(), frames,
+                                     clip_frames, f"{os.path.splitext(usd_path)[0]}_clips", os.path.dirname(usd_path))
+        except ValueError as e:
+            logging.warning(str(e))
+            return Status.FAILURE
+        stage.SetStartTimeCode(frames[0])
+        stage.SetEndTimeCode(frames[-1])
+        set_keep_composition(blackboard, bool(clip_frames))
+        blackboard.set('animation_stats', stats)
         return Status.SUCCESS
 
 
+@memoize(reads=('usd_path',), writes=('stage',))
 class CreateUsd(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('usd_path'):
             return Status.FAILURE
-        from pxr import Usd
         stage = Usd.Stage.CreateInMemory()
         blackboard.set('stage', stage)
         return Status.SUCCESS
 
 
+@memoize(reads=('stage', 'set_usd_metadata'), writes=(STAGE_REVISION,))
 class SetMateData(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('stage'):
@@ -236,6 +258,7 @@ class SetMateData(Action):
         return Status.SUCCESS
 
 
+@memoize(reads=('stage',), writes=('ROOT', STAGE_REVISION))
 class SetRootPrim(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('stage'):
@@ -247,12 +270,36 @@ class SetRootPrim(Action):
         return Status.SUCCESS
 
 
+@memoize(reads=('stage', STAGE_REVISION, 'usd_path', 'usd_format', 'usd_flatten', 'usd_keep_composition',
+                'usd_incremental', 'usd_flatten_every'), writes=('usd_path', 'save_metrics'))
 class SaveUsd(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('stage'):
             return Status.FAILURE
+        from .formats import save_stage
         stage = blackboard.get('stage')
-        stage.Export(blackboard.get('usd_path'))
+        incremental = blackboard.get('usd_incremental')
+        # 'usd_flatten' 是用户的设置；payload 和 value clip 导出通过 'usd_keep_composition' 要求保留组合关系，
+        # 只对本次导出有效，不修改用户的设置
+        flatten = blackboard.get('usd_flatten', True) and not blackboard.get('usd_keep_composition')
+        if incremental and not flatten:
+            logging.warning("保留组合关系时不能增量发布，改为完整导出")
+            incremental = False
+        # 'usd_format' 可选 usdc / usda / usdz，默认按 usd_path 的扩展名
+        try:
+            if incremental:
+                # 只把变化的 prim 写进 delta 子层，每 'usd_flatten_every' 次重新展平
+                from .delta import save_incremental, DEFAULT_FLATTEN_EVERY
+                metrics = save_incremental(stage, blackboard.get('usd_path'), blackboard.get('usd_format'),
+                                           blackboard.get('usd_flatten_every', DEFAULT_FLATTEN_EVERY))
+            else:
+                metrics = save_stage(stage, blackboard.get('usd_path'), blackboard.get('usd_format'), flatten)
+        except (ValueError, RuntimeError) as e:
+            logging.warning(str(e))
+            return Status.FAILURE
+        if metrics['path'] != blackboard.get('usd_path'):
+            blackboard.set('usd_path', metrics['path'])
+        blackboard.set('save_metrics', metrics)
         return Status.SUCCESS
 
 
@@ -260,7 +307,11 @@ class OpenUsd(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         if not blackboard.get('usd_path'):
             return Status.FAILURE
+        if blackboard.get('headless'):
+            logging.info(f"批量模式不打开文件: {blackboard.get('usd_path')}")
+            return Status.SUCCESS
         import os
 
         os.startfile(blackboard.get('usd_path', ''))
+        return Status.SUCCESS
 
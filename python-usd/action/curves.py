@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""程序化曲线烘焙：用 NumPy 一次算出整条曲线，每条曲线只做一次批量写入
+
+写入 Maya 时用 OpenMayaAnim.MFnAnimCurve.addKeys 一次写入全部关键帧，
+也可以直接写成 USD 时间采样，完全绕开 Maya 命令层。
+"""
+import logging
+
+import numpy as np
+
+
+def frame_range(start, end, step=1.0):
+    """[start, end] 范围内的帧，包含结束帧"""
+    count = int(np.floor((end - start) / step + 1e-9)) + 1
+    return start + np.arange(max(count, 0), dtype=np.float64) * step
+
+
+def bake(fn, frames, fps=24.0):
+    """以秒为单位对整段帧调用一次 fn，返回与帧数等长的 float64 数组（多通道时为 (N, k)）"""
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(fn(frames / fps), dtype=np.float64)
+    if values.shape[:1] != frames.shape:
+        values = np.broadcast_to(values, frames.shape + values.shape[frames.ndim:]).copy()
+    return values
+
+
+def sine_wave(amplitude=1.0, speed=1.0, offset=0.0):
+    """正弦浮动：offset + sin(t * speed * pi) * amplitude，speed 为每秒的半周期数"""
+    return lambda seconds: offset + np.sin(seconds * speed * np.pi) * amplitude
+
+
+def write_maya_curve(node, attribute, frames, values, tangent='auto'):
+    """把整条曲线一次写入 node.attribute 的动画曲线，已有曲线时替换曲线上原有的全部关键帧"""
+    import maya.api.OpenMaya as om
+    import maya.api.OpenMayaAnim as oma
+    plug = om.MSelectionList().add(f"{node}.{attribute}").getPlug(0)
+    curves = oma.MAnimUtil.findAnimation(plug)
+    curve = oma.MFnAnimCurve(curves[0]) if len(curves) else oma.MFnAnimCurve()
+    if not len(curves):
+        curve.create(plug)
+    tangent_type = {
+        'auto': oma.MFnAnimCurve.kTangentAuto,
+        'linear': oma.MFnAnimCurve.kTangentLinear,
+        'spline': oma.MFnAnimCurve.kTangentSmooth,
+        'step': oma.MFnAnimCurve.kTangentStep,
+    }[tangent]
+    unit = om.MTime.uiUnit()
+    times = om.MTimeArray([om.MTime(frame, unit) for frame in np.asarray(frames, dtype=np.float64).tolist()])
+    curve.addKeys(times, om.MDoubleArray(np.asarray(values, dtype=np.float64).tolist()),
+                  tangent_type, tangent_type, False)
+    return curve.numKeys
+
+
+def _usda_value(value):
+    return f"({', '.join(map(repr, value))})" if isinstance(value, list) else repr(value)
+
+
+def author_usd_curve(layer, attr_path, type_name, frames, values):
+    """把整条曲线写成 layer 上 attr_path 的时间采样，多通道的值按行写成元组
+
+    Python 的 Sdf 只有逐帧的 SetTimeSample，这里把全部采样写成一个 timeSamples 字段，
+    在临时 layer 中一次解析，再用一次 CopySpec 整个替换 attr_path 原有的属性 spec。
+    """
+    from pxr import Sdf
+    attr_path = Sdf.Path(str(attr_path))
+    values = np.asarray(values, dtype=np.float64)
+    # repr 输出的浮点数可以精确还原
+    samples = ', '.join(f"{frame!r}: {_usda_value(value)}"
+                        for frame, value in zip(np.asarray(frames, dtype=np.float64).tolist(), values.tolist()))
+    curve = Sdf.Layer.CreateAnonymous('curve.usda')
+    curve.ImportFromString(f'#usda 1.0\nover "Curve"\n{{\n    {type_name} value.timeSamples = {{ {samples} }}\n}}\n')
+    with Sdf.ChangeBlock():
+        Sdf.CreatePrimInLayer(layer, attr_path.GetPrimPath())
+        if not Sdf.CopySpec(curve, '/Curve.value', layer, attr_path):
+            raise RuntimeError(f"写入时间采样失败: {attr_path}")
+    logging.info(f"写入 {attr_path} 的 {len(values)} 个时间采样")
+    return len(values)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""增量发布：只把与上次发布不同的 prim 和属性写进一个小的 delta 子层
+
+发布的 usd_path 是一个只有 subLayers 的根 layer：[最新的 delta, ..., 最早的 delta, base]。
+delta 累计到 flatten_every 个，或者总大小超过 base 的 flatten_ratio 时，重新展平写出新的 base 并删除全部 delta。
+delta 只能用 over 覆盖：删除的 prim 写成 active = false，删除的属性写成 ValueBlock，
+属性上被删掉的元数据，以及删除后又出现的 prim 在更弱的层中多出的属性无法清除，会保留到下一次展平。
+"""
+import logging
+import os
+import time
+
+from pxr import Sdf, Usd
+
+from .formats import output_path
+
+# 累计多少个 delta 后重新展平
+DEFAULT_FLATTEN_EVERY = 10
+# delta 总大小超过 base 的这个比例时重新展平
+DEFAULT_FLATTEN_RATIO = 0.5
+
+# {根 layer 路径: (根 layer 修改时间, 上次发布的展平结果)}，同一进程反复发布时不再重新读取
+_published = {}
+
+
+def _open_layer(path):
+    """打开 layer，已经打开过的重新从磁盘读取，避免拿到被覆盖前的内容"""
+    layer = Sdf.Layer.Find(path)
+    if layer:
+        layer.Reload(force=True)
+        return layer
+    return Sdf.Layer.FindOrOpen(path)
+
+
+def _export(layer, path):
+    """导出 layer，同一路径已经打开的 layer 随后重新读取，同一进程之后打开的都是新内容"""
+    if not layer.Export(path):
+        raise RuntimeError(f"USD导出失败: {path}")
+    opened = Sdf.Layer.Find(path)
+    if opened:
+        opened.Reload(force=True)
+
+
+def _read_published(path):
+    """上次发布的展平结果，没有发布过时返回 None"""
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _published.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    root = _open_layer(path)
+    for sub_layer in root.subLayerPaths:
+        _open_layer(root.ComputeAbsolutePath(sub_layer))
+    flat = Usd.Stage.Open(root, Usd.Stage.LoadAll).Flatten()
+    _published[path] = (mtime, flat)
+    return flat
+
+
+def _same_fields(old_spec, new_spec):
+    keys = new_spec.ListInfoKeys()
+    if set(keys) != set(old_spec.ListInfoKeys()):
+        return False
+    return all(old_spec.GetInfo(key) == new_spec.GetInfo(key) for key in keys)
+
+
+def _count_prims(prim_spec):
+    return 1 + sum(_count_prims(child) for child in prim_spec.nameChildren)
+
+
+def _diff_prim(old_layer, new_layer, new_spec, delta, stats):
+    """把 new_spec 与 old_layer 中同一路径的差异写进 delta"""
+    path = new_spec.path
+    old_spec = old_layer.GetPrimAtPath(path)
+    if old_spec is None:
+        # 新增的 prim 连同子级整个复制
+        if path.GetParentPath() != Sdf.Path.absoluteRootPath:
+            Sdf.CreatePrimInLayer(delta, path.GetParentPath())
+        Sdf.CopySpec(new_layer, path, delta, path)
+        # 展平结果中没有停用的 prim，这里可能是之前被 delta 停用后又出现的 prim，需要显式激活
+        delta.GetPrimAtPath(path).active = True
+        stats['prims_added'] += _count_prims(new_spec)
+        return
+
+    changed = False
+    for key in new_spec.ListInfoKeys():
+        if old_spec.GetInfo(key) != new_spec.GetInfo(key):
+            Sdf.CreatePrimInLayer(delta, path).SetInfo(key, new_spec.GetInfo(key))
+            changed = True
+    old_properties = old_spec.properties
+    for prop in new_spec.properties:
+        old_prop = old_properties.get(prop.name)
+        if old_prop is not None and _same_fields(old_prop, prop):
+            continue
+        Sdf.CreatePrimInLayer(delta, path)
+        Sdf.CopySpec(new_layer, prop.path, delta, prop.path)
+        stats['properties_rewritten'] += 1
+        changed = True
+    new_properties = new_spec.properties
+    for prop in old_properties:
+        if prop.name in new_properties:
+            continue
+        prim_spec = Sdf.CreatePrimInLayer(delta, path)
+        if isinstance(prop, Sdf.AttributeSpec):
+            attr = Sdf.AttributeSpec(prim_spec, prop.name, prop.typeName, prop.variability, declaresCustom=prop.custom)
+            attr.default = Sdf.ValueBlock()
+        else:
+            Sdf.RelationshipSpec(prim_spec, prop.name, custom=prop.custom).targetPathList.explicitItems = []
+        stats['properties_rewritten'] += 1
+        changed = True
+    if changed:
+        stats['prims_rewritten'] += 1
+
+    new_children = new_spec.nameChildren
+    for child in new_children:
+        _diff_prim(old_layer, new_layer, child, delta, stats)
+    for child in old_spec.nameChildren:
+        if child.name not in new_children:
+            Sdf.CreatePrimInLayer(delta, child.path).active = False
+            stats['prims_removed'] += 1
+
+
+def diff_layers(old_layer, new_layer):
+    """返回 (delta layer, 统计)，old_layer 之上叠加 delta 后与 new_layer 的内容一致"""
+    delta = Sdf.Layer.CreateAnonymous('delta')
+    stats = {'prims_rewritten': 0, 'prims_added': 0, 'prims_removed': 0, 'properties_rewritten': 0}
+    with Sdf.ChangeBlock():
+        for prim_spec in new_layer.pseudoRoot.nameChildren:
+            _diff_prim(old_layer, new_layer, prim_spec, delta, stats)
+        new_children = new_layer.pseudoRoot.nameChildren
+        for prim_spec in old_layer.pseudoRoot.nameChildren:
+            if prim_spec.name not in new_children:
+                Sdf.CreatePrimInLayer(delta, prim_spec.path).active = False
+                stats['prims_removed'] += 1
+    return delta, stats
+
+
+def _layer_paths(path, fmt):
+    stem = os.path.splitext(path)[0]
+    return f"{stem}.base.{fmt}", lambda index: f"{stem}.delta.{index:04d}.{fmt}"
+
+
+def _write_root(path, sub_layers, flat):
+    """根 layer 只有 subLayers，以及 stage 级元数据（子层的元数据不参与组合）"""
+    root = Sdf.Layer.CreateAnonymous('root')
+    for key in flat.pseudoRoot.ListInfoKeys():
+        if key != 'subLayers':
+            root.pseudoRoot.SetInfo(key, flat.pseudoRoot.GetInfo(key))
+    base_dir = os.path.dirname(os.path.abspath(path))
+    root.subLayerPaths = ['./' + os.path.relpath(sub_layer, base_dir).replace(os.sep, '/') for sub_layer in sub_layers]
+    _export(root, path)
+
+
+def _count_all(layer):
+    return sum(_count_prims(prim_spec) for prim_spec in layer.pseudoRoot.nameChildren)
+
+
+def save_incremental(stage, path, fmt=None, flatten_every=DEFAULT_FLATTEN_EVERY, flatten_ratio=DEFAULT_FLATTEN_RATIO):
+    """增量发布 stage，返回与 save_stage 相同的字段，另外包括 mode（base/delta/unchanged）、
+    改写、新增、删除的 prim 数量，改写的属性数量，delta 数量，以及相对于完整导出节省的字节数（按 base 大小估算）
+    """
+    path, fmt = output_path(path, fmt)
+    if fmt == 'usdz':
+        raise ValueError("usdz 不支持增量发布")
+    published_path, path = path, os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = time.perf_counter()
+    base_path, delta_path = _layer_paths(path, fmt)
+    new_flat = stage.Flatten()
+
+    old_flat = _read_published(path) if os.path.exists(base_path) else None
+    deltas, base_bytes = [], 0
+    if old_flat is not None:
+        root = _open_layer(path)
+        deltas = [root.ComputeAbsolutePath(sub_layer) for sub_layer in root.subLayerPaths[:-1]]
+        base_bytes = os.path.getsize(base_path)
+        delta_bytes = sum(os.path.getsize(delta) for delta in deltas if os.path.exists(delta))
+        if len(deltas) >= flatten_every or delta_bytes > base_bytes * flatten_ratio:
+            # delta 累计太多，这次重新展平
+            old_flat = None
+
+    metrics = {'path': published_path, 'format': fmt, 'prims_rewritten': 0, 'prims_added': 0, 'prims_removed': 0,
+               'properties_rewritten': 0}
+    if old_flat is not None:
+        delta, stats = diff_layers(old_flat, new_flat)
+        metrics.update(stats)
+        if not stats['prims_rewritten'] + stats['prims_added'] + stats['prims_removed']:
+            metrics.update(mode='unchanged', bytes=0, bytes_saved=base_bytes, deltas=len(deltas))
+        else:
+            index = int(os.path.basename(deltas[0]).split('.')[-2]) + 1 if deltas else 1
+            written = delta_path(index)
+            _export(delta, written)
+            _write_root(path, [written] + deltas + [base_path], new_flat)
+            metrics.update(mode='delta', bytes=os.path.getsize(written), deltas=len(deltas) + 1)
+            metrics['bytes_saved'] = max(base_bytes - metrics['bytes'], 0)
+    else:
+        _export(new_flat, base_path)
+        _write_root(path, [base_path], new_flat)
+        for written in deltas:
+            if os.path.exists(written):
+                os.remove(written)
+        metrics.update(mode='base', bytes=os.path.getsize(base_path), bytes_saved=0, deltas=0,
+                       prims_rewritten=_count_all(new_flat))
+
+    _published[path] = (os.path.getmtime(path), new_flat)
+    metrics['seconds'] = round(time.perf_counter() - start, 4)
+    logging.info(f"增量发布 {path} ({metrics['mode']}): 改写 {metrics['prims_rewritten']} 个 prim, "
+                 f"新增 {metrics['prims_added']}, 删除 {metrics['prims_removed']}, 写入 {metrics['bytes']} 字节, "
+                 f"节省 {metrics['bytes_saved']} 字节, {metrics['seconds']}s")
+    return metrics
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""无界面批量导出：任务队列分发到进程池，每个任务用独立的黑板运行与界面相同的行为树，失败自动重试
+
+场景来源可替换：maya 在子进程中用 maya.standalone 打开场景文件；
+fake 用 FakeMeshSource 生成平面网格，不需要 Maya 就能运行和做性能测试。
+子进程崩溃导致进程池损坏时重新创建进程池，未完成的任务按失败重试。
+
+用法: python -m action.farm jobs.json [--tree sample.json] [--source fake] [--workers 4] [--retries 1]
+      [--report report.json]
+jobs.json 为任务列表，每个任务是 {'name', 'scene', 'usd_path', 'blackboard'}，只有 scene 是必需的，
+输出路径不能重复。
+"""
+import collections
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# 默认使用界面加载的导出树
+DEFAULT_TREE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'examples',
+                                             'sample.json'))
+
+# 行为树返回 RUNNING 时的 tick 间隔（秒）
+TICK_INTERVAL = 0.01
+
+
+class MayaSceneSource(object):
+    """在子进程中初始化 maya.standalone，按任务打开场景并导出全部网格"""
+
+    def initialize(self):
+        import maya.standalone
+        maya.standalone.initialize(name='python')
+
+    def open(self, scene):
+        """返回 (网格数据源, 网格列表)"""
+        import maya.cmds as cmds
+        cmds.file(scene, open=True, force=True)
+        return 'openmaya', cmds.ls(type='mesh', noIntermediate=True)
+
+
+class FakeSceneSource(object):
+    """scene 为 {'meshes': 数量, 'rows': 行数, 'cols': 列数}，生成同样数量的平面网格
+
+    scene 中 'crash' 为真时直接退出子进程，模拟 Maya 崩溃。
+    """
+
+    def initialize(self):
+        pass
+
+    def open(self, scene):
+        from .mesh_source import FakeMeshSource
+        scene = scene if isinstance(scene, dict) else {}
+        if scene.get('crash'):
+            os._exit(1)
+        source = FakeMeshSource()
+        meshes = [source.add_grid(f"grid_{index}", scene.get('rows', 16), scene.get('cols', 16))
+                  for index in range(scene.get('meshes', 1))]
+        return source, meshes
+
+
+SCENE_SOURCES = {
+    'maya': MayaSceneSource,
+    'fake': FakeSceneSource,
+}
+
+_scene_source = None
+_compiled = None
+
+
+def _initialize_worker(source_name, compiled):
+    global _scene_source, _compiled
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    _scene_source = SCENE_SOURCES[source_name]()
+    _scene_source.initialize()
+    _compiled = compiled
+
+
+def run_tree(compiled, data):
+    """用 compiled 创建行为树，写入 data 后 tick 到不再返回 RUNNING，返回 (状态, 黑板)
+
+    树里的黑板数据先写入，data 覆盖同名的键。
+    """
+    from behavior_tree.core import Status
+    from .compiler import build_tree, preload_blackboard
+    from .memo import VersionedBlackboard
+    bt = build_tree(compiled, VersionedBlackboard())
+    preload_blackboard(bt.blackboard, data)
+    status = bt.tick()
+    while status == Status.RUNNING:
+        time.sleep(TICK_INTERVAL)
+        status = bt.tick()
+    return status, bt.blackboard
+
+
+def run_job(job, compiled=None):
+    """在当前进程执行一个任务，返回结果字典；异常同样记录在结果里"""
+    from behavior_tree.core import Status
+    start = time.perf_counter()
+    result = {'id': job['id'], 'name': job['name'], 'usd_path': job['usd_path'], 'status': 'failed', 'error': None}
+    try:
+        mesh_source, meshes = _scene_source.open(job['scene'])
+        # 每个任务使用独立的黑板，headless 让交互式动作改用任务给定的数据
+        status, blackboard = run_tree(compiled or _compiled,
+                                      dict(job.get('blackboard') or {}, headless=True, usd_path=job['usd_path'],
+                                           mesh_source=mesh_source, geo_selected=meshes))
+        if status == Status.SUCCESS:
+            result['status'] = 'succeeded'
+            result['meshes'] = len(meshes)
+            result['save_metrics'] = blackboard.get('save_metrics')
+        else:
+            result['error'] = f"行为树返回 {status}"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _normalize_jobs(jobs, output_dir):
+    """补全任务字段：id 为任务序号，结果和重试次数都按 id 记录
+
+    没有给出名字的任务用场景文件名命名，重名时加上序号；usd_path 默认为 <output_dir>/<name>.usdc。
+    多个任务写同一个 usd_path 时抛出 ValueError，避免互相覆盖。
+    """
+    normalized, names, paths = [], set(), {}
+    for index, job in enumerate(jobs):
+        job = dict(job) if isinstance(job, dict) else {'scene': job}
+        job['id'] = index
+        if 'name' not in job:
+            name = os.path.splitext(os.path.basename(job['scene']))[0] \
+                if isinstance(job['scene'], str) else f"job_{index}"
+            # 不同目录下的同名场景
+            job['name'] = f"{name}_{index}" if name in names else name
+        names.add(job['name'])
+        job.setdefault('usd_path', os.path.join(output_dir, f"{job['name']}.usdc"))
+        path = os.path.normcase(os.path.abspath(job['usd_path']))
+        if path in paths:
+            raise ValueError(f"任务 {paths[path]['name']} 和 {job['name']} 的输出路径相同: {job['usd_path']}")
+        paths[path] = job
+        normalized.append(job)
+    return normalized
+
+
+def _failed(job, error):
+    return {'id': job['id'], 'name': job['name'], 'usd_path': job['usd_path'], 'status': 'failed', 'error': error,
+            'seconds': None}
+
+
+def run_farm(jobs, source='maya', max_workers=None, retries=1, output_dir='.', tree=DEFAULT_TREE,
+             report_path=None):
+    """用进程池对每个任务运行 tree 行为树，失败的任务最多重试 retries 次，返回汇总报告
+
+    子进程崩溃时同时运行的任务之后逐个单独重新运行，单独运行时崩溃才计入重试次数。
+    出现意外错误时，尚未完成的任务记为失败，报告照常生成和保存。
+    """
+    from .compiler import load_compiled
+    from .layers import pool_context
+    jobs = _normalize_jobs(jobs, output_dir)
+    if source not in SCENE_SOURCES:
+        raise KeyError(f"未知的场景来源: {source}")
+    # 在主进程校验并编译一次，子进程直接使用编译结果
+    compiled = load_compiled(tree)
+    workers = max_workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results, attempts, pending = {}, {job['id']: 1 for job in jobs}, {}
+    # 同时提交的任务不超过进程数，进程池崩溃时只有正在运行的任务受影响
+    queue, suspects = collections.deque(jobs), collections.deque()
+    pool = None
+
+    def submit(job, isolated=False):
+        nonlocal pool
+        if pool is not None:
+            try:
+                pending[pool.submit(run_job, job)] = (job, isolated)
+                return
+            except BrokenProcessPool:
+                # 子进程崩溃后进程池不再接受任务，旧进程池中未完成的任务会以失败返回
+                logging.warning("进程池已损坏，重新创建")
+                pool.shutdown(wait=False)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                                   initializer=_initialize_worker, initargs=(source, compiled))
+        pending[pool.submit(run_job, job)] = (job, isolated)
+
+    try:
+        while queue or suspects or pending:
+            if suspects:
+                # 进程池崩溃时无法区分是哪个任务导致的，这些任务逐个单独运行
+                if not pending:
+                    submit(suspects.popleft(), isolated=True)
+            else:
+                while queue and len(pending) < workers:
+                    submit(queue.popleft())
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, isolated = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    if not isolated:
+                        # 不计入重试次数
+                        suspects.append(job)
+                        continue
+                    result = _failed(job, f"{type(e).__name__}: {e}")
+                except Exception as e:
+                    result = _failed(job, f"{type(e).__name__}: {e}")
+                if result['status'] != 'succeeded' and attempts[job['id']] <= retries:
+                    logging.warning(f"任务 {job['name']} 失败，重试第 {attempts[job['id']]} 次: {result['error']}")
+                    attempts[job['id']] += 1
+                    (suspects if isolated else queue).append(job)
+                    continue
+                result['attempts'] = attempts[job['id']]
+                results[job['id']] = result
+                logging.info(f"任务 {job['name']}: {result['status']} ({result['seconds']}s)")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logging.error(f"批量导出中断: {error}")
+        for job in jobs:
+            if job['id'] not in results:
+                results[job['id']] = dict(_failed(job, error), attempts=attempts[job['id']])
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    ordered = [results[job['id']] for job in jobs]
+    report = {
+        'jobs': len(jobs),
+        'succeeded': sum(1 for result in ordered if result['status'] == 'succeeded'),
+        'failed': sum(1 for result in ordered if result['status'] != 'succeeded'),
+        'retries': sum(result['attempts'] - 1 for result in ordered),
+        'seconds': round(seconds, 4),
+        'jobs_per_second': round(len(jobs) / seconds, 4) if seconds else 0.0,
+        'results': ordered,
+    }
+    logging.info(f"批量导出完成: {report['succeeded']}/{report['jobs']} 成功, {report['failed']} 失败, "
+                 f"重试 {report['retries']} 次, 耗时 {report['seconds']}s")
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='无界面批量导出USD')
+    parser.add_argument('jobs', help='任务列表 JSON 文件')
+    parser.add_argument('--tree', default=DEFAULT_TREE, help='行为树 JSON 文件，默认为界面使用的导出树')
+    parser.add_argument('--source', default='maya', choices=sorted(SCENE_SOURCES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--report', default=None)
+    args = parser.parse_args(argv)
+    with open(args.jobs, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    report = run_farm(jobs, args.source, args.workers, args.retries, args.output_dir, args.tree, args.report)
+    return 0 if not report['failed'] else 1
+
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    sys.exit(main())
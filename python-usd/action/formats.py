@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""输出格式：usdc（二进制 crate）、usda（文本）、usdz（打包），并统计序列化耗时和文件大小
+
+crate 格式自带整数数组压缩；usdz 规范要求包内文件不压缩，所以这里只提供格式选择。
+"""
+import logging
+import os
+import time
+
+FORMATS = ('usdc', 'usda', 'usdz')
+
+
+def output_path(path, fmt=None):
+    """按格式确定实际输出路径和格式
+
+    fmt 为空时按扩展名推断（.usd 默认 usdc）；.usd 扩展名可以保存为 usdc 或 usda，
+    其它扩展名与 fmt 不一致时换成 fmt 对应的扩展名。
+    """
+    stem, ext = os.path.splitext(path)
+    ext = ext.lower().lstrip('.')
+    if not fmt:
+        fmt = ext if ext in FORMATS else 'usdc'
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的USD格式: {fmt}")
+    if ext == fmt or (ext == 'usd' and fmt != 'usdz'):
+        return path, fmt
+    return f"{stem}.{fmt}", fmt
+
+
+def _export(stage, path, args, flatten):
+    if flatten:
+        return stage.Export(path, args=args)
+    return stage.GetRootLayer().Export(path, args=args)
+
+
+def save_stage(stage, path, fmt=None, flatten=True):
+    """把 stage 导出为指定格式，返回 {'path', 'format', 'seconds', 'bytes'}
+
+    flatten 为 False 时只导出根 layer，保留引用、payload 和 value clips 等组合关系。
+    """
+    path, fmt = output_path(path, fmt)
+    dir_name = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_name, exist_ok=True)
+    start = time.perf_counter()
+    if fmt == 'usdz':
+        from pxr import UsdUtils
+        # 先在同一目录导出成 usdc（保证相对路径的依赖仍然有效），再连同依赖一起打包
+        temp_path = f"{os.path.splitext(path)[0]}.{os.getpid()}.tmp.usdc"
+        try:
+            _export(stage, temp_path, {}, flatten)
+            if not UsdUtils.CreateNewUsdzPackage(temp_path, path):
+                raise RuntimeError(f"usdz 打包失败: {path}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    elif not _export(stage, path, {'format': fmt} if path.lower().endswith('.usd') else {}, flatten):
+        raise RuntimeError(f"USD导出失败: {path}")
+    metrics = {
+        'path': path,
+        'format': fmt,
+        'seconds': round(time.perf_counter() - start, 4),
+        'bytes': os.path.getsize(path),
+    }
+    logging.info(f"保存 {path} ({fmt}): {metrics['seconds']}s, {metrics['bytes']} 字节")
+    return metrics
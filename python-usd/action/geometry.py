@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""几何数据容器：用连续的 NumPy 数组代替逐顶点的 Gf 对象列表"""
+import numpy as np
+
+
+def _as_array(values, dtype, width=None):
+    """转换为 C 连续数组，width 不为空时整理成 (N, width) 形状"""
+    array = np.ascontiguousarray(values if values is not None else [], dtype=dtype)
+    if width is not None:
+        array = array.reshape(-1, width)
+    return array
+
+
+class GeometryBuffer(object):
+    """单个网格的几何数据
+
+    points 为 float32 的 (N, 3) 数组，face_vertex_counts/face_vertex_indices 为 int32 一维数组，
+    normals/uvs 为逐面顶点（faceVarying）的 float32 (M, 3)/(M, 2) 数组，M 等于面顶点索引数量。
+    """
+
+    # 数组字段，nbytes 按它们统计
+    ARRAYS = ('points', 'face_vertex_counts', 'face_vertex_indices', 'normals', 'uvs')
+    # __weakref__ 让 MeshStream 可以统计实际仍在内存中的网格
+    __slots__ = ('name',) + ARRAYS + ('__weakref__',)
+
+    def __init__(self, name, points, face_vertex_counts, face_vertex_indices, normals=None, uvs=None):
+        self.name = name
+        self.points = _as_array(points, np.float32, 3)
+        self.face_vertex_counts = _as_array(face_vertex_counts, np.int32)
+        self.face_vertex_indices = _as_array(face_vertex_indices, np.int32)
+        self.normals = _as_array(normals, np.float32, 3)
+        self.uvs = _as_array(uvs, np.float32, 2)
+
+    def __repr__(self):
+        return (f"GeometryBuffer({self.name!r}, points={len(self.points)}, "
+                f"faces={len(self.face_vertex_counts)}, nbytes={self.nbytes})")
+
+    @property
+    def point_count(self):
+        return len(self.points)
+
+    @property
+    def face_count(self):
+        return len(self.face_vertex_counts)
+
+    @property
+    def nbytes(self):
+        """所有数组占用的字节数"""
+        return sum(getattr(self, key).nbytes for key in self.ARRAYS)
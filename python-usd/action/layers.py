@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""多网格导出：全部写入同一个 stage，或者每个网格一个 layer 并行写出后由根 layer 引用
+
+payload 布局下根 layer 只是接口：层级、每个 payload 的包围盒（extentsHint）和统计，
+下游用 Usd.Stage.Open(path, Usd.Stage.LoadNone) 打开后按需加载部分网格。
+"""
+import itertools
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from pxr import Sdf, UsdGeom, Vt
+
+from .writer import author_mesh_spec
+
+
+def log_progress(done, total, name, error=None):
+    """默认的进度回调"""
+    if error:
+        logging.warning(f"[{done}/{total}] {name} 导出失败: {error}")
+    else:
+        logging.info(f"[{done}/{total}] {name} 导出完成")
+
+
+def new_layer(file_path):
+    """创建新 layer；同一路径的 layer 已经打开时清空后复用，避免 CreateNew 报错"""
+    layer = Sdf.Layer.Find(file_path)
+    if layer:
+        layer.Clear()
+        return layer
+    return Sdf.Layer.CreateNew(file_path)
+
+
+def _define_root(layer, root_name='Root'):
+    root = Sdf.CreatePrimInLayer(layer, f"/{root_name}")
+    root.specifier = Sdf.SpecifierDef
+    root.typeName = 'Xform'
+    layer.defaultPrim = root_name
+    return root
+
+
+def write_meshes_to_usd(geos, file_path, progress=log_progress):
+    """所有网格写入同一个 stage，layer 只创建和保存一次
+
+    单个网格写入失败时删除它的 spec 并继续，返回 {'written': [...], 'failed': {网格名: 错误}}。
+    """
+    layer = new_layer(file_path)
+    written, failed = [], {}
+    with Sdf.ChangeBlock():
+        root = _define_root(layer)
+        for done, geo in enumerate(geos, 1):
+            try:
+                author_mesh_spec(layer, f"{root.path}/{geo.name}", geo)
+            except Exception as e:
+                failed[geo.name] = str(e)
+                if geo.name in root.nameChildren:
+                    del root.nameChildren[geo.name]
+            else:
+                written.append(geo.name)
+            if progress:
+                progress(done, len(geos), geo.name, failed.get(geo.name))
+    layer.Save()
+    return {'written': written, 'failed': failed}
+
+
+def write_mesh_layer(geo, layer_path):
+    """把单个网格写成独立的 layer，网格作为 defaultPrim，供根 layer 引用"""
+    layer = new_layer(layer_path)
+    with Sdf.ChangeBlock():
+        author_mesh_spec(layer, f"/{geo.name}", geo)
+        layer.defaultPrim = geo.name
+    layer.Save()
+    return layer_path
+
+
+def _author_arcs(root, layer_paths, base_dir, arc, interface=None):
+    """root 下为每个 layer 创建一个 prim，通过 arc（references/payload）组合
+
+    interface 为 {名称: write_payload_layer 返回的接口信息}，包围盒和统计直接写在 prim 上，
+    payload 不加载也能读到。
+    """
+    for name, layer_path in layer_paths.items():
+        asset_path = './' + os.path.relpath(os.path.abspath(layer_path), base_dir).replace(os.sep, '/')
+        prim = Sdf.PrimSpec(root, name, Sdf.SpecifierDef)
+        if arc == 'payload':
+            prim.payloadList.Prepend(Sdf.Payload(asset_path))
+        else:
+            prim.referenceList.Prepend(Sdf.Reference(asset_path))
+        info = (interface or {}).get(name)
+        if info:
+            prim.typeName = 'Xform'
+            prim.kind = 'component'
+            extents_hint = Sdf.AttributeSpec(prim, UsdGeom.Tokens.extentsHint, Sdf.ValueTypeNames.Float3Array,
+                                             Sdf.VariabilityVarying, declaresCustom=False)
+            extents_hint.default = Vt.Vec3fArray.FromNumpy(np.asarray(info['extent'], dtype=np.float32))
+            prim.customData = dict(info['customData'], meshes=Vt.StringArray(info['customData']['meshes']))
+
+
+def stitch_layers(file_path, layer_paths, arc='references', interface=None):
+    """创建根 layer，/Root 下为每个网格 layer 创建一个 prim，通过 arc（references/payload）组合"""
+    layer = new_layer(file_path)
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    with Sdf.ChangeBlock():
+        root = _define_root(layer)
+        if interface:
+            root.kind = 'assembly'
+        _author_arcs(root, layer_paths, base_dir, arc, interface)
+    layer.Save()
+    return layer
+
+
+def _extent(points):
+    return np.stack((points.min(axis=0), points.max(axis=0))) if len(points) else np.zeros((2, 3), dtype=np.float32)
+
+
+def write_payload_layer(name, geos, layer_path, on_authored=None):
+    """把一组网格写成一个 layer：/name 为 Xform（defaultPrim），网格是它的子级并带 extent
+
+    geos 可以是迭代器，每写完一个网格调用 on_authored(geo)，流式导出时可以逐个释放。
+    返回 (接口信息, {网格名: 去重统计})，接口信息是 stitch_layers 写在根 layer 上的包围盒和统计，
+    只包含 Python 基本类型，可以从子进程返回。
+    """
+    layer = new_layer(layer_path)
+    reports, extents, points, faces = {}, [], 0, 0
+    with Sdf.ChangeBlock():
+        group = Sdf.CreatePrimInLayer(layer, f"/{name}")
+        group.specifier = Sdf.SpecifierDef
+        group.typeName = 'Xform'
+        for geo in geos:
+            mesh_path = f"/{name}/{geo.name}"
+            reports[geo.name] = author_mesh_spec(layer, mesh_path, geo)
+            extents.append(_extent(geo.points))
+            extent = Sdf.AttributeSpec(layer.GetPrimAtPath(mesh_path), UsdGeom.Tokens.extent,
+                                       Sdf.ValueTypeNames.Float3Array, Sdf.VariabilityVarying, declaresCustom=False)
+            extent.default = Vt.Vec3fArray.FromNumpy(extents[-1].astype(np.float32))
+            points += geo.point_count
+            faces += geo.face_count
+            if on_authored:
+                on_authored(geo)
+            del geo
+        layer.defaultPrim = name
+    layer.Save()
+    extents = np.concatenate(extents) if extents else np.zeros((2, 3), dtype=np.float32)
+    interface = {
+        'extent': _extent(extents).tolist(),
+        'customData': {'meshes': list(reports), 'points': int(points), 'faces': int(faces)},
+    }
+    return interface, reports
+
+
+def write_mesh_payload(geo, layer_path):
+    """write_mesh_layer 的 payload 版本，返回 (layer_path, 接口信息)"""
+    return layer_path, write_payload_layer(geo.name, [geo], layer_path)[0]
+
+
+def _group(first, geos, count):
+    """依次产出 first 和 geos 中接下来的 count 个网格，产出后不再持有 first"""
+    items = [first]
+    del first
+    yield items.pop()
+    yield from itertools.islice(geos, count)
+
+
+def author_payloads(layer, root_path, geos, layer_dir, anchor_dir, group_size=1, layer_format='usdc',
+                    on_authored=None):
+    """每 group_size 个网格写成一个 layer，在 layer 的 root_path 下作为 payload 组合
+
+    只有一个网格的组以网格名命名，否则为 group_NNNN。asset 路径相对于 anchor_dir（根 layer 保存的目录）。
+    返回 ({网格名: 去重统计}, 统计信息)。
+    """
+    os.makedirs(layer_dir, exist_ok=True)
+    group_size = max(1, int(group_size))
+    reports, layer_paths, interface = {}, {}, {}
+    geos = iter(geos)
+    for index in itertools.count():
+        first = next(geos, None)
+        if first is None:
+            break
+        name = first.name if group_size == 1 else f"group_{index:04d}"
+        layer_path = os.path.join(layer_dir, f"{name}.{layer_format}")
+        # 组内的网格边读取边写入，不需要同时持有整组
+        group = _group(first, geos, group_size - 1)
+        del first
+        interface[name], group_reports = write_payload_layer(name, group, layer_path, on_authored)
+        reports.update(group_reports)
+        layer_paths[name] = layer_path
+
+    with Sdf.ChangeBlock():
+        root = Sdf.CreatePrimInLayer(layer, root_path)
+        root.kind = 'assembly'
+        _author_arcs(root, layer_paths, anchor_dir, 'payload', interface)
+    stats = {
+        'groups': len(layer_paths),
+        'meshes': len(reports),
+        'bytes': sum(os.path.getsize(layer_path) for layer_path in layer_paths.values()),
+        'layer_dir': layer_dir,
+    }
+    logging.info(f"payload 布局: {stats['meshes']} 个网格写成 {stats['groups']} 个 layer, 共 {stats['bytes']} 字节")
+    return reports, stats
+
+
+def mesh_layer_dir(file_path):
+    """网格 layer 存放目录：<文件名>_meshes"""
+    return os.path.splitext(os.path.abspath(file_path))[0] + '_meshes'
+
+
+def pool_context():
+    """Maya 中 sys.executable 是 maya 主程序，子进程需要改用同目录下的 mayapy"""
+    import multiprocessing
+    context = multiprocessing.get_context('spawn')
+    executable = os.path.basename(sys.executable).lower()
+    if executable.startswith('maya') and not executable.startswith('mayapy'):
+        mayapy = os.path.join(os.path.dirname(sys.executable), 'mayapy' + os.path.splitext(sys.executable)[1])
+        context.set_executable(mayapy)
+    return context
+
+
+def export_mesh_layers(geos, file_path, max_workers=None, progress=log_progress, layer_format='usdc', arc='references'):
+    """每个网格一个 layer，由进程池并行序列化，再写根 layer 把它们组合起来
+
+    单个网格失败不影响其它网格，根 layer 只引用成功写出的 layer。
+    arc 为 payload 时根 layer 同时作为接口，记录每个网格的包围盒和统计。
+    geos 只遍历一次，可以是生成器；但全部网格会先提交给进程池，不是流式导出，
+    不要传入需要 release() 的 MeshStream。
+    """
+    layer_dir = mesh_layer_dir(file_path)
+    os.makedirs(layer_dir, exist_ok=True)
+    names, jobs, written, failed, interface = [], {}, {}, {}, {}
+    write = write_mesh_payload if arc == 'payload' else write_mesh_layer
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=pool_context()) as executor:
+        for geo in geos:
+            names.append(geo.name)
+            jobs[executor.submit(write, geo, os.path.join(layer_dir, f"{geo.name}.{layer_format}"))] = geo.name
+        for done, future in enumerate(as_completed(jobs), 1):
+            name = jobs[future]
+            try:
+                if arc == 'payload':
+                    written[name], interface[name] = future.result()
+                else:
+                    written[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+            if progress:
+                progress(done, len(jobs), name, failed.get(name))
+
+    # 按原始顺序组合，保证每次导出的根 layer 一致
+    ordered = {name: written[name] for name in names if name in written}
+    stitch_layers(file_path, ordered, arc, interface)
+    return {'written': list(ordered), 'failed': failed}
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""按输入记忆动作结果：黑板记录每个键的版本号，输入版本与上次执行后一致的动作直接跳过
+
+动作用 @memoize(reads=..., writes=...) 声明读写的键。真正执行后记录读取键和写入键的版本；
+下次 tick 读取键的版本都没变、写入的键也没有被替换时不再执行，返回上次的状态。
+记忆只保存版本号，不持有输出的值，输出被替换或删除后不会因为记忆而留在内存中。
+只修改对象内容、不重新 set 的输出（比如往 stage 里写 prim）用伪键 'stage_revision' 声明，
+执行后会自动递增它的版本，让依赖 stage 内容的动作重新执行。
+"""
+import functools
+import itertools
+import logging
+
+from behavior_tree.core import Blackboard, Status
+
+# stage 内容的版本
+STAGE_REVISION = 'stage_revision'
+# 只表示版本的伪键
+_REVISION_KEYS = (STAGE_REVISION,)
+
+_stats = {'hits': 0, 'misses': 0}
+
+
+class VersionedBlackboard(Blackboard):
+    """每次 set 都给键分配一个新的版本号，没有写过的键版本为 0"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counter = itertools.count(1)
+        self._revisions = {}
+
+    def set(self, key, value):
+        self._revisions[key] = next(self._counter)
+        super().set(key, value)
+
+    def update(self, data):
+        """批量写入，每个键同样分配新版本"""
+        for key, value in data.items():
+            self.set(key, value)
+
+    def revision(self, key):
+        return self._revisions.get(key, 0)
+
+    def touch(self, key):
+        """值不变只递增版本，返回新的版本号"""
+        revision = next(self._counter)
+        self._revisions[key] = revision
+        super().set(key, revision if key in _REVISION_KEYS else self.get(key))
+        return revision
+
+
+class _Memo(object):
+    __slots__ = ('inputs', 'outputs', 'status')
+
+    def __init__(self, inputs, outputs, status):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.status = status
+
+
+def memo_stats():
+    return dict(_stats)
+
+
+def memoize(reads=(), writes=(), skip_if=()):
+    """动作类装饰器，声明 execute 读取和写入的黑板键
+
+    skip_if 中的键为真时不记忆（比如一次性的流式导出）。
+    黑板没有 revision()（不是 VersionedBlackboard）或 'memoize' 为 False 时照常执行。
+    只记忆 SUCCESS，失败通常来自外部状态，下次仍然重新执行。
+    """
+    reads, writes, skip_if = tuple(reads), tuple(writes), tuple(skip_if)
+
+    def decorate(cls):
+        execute = cls.execute
+
+        @functools.wraps(execute)
+        def memoized(self, blackboard):
+            if not hasattr(blackboard, 'revision') or blackboard.get('memoize', True) is False \
+                    or any(blackboard.get(key) for key in skip_if):
+                return execute(self, blackboard)
+            memo = self.__dict__.pop('_memo', None)
+            inputs = tuple(blackboard.revision(key) for key in reads)
+            if memo is not None and memo.inputs == inputs \
+                    and all(blackboard.revision(key) == revision for key, revision in memo.outputs.items()):
+                self._memo = memo
+                _stats['hits'] += 1
+                logging.debug(f"{cls.__name__} 输入未变化，跳过")
+                return memo.status
+
+            # 没有命中时先丢掉旧的记忆再执行
+            _stats['misses'] += 1
+            status = execute(self, blackboard)
+            if status != Status.SUCCESS:
+                return status
+            for key in writes:
+                # 只改了对象内容的输出也要让下游知道
+                if key in _REVISION_KEYS:
+                    blackboard.touch(key)
+            # 按执行后的版本记录，自己写入的键不会导致下一次重新执行
+            self._memo = _Memo(tuple(blackboard.revision(key) for key in reads),
+                               {key: blackboard.revision(key) for key in writes if key not in _REVISION_KEYS}, status)
+            return status
+
+        cls.execute = memoized
+        cls.reads = reads
+        cls.writes = writes
+        return cls
+
+    return decorate
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""网格数据源：用少量批量调用读取点、面拓扑、法线和UV"""
+import itertools
+import logging
+import re
+
+import numpy as np
+
+from .geometry import GeometryBuffer
+from .topology import parse_face_to_vertex, validate_topology
+
+# 组件名中的编号或编号范围，例如 mesh.vtxFace[3][5:7]
+_COMPONENT_INDEX = re.compile(r'\[(\d+)(?::(\d+))?\]')
+
+
+def _component_indices(components):
+    """展开 ls / polyListComponentConversion 返回的组件，mesh.vtxFace[3][5:7] 展开为 (3, 5) (3, 6) (3, 7)"""
+    indices = []
+    for component in components:
+        ranges = _COMPONENT_INDEX.findall(component)
+        if any(stop for _, stop in ranges):
+            indices.extend(itertools.product(*(range(int(start), int(stop or start) + 1) for start, stop in ranges)))
+        else:
+            indices.append(tuple(int(start) for start, _ in ranges))
+    return indices
+
+
+def _face_vertex_positions(face_vertex_counts, face_vertex_indices, vertices, faces):
+    """(顶点, 面) 编号对在 face_vertex_indices 中的位置，用来把按组件给出的数据放回面顶点顺序"""
+    face_ids = np.repeat(np.arange(len(face_vertex_counts), dtype=np.int64), face_vertex_counts)
+    stride = int(face_vertex_indices.max(initial=-1)) + 1
+    keys = face_ids * stride + face_vertex_indices
+    order = np.argsort(keys, kind='stable')
+    lookup = np.asarray(faces, dtype=np.int64) * stride + np.asarray(vertices, dtype=np.int64)
+    positions = order[np.minimum(np.searchsorted(keys[order], lookup), max(len(keys) - 1, 0))]
+    if len(lookup) and not np.array_equal(keys[positions], lookup):
+        raise ValueError("面顶点组件与面拓扑不一致")
+    return positions
+
+
+class MeshSource(object):
+    """网格数据源接口
+
+    GetGeometryInfo 只通过这个接口取数据，Maya 中使用 OpenMayaMeshSource，
+    没有 Maya 的环境可以换成 FakeMeshSource 做测试和性能测试。
+    """
+
+    def resolve_meshes(self, nodes):
+        """把选中的节点展开为网格形状节点列表，遇到非网格节点抛出 ValueError"""
+        raise NotImplementedError
+
+    def set_time(self, frame):
+        """切换到指定帧，之后读取的都是这一帧的数据"""
+        raise NotImplementedError
+
+    def read_points(self, mesh):
+        """世界空间顶点坐标，(N, 3) 数组"""
+        raise NotImplementedError
+
+    def read_topology(self, mesh):
+        """面拓扑，返回 (face_vertex_counts, face_vertex_indices) 两个整数数组"""
+        raise NotImplementedError
+
+    def read_normals(self, mesh):
+        """逐面顶点（faceVarying）法线，与 face_vertex_indices 一一对应的 (N, 3) 数组，没有法线时返回空数组"""
+        raise NotImplementedError
+
+    def read_uvs(self, mesh):
+        """当前UV集逐面顶点（faceVarying）的UV，(N, 2) 数组，没有UV时返回空数组"""
+        raise NotImplementedError
+
+
+class CmdsMeshSource(MeshSource):
+    """只使用 maya.cmds 的数据源，除UV外每类数据用一次 [*] 范围查询取回整个网格"""
+
+    def __init__(self, cmds=None):
+        if cmds is None:
+            import maya.cmds as cmds
+        self._cmds = cmds
+        self._topology = (None, None)
+
+    def resolve_meshes(self, nodes):
+        cmds = self._cmds
+        self._topology = (None, None)
+        meshes = []
+        for node in nodes:
+            # 获取形状节点（如果是变换节点）
+            if cmds.objectType(node, isType='transform'):
+                meshes.extend(cmds.listRelatives(node, shapes=True, type='mesh') or [])
+            elif cmds.objectType(node, isType='mesh'):
+                meshes.append(node)
+            else:
+                raise ValueError(f"{node}不是多边形网格")
+        return meshes
+
+    def set_time(self, frame):
+        self._cmds.currentTime(frame, update=True)
+
+    def read_points(self, mesh):
+        points = self._cmds.xform(f"{mesh}.vtx[*]", query=True, translation=True, worldSpace=True)
+        return np.array(points, dtype=np.float32).reshape(-1, 3)
+
+    def read_topology(self, mesh):
+        # 法线查询也要用到拓扑，缓存最近一个网格的解析结果避免重复查询
+        if self._topology[0] != mesh:
+            lines = self._cmds.polyInfo(f"{mesh}.f[*]", faceToVertex=True)
+            self._topology = (mesh, parse_face_to_vertex(lines))
+        return self._topology[1]
+
+    def read_normals(self, mesh):
+        component = f"{mesh}.vtxFace[*][*]"
+        try:
+            normals = self._cmds.polyNormalPerVertex(component, query=True, xyz=True)
+        except RuntimeError:
+            normals = None
+        if not normals:
+            self._cmds.warning(f"{mesh}没有可用的顶点法线数据")
+            return np.empty((0, 3), dtype=np.float32)
+        # 查询结果与 ls -flatten 展开同一组件的顺序相同，按每个面顶点的 (顶点, 面) 编号放回面顶点顺序
+        normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
+        pairs = np.array(_component_indices(self._cmds.ls(component, flatten=True)), dtype=np.int64).reshape(-1, 2)
+        counts, indices = self.read_topology(mesh)
+        if len(pairs) != len(normals) or len(normals) != len(indices):
+            self._cmds.warning(f"{mesh}的法线数量与面顶点数量不一致")
+            return np.empty((0, 3), dtype=np.float32)
+        face_varying = np.empty_like(normals)
+        face_varying[_face_vertex_positions(counts, indices, pairs[:, 0], pairs[:, 1])] = normals
+        return face_varying
+
+    def read_uvs(self, mesh):
+        """cmds 查不到面顶点的UV编号，逐个UV转换为使用它的面顶点，调用次数与UV数量成正比
+
+        UV接缝处同一个顶点在不同的面上使用不同的UV，同样能正确导出。
+        """
+        cmds = self._cmds
+        if not cmds.polyUVSet(mesh, query=True, allUVSets=True):
+            return np.empty((0, 2), dtype=np.float32)
+        uvs = cmds.polyEditUV(f"{mesh}.map[*]", query=True, u=True, v=True)
+        uvs = np.array(uvs or [], dtype=np.float32).reshape(-1, 2)
+        rows = []
+        for uv in range(len(uvs)):
+            face_vertices = cmds.polyListComponentConversion(f"{mesh}.map[{uv}]", fromUV=True, toVertexFace=True)
+            rows.extend((vertex, face, uv) for vertex, face in _component_indices(face_vertices or []))
+        rows = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        counts, indices = self.read_topology(mesh)
+        uv_ids = np.full(len(indices), -1, dtype=np.int64)
+        uv_ids[_face_vertex_positions(counts, indices, rows[:, 0], rows[:, 1])] = rows[:, 2]
+        if (uv_ids < 0).any():
+            cmds.warning(f"{mesh}有面没有分配UV")
+            return np.empty((0, 2), dtype=np.float32)
+        return uvs[uv_ids]
+
+
+class OpenMayaMeshSource(CmdsMeshSource):
+    """通过 OpenMaya MFnMesh 的数组接口读取网格，每类数据只需要一次调用"""
+
+    def __init__(self, cmds=None):
+        super().__init__(cmds)
+        import maya.api.OpenMaya as om
+        self._om = om
+
+    def _fn_mesh(self, mesh):
+        selection = self._om.MSelectionList()
+        selection.add(mesh)
+        return self._om.MFnMesh(selection.getDagPath(0))
+
+    def read_points(self, mesh):
+        # getPoints 要为每个顶点构造 MPoint；API 1.0 的 getRawPoints 直接返回 MFnMesh 内部
+        # float 数组的地址，整块拷贝成物体空间坐标，再用世界矩阵一次变换
+        import ctypes
+        import maya.OpenMaya as om1
+        selection = om1.MSelectionList()
+        selection.add(mesh)
+        path = om1.MDagPath()
+        selection.getDagPath(0, path)
+        fn = om1.MFnMesh(path)
+        count = fn.numVertices()
+        if not count:
+            return np.empty((0, 3), dtype=np.float32)
+        buffer = (ctypes.c_float * (count * 3)).from_address(int(fn.getRawPoints()))
+        points = np.frombuffer(buffer, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+        # Maya 使用行向量，p' = p * M
+        matrix = self._world_matrix(mesh)
+        return (points @ matrix[:3, :3] + matrix[3, :3]).astype(np.float32)
+
+    def _world_matrix(self, mesh):
+        selection = self._om.MSelectionList()
+        selection.add(mesh)
+        matrix = selection.getDagPath(0).inclusiveMatrix()
+        return np.array([matrix.getElement(row, col) for row in range(4) for col in range(4)]).reshape(4, 4)
+
+    def read_topology(self, mesh):
+        counts, indices = self._fn_mesh(mesh).getVertices()
+        return np.array(counts, dtype=np.int32), np.array(indices, dtype=np.int32)
+
+    def read_normals(self, mesh):
+        fn = self._fn_mesh(mesh)
+        try:
+            normals = fn.getNormals(self._om.MSpace.kWorld)
+            _, normal_ids = fn.getNormalIds()
+        except RuntimeError:
+            self._cmds.warning(f"{mesh}没有可用的顶点法线数据")
+            return np.empty((0, 3), dtype=np.float32)
+        normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
+        return normals[np.array(normal_ids, dtype=np.int64)]
+
+    def read_uvs(self, mesh):
+        fn = self._fn_mesh(mesh)
+        if not fn.numUVs():
+            return np.empty((0, 2), dtype=np.float32)
+        us, vs = fn.getUVs()
+        _, uv_ids = fn.getAssignedUVs()
+        if len(uv_ids) != fn.numFaceVertices:
+            self._cmds.warning(f"{mesh}有面没有分配UV")
+            return np.empty((0, 2), dtype=np.float32)
+        uvs = np.column_stack((np.array(us, dtype=np.float32), np.array(vs, dtype=np.float32)))
+        return uvs[np.array(uv_ids, dtype=np.int64)]
+
+
+class FakeMeshSource(MeshSource):
+    """内存中的假网格数据源，接口与 OpenMayaMeshSource 相同，用于脱离 Maya 测试"""
+
+    def __init__(self, meshes=None):
+        self.meshes = dict(meshes or {})
+        # 网格名 -> deformer(frame, points)，用于模拟动画
+        self.deformers = {}
+        self.time = 0.0
+
+    def add_mesh(self, name, points, face_vertex_counts, face_vertex_indices, normals=None, uvs=None):
+        self.meshes[name] = GeometryBuffer(name, points, face_vertex_counts, face_vertex_indices, normals, uvs)
+        return name
+
+    def add_grid(self, name, rows, cols, size=1.0):
+        """添加一个 rows x cols 个四边面的平面网格"""
+        r, c = np.meshgrid(np.arange(rows + 1), np.arange(cols + 1), indexing='ij')
+        points = np.column_stack((c.ravel() * size, np.zeros(r.size), r.ravel() * size))
+        uvs = np.column_stack((c.ravel() / cols, r.ravel() / rows))
+        v = (np.arange(rows)[:, None] * (cols + 1) + np.arange(cols)[None, :]).ravel()
+        indices = np.column_stack((v, v + 1, v + cols + 2, v + cols + 1)).ravel()
+        counts = np.full(rows * cols, 4)
+        normals = np.tile((0.0, 1.0, 0.0), (len(indices), 1))
+        return self.add_mesh(name, points, counts, indices, normals, uvs[indices])
+
+    def resolve_meshes(self, nodes):
+        for node in nodes:
+            if node not in self.meshes:
+                raise ValueError(f"{node}不是多边形网格")
+        return list(nodes)
+
+    def set_time(self, frame):
+        self.time = frame
+
+    def read_points(self, mesh):
+        deformer = self.deformers.get(mesh)
+        if deformer is not None:
+            return np.asarray(deformer(self.time, self.meshes[mesh].points), dtype=np.float32)
+        return self.meshes[mesh].points
+
+    def read_topology(self, mesh):
+        geo = self.meshes[mesh]
+        return geo.face_vertex_counts, geo.face_vertex_indices
+
+    def read_normals(self, mesh):
+        return self.meshes[mesh].normals
+
+    def read_uvs(self, mesh):
+        return self.meshes[mesh].uvs
+
+
+MESH_SOURCES = {
+    'openmaya': OpenMayaMeshSource,
+    'cmds': CmdsMeshSource,
+    'fake': FakeMeshSource,
+}
+
+
+def get_mesh_source(source=None):
+    """按黑板上的 'mesh_source' 取数据源：可以是实例、注册名，默认使用 OpenMaya"""
+    if isinstance(source, MeshSource):
+        return source
+    name = source or 'openmaya'
+    if name not in MESH_SOURCES:
+        raise KeyError(f"未知的网格数据源: {name}")
+    return MESH_SOURCES[name]()
+
+
+def extract_geometry(source, mesh):
+    """通过数据源提取单个网格的几何信息，返回 GeometryBuffer"""
+    face_vertex_counts, face_vertex_indices = source.read_topology(mesh)
+    geo = GeometryBuffer(
+        mesh,
+        source.read_points(mesh),
+        face_vertex_counts,
+        face_vertex_indices,
+        source.read_normals(mesh),
+        source.read_uvs(mesh)
+    )
+    validate_topology(geo.face_vertex_counts, geo.face_vertex_indices, geo.point_count)
+    for key in ('normals', 'uvs'):
+        if len(getattr(geo, key)) not in (0, len(geo.face_vertex_indices)):
+            raise ValueError(f"{mesh}的{key}数量与面顶点数量不一致")
+    logging.info(f"{mesh}: {geo.point_count} 个顶点, {geo.face_count} 个面")
+    return geo
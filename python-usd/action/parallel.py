@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""Parallel 复合节点：子动作在线程池或进程池同时执行，黑板写入加锁或按子节点隔离"""
+import logging
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from behavior_tree.core import Action, Blackboard, Status
+
+from .registry import resolve_action
+
+# 进程模式下子动作返回 RUNNING 时的重试间隔（秒）
+PROCESS_TICK_INTERVAL = 0.05
+# 每次 tick 等待子动作结束的最长时间（秒），超时的子动作留到下次 tick 再检查
+TICK_TIMEOUT = 0.05
+
+
+class LockedBlackboard(object):
+    """给黑板的读写加锁，append() 保证并发追加列表时不丢数据"""
+
+    def __init__(self, blackboard):
+        self._blackboard = blackboard
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._blackboard.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._blackboard.set(key, value)
+
+    def append(self, key, value):
+        with self._lock:
+            self._blackboard.set(key, list(self._blackboard.get(key) or []) + [value])
+
+    def __getattr__(self, name):
+        return getattr(self._blackboard, name)
+
+
+class ScopedBlackboard(object):
+    """子节点私有的写入层：读取先查自己的写入再查父黑板，commit() 时再合并回父黑板"""
+
+    def __init__(self, parent):
+        self._parent = parent
+        self.writes = {}
+        self.appends = {}
+
+    def get(self, key, default=None):
+        if key in self.writes:
+            value = self.writes[key]
+        else:
+            value = self._parent.get(key, default)
+        if key in self.appends:
+            value = list(value or []) + self.appends[key]
+        return value
+
+    def set(self, key, value):
+        self.writes[key] = value
+        self.appends.pop(key, None)
+
+    def append(self, key, value):
+        self.appends.setdefault(key, []).append(value)
+
+    def commit(self, blackboard=None):
+        blackboard = blackboard or self._parent
+        for key, value in self.writes.items():
+            blackboard.set(key, value)
+        for key, values in self.appends.items():
+            blackboard.set(key, list(blackboard.get(key) or []) + values)
+
+    def __getattr__(self, name):
+        return getattr(self._parent, name)
+
+
+def _picklable_snapshot(blackboard, keys):
+    snapshot = {}
+    for key in keys:
+        value = blackboard.get(key)
+        try:
+            pickle.dumps(value)
+        except Exception:
+            logging.debug(f"黑板数据 {key} 无法传给子进程，已跳过")
+            continue
+        snapshot[key] = value
+    return snapshot
+
+
+def _run_in_process(class_name, kwargs, snapshot):
+    """在子进程中创建并执行子动作，直到不再返回 RUNNING，返回 (状态, 写入, 追加)"""
+    cls = resolve_action(class_name)
+    child = cls(**kwargs)
+    # 子进程内的父黑板是可序列化的快照字典
+    blackboard = ScopedBlackboard(snapshot)
+    while True:
+        status = child.execute(blackboard)
+        if status != Status.RUNNING:
+            return status, blackboard.writes, blackboard.appends
+        time.sleep(PROCESS_TICK_INTERVAL)
+
+
+class Parallel(Action):
+    """同时执行多个子动作
+
+    节点属性：
+        children: 子动作类名列表，或 {'class': 类名, ...节点属性} 字典列表
+        success_policy: 'all'（默认）全部成功才成功；'one' 任一成功即成功
+        failure_policy: 'one'（默认）任一失败即失败；'all' 全部失败才失败
+            两个策略都不满足且子动作全部结束时返回 FAILURE
+        executor: 'thread'（默认）或 'process'，进程模式只传递可序列化的黑板数据
+        max_workers: 池大小，默认等于子动作数量
+        blackboard_mode: 'locked'（默认）共享加锁的黑板；'scoped' 各子动作写入隔离，结束后按顺序合并
+
+    每次 tick 最多等待 TICK_TIMEOUT 秒，还有子动作在执行或返回 RUNNING 时本节点返回 RUNNING，
+    下次 tick 只重新执行已返回 RUNNING 的子动作，仍在执行的子动作不会重复提交。
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(name=kwargs.get('name'), blackboard=kwargs.get('blackboard'))
+        self.children = []
+        self.success_policy = 'all'
+        self.failure_policy = 'one'
+        self.executor = 'thread'
+        self.max_workers = None
+        self.blackboard_mode = 'locked'
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self._specs = [self._spec(child) for child in self.children]
+        self._nodes = None
+        self._statuses = None
+        self._scopes = None
+        self._pool = None
+        self._futures = None
+        self._results = None
+        self._started = None
+
+    @staticmethod
+    def _spec(child):
+        if isinstance(child, str):
+            return child, {'name': child}
+        props = dict(child)
+        class_name = props.pop('class')
+        props.setdefault('name', class_name)
+        return class_name, props
+
+    def _create_children(self):
+        nodes = []
+        for class_name, props in self._specs:
+            node = resolve_action(class_name)(**props)
+            if getattr(self, 'tree', None) is not None:
+                node.tree = self.tree
+            nodes.append(node)
+        return nodes
+
+    def _decide(self):
+        """按策略判断结果，还不能确定时返回 None"""
+        statuses = self._statuses
+        succeeded = statuses.count(Status.SUCCESS)
+        failed = statuses.count(Status.FAILURE)
+        pending = len(statuses) - succeeded - failed
+        if failed and (self.failure_policy == 'one' or failed == len(statuses)):
+            return Status.FAILURE
+        if succeeded and (self.success_policy == 'one' or succeeded == len(statuses)):
+            return Status.SUCCESS
+        if pending:
+            return None
+        # 全部结束但两个策略都不满足，例如 all/all 时有成功也有失败
+        return Status.FAILURE
+
+    def _reset(self):
+        for future in (self._futures or {}).values():
+            future.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self._nodes = self._statuses = self._scopes = self._pool = self._futures = self._results = None
+
+    def _collect(self, on_result):
+        """等待已提交的子动作最多 TICK_TIMEOUT 秒，把已结束的结果交给 on_result"""
+        wait(self._futures.values(), timeout=TICK_TIMEOUT)
+        for index, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            del self._futures[index]
+            try:
+                on_result(index, future.result())
+            except Exception as e:
+                logging.warning(f"{self._specs[index][0]} 执行失败: {e}")
+                self._statuses[index] = Status.FAILURE
+
+    def _tick_threads(self, blackboard):
+        if self._nodes is None:
+            self._nodes = self._create_children()
+            shared = LockedBlackboard(blackboard)
+            if self.blackboard_mode == 'scoped':
+                self._scopes = [ScopedBlackboard(shared) for _ in self._nodes]
+            else:
+                self._scopes = [shared] * len(self._nodes)
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers or len(self._nodes) or 1,
+                                            thread_name_prefix='bt-parallel')
+            self._futures = {}
+        for index, node in enumerate(self._nodes):
+            if self._statuses[index] == Status.RUNNING and index not in self._futures:
+                self._futures[index] = self._pool.submit(node.execute, self._scopes[index])
+        self._collect(self._statuses.__setitem__)
+
+    def _tick_processes(self, blackboard):
+        if self._pool is None:
+            from .layers import pool_context
+            keys = list(getattr(blackboard, 'local_data', {}) or {})
+            snapshot = _picklable_snapshot(blackboard, keys)
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers or len(self._specs) or 1,
+                                             mp_context=pool_context())
+            # 子进程内执行到不再返回 RUNNING，每个子动作只提交一次
+            self._futures = {index: self._pool.submit(_run_in_process, class_name, props, snapshot)
+                             for index, (class_name, props) in enumerate(self._specs)}
+            self._results = {}
+
+        def on_result(index, result):
+            self._statuses[index], writes, appends = result
+            self._results[index] = writes, appends
+
+        self._collect(on_result)
+
+    def _commit_process_results(self, blackboard):
+        # 子进程的写入按子动作顺序合并回黑板
+        for index in sorted(self._results):
+            scope = ScopedBlackboard(blackboard)
+            scope.writes, scope.appends = self._results[index]
+            scope.commit()
+
+    def execute(self, blackboard: Blackboard) -> Status:
+        if not self._specs:
+            return Status.SUCCESS
+        if self._statuses is None:
+            self._statuses = [Status.RUNNING] * len(self._specs)
+            self._started = time.perf_counter()
+        if self.executor == 'process':
+            self._tick_processes(blackboard)
+        else:
+            self._tick_threads(blackboard)
+        result = self._decide()
+        if result is None:
+            return Status.RUNNING
+
+        if self._results is not None:
+            self._commit_process_results(blackboard)
+        if self._scopes is not None and self.blackboard_mode == 'scoped':
+            for scope in self._scopes:
+                scope.commit()
+        for node, status in zip(self._nodes or [], self._statuses):
+            # 策略提前确定结果时取消仍在执行的子动作
+            if status == Status.RUNNING and hasattr(node, 'cancel'):
+                node.cancel()
+        logging.info(f"并行执行 {len(self._specs)} 个动作: {result}, 耗时 {time.perf_counter() - self._started:.3f}s")
+        self._reset()
+        return result
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""生产者/消费者导出流水线：主线程提取网格，写入线程同时写 USD 并导出文件"""
+import logging
+import queue
+import threading
+import time
+
+from .formats import save_stage
+from .streaming import MeshStream
+from .writer import author_mesh
+
+# 提取结束的标记
+_DONE = object()
+
+
+class ExportPipeline(object):
+    """Maya 数据只能在主线程读取，USD 写入和 stage.Export 放到写入线程，
+    两个阶段重叠执行，总耗时接近 max(提取, 写入)。
+
+    写入线程的异常会让主线程停止提取，主线程的异常会让写入线程退出，
+    run() 结束前总会等待写入线程结束，然后把第一个异常抛给调用方。
+    """
+
+    def __init__(self, stage, root_path, usd_path=None, max_inflight=2, usd_format=None):
+        self.stage = stage
+        self.root_path = root_path
+        self.usd_path = usd_path
+        self.usd_format = usd_format
+        self.max_inflight = max(1, int(max_inflight))
+        self.dedup = {}
+        self.save_metrics = None
+        self._queue = queue.Queue()
+        self._error = None
+        self._cancelled = threading.Event()
+        self._write_seconds = 0.0
+
+    def _writer(self, stream):
+        try:
+            while True:
+                geo = self._queue.get()
+                if geo is _DONE:
+                    break
+                start = time.perf_counter()
+                try:
+                    self.dedup[geo.name] = author_mesh(self.stage, f"{self.root_path}/{geo.name}", geo)
+                finally:
+                    stream.release(geo)
+                # 等待下一个网格时不再持有这一个
+                geo = None
+                self._write_seconds += time.perf_counter() - start
+            if self.usd_path and not self._cancelled.is_set():
+                self.save_metrics = save_stage(self.stage, self.usd_path, self.usd_format)
+                self._write_seconds += self.save_metrics['seconds']
+        except BaseException as e:
+            self._error = e
+            self._cancelled.set()
+            # 释放剩余的网格，避免主线程一直等待名额
+            while True:
+                try:
+                    geo = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if geo is not _DONE:
+                    stream.release(geo)
+
+    def run(self, source, meshes):
+        """提取并导出全部网格，返回各阶段耗时"""
+        stream = MeshStream(source, meshes, self.max_inflight, block=True)
+        writer = threading.Thread(target=self._writer, args=(stream,), name='usd-writer', daemon=True)
+        start = time.perf_counter()
+        extract_seconds = 0.0
+        writer.start()
+        try:
+            it = iter(stream)
+            while not self._cancelled.is_set():
+                tick = time.perf_counter()
+                geo = next(it, None)
+                extract_seconds += time.perf_counter() - tick
+                if geo is None:
+                    break
+                self._queue.put(geo)
+                # 提取下一个网格时只有写入线程持有这一个
+                geo = None
+        except BaseException:
+            self._cancelled.set()
+            raise
+        finally:
+            self._queue.put(_DONE)
+            writer.join()
+        if self._error is not None:
+            raise self._error
+
+        stats = {
+            'meshes': stream.extracted,
+            'extract_seconds': round(extract_seconds, 4),
+            'write_seconds': round(self._write_seconds, 4),
+            'total_seconds': round(time.perf_counter() - start, 4),
+        }
+        stats.update(stream.stats())
+        logging.info(f"流水线导出 {stats['meshes']} 个网格: 提取 {stats['extract_seconds']}s, "
+                     f"写入 {stats['write_seconds']}s, 总计 {stats['total_seconds']}s")
+        return stats
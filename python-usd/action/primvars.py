@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""索引 primvar：对 faceVarying 的法线和UV去重，生成唯一值表和索引数组"""
+import numpy as np
+
+
+def dedup_values(values):
+    """按字节内容对每一行去重
+
+    返回 (unique_values, indices)，unique_values 按首次出现的顺序排列，
+    values 等于 unique_values[indices]。
+    """
+    values = np.ascontiguousarray(values)
+    if not len(values):
+        return values, np.empty(0, dtype=np.int32)
+    # 每一行视为一个定长字节串作为哈希键，整块交给 np.unique 处理
+    row = np.dtype((np.void, values.dtype.itemsize * values[0].size))
+    keys = values.reshape(len(values), -1).view(row).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # np.unique 的结果按字节排序，这里换回首次出现的顺序，方便对照原数据
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return values[first[order]], rank[inverse.ravel()].astype(np.int32)
+
+
+def dedup_report(values, unique_values, indices):
+    """统计去重前后的数据量"""
+    before = values.nbytes
+    after = unique_values.nbytes + indices.nbytes
+    return {
+        'count': len(values),
+        'unique': len(unique_values),
+        'bytes_before': before,
+        'bytes_after': after,
+        'ratio': round(after / before, 4) if before else 1.0,
+    }
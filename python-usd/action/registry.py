@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""动作注册表：解析源码 AST 按类名找到动作所在模块，不导入模块本身
+
+行为树加载时只需要知道类名对应哪个模块，真正执行到该动作时才导入；
+pxr、maya 等重量级依赖通过 lazy_import 在第一次访问属性时才导入。
+"""
+import ast
+import hashlib
+import importlib
+import logging
+import os
+import sys
+import types
+
+# 动作基类，继承它们（直接或间接）的类都登记为动作
+BASE_CLASSES = ('Action', 'Condition')
+# 类名重复时优先使用的模块
+PREFERRED_MODULES = ('sample_action', 'create')
+
+_registry = None
+# 创建过的 LazyModule，tracing 需要同步修改它们复制过去的属性
+_lazy_modules = []
+
+
+class LazyModule(types.ModuleType):
+    """第一次访问属性时才导入的模块，导入后属性直接复制到自身，之后不再经过 __getattr__"""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """已经导入的模块直接返回，否则返回 LazyModule"""
+    module = sys.modules.get(name)
+    if module is None:
+        module = LazyModule(name)
+        _lazy_modules.append(module)
+    return module
+
+
+def lazy_modules(name):
+    """名为 name 的全部 LazyModule"""
+    return [module for module in _lazy_modules if module.__name__ == name]
+
+
+def _base_names(node):
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            yield base.id
+        elif isinstance(base, ast.Attribute):
+            yield base.attr
+
+
+def discover_actions(package_dir=None, package=None):
+    """扫描包内模块的类定义，返回 {类名: 模块名}"""
+    package_dir = package_dir or os.path.dirname(os.path.abspath(__file__))
+    package = package or __package__
+    stems = sorted(name[:-3] for name in os.listdir(package_dir)
+                   if name.endswith('.py') and name != '__init__.py')
+    stems.sort(key=lambda stem: PREFERRED_MODULES.index(stem) if stem in PREFERRED_MODULES else len(PREFERRED_MODULES))
+
+    classes = []
+    for stem in stems:
+        with open(os.path.join(package_dir, stem + '.py'), 'rb') as f:
+            tree = ast.parse(f.read(), filename=stem + '.py')
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and not node.name.startswith('_'):
+                classes.append((node.name, f"{package}.{stem}", set(_base_names(node))))
+
+    # 基类可能定义在其它模块，反复传播直到没有新的动作类
+    action_names = set(BASE_CLASSES)
+    changed = True
+    while changed:
+        changed = False
+        for name, _, bases in classes:
+            if name not in action_names and bases & action_names:
+                action_names.add(name)
+                changed = True
+
+    registry = {}
+    for name, module_name, bases in classes:
+        if name in BASE_CLASSES or not bases & action_names:
+            continue
+        if name in registry:
+            logging.debug(f"动作 {name} 在 {registry[name]} 和 {module_name} 中重复定义，使用 {registry[name]}")
+            continue
+        registry[name] = module_name
+    return registry
+
+
+def registry_signature(package_dir=None):
+    """动作包内模块文件名、修改时间和大小的摘要，模块增删或修改后随之变化"""
+    package_dir = package_dir or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.blake2b(digest_size=8)
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            stat = os.stat(os.path.join(package_dir, name))
+            digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = discover_actions()
+    return _registry
+
+
+def find_action(class_name):
+    """类名对应的模块名，不导入模块"""
+    module_name = get_registry().get(class_name)
+    if module_name is None:
+        raise ValueError(f"找不到动作: {class_name}")
+    return module_name
+
+
+def resolve_action(class_name):
+    """导入动作所在模块并返回动作类"""
+    return getattr(importlib.import_module(find_action(class_name)), class_name)
@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
 # Jcen
 import json
-import time
 
 from behavior_tree.core import (
     Inverter, Repeater, Succeeder, UntilFail, Action, Condition, Blackboard, Status
 )
 import logging
+
+from .async_action import AsyncAction
+from .registry import lazy_import
+
+# 第一次用到时才导入，加载行为树时不会引入 Maya、USD 和 NumPy
+cmds = lazy_import('maya.cmds')
+np = lazy_import('numpy')
+Sdf = lazy_import('pxr.Sdf')
+UsdGeom = lazy_import('pxr.UsdGeom')
 logging.basicConfig(
     level=logging.INFO,
     format='%(levelname)s: %(message)s'  # 只保留级别和消息，去掉日志器名称
@@ -33,24 +41,24 @@ class CheckNeedExportMaterial(Condition):
         return blackboard.get("export_material", True)
 
 
-class GetData(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class GetData(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('更新数据中.....')
-        time.sleep(2)
+        self.wait(2)
         return Status.SUCCESS  # 语义正确：数据更新成功
 
 
-class ClearFile(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class ClearFile(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('清理文件中.....')
-        time.sleep(2)
+        self.wait(2)
         return Status.SUCCESS  # 语义正确：数据更新成功
 
 
-class SaveFile(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class SaveFile(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('保存文件中.....')
-        time.sleep(2)
+        self.wait(2)
         return Status.SUCCESS
 
 
@@ -100,65 +108,50 @@ class HouUsdPipe(Action):
         return Status.SUCCESS
 
 
-class ModelCheck(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class ModelCheck(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 模型检查')
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS
 
-class ModelExport(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class ModelExport(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 模型导出')
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS
 
-class ShaderExport(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class ShaderExport(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 材质导出')
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS
 
-class OtherAction(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class OtherAction(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 其他自定义动作')
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS
 
-class PublishServer(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class PublishServer(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 发布资产到服务器')
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS
 
-class GetBlackboardData(Action):
-    def execute(self, blackboard: Blackboard) -> Status:
+class GetBlackboardData(AsyncAction):
+    def run(self, blackboard: Blackboard) -> Status:
         logging.info('执行动作： 获取黑板数据')
 
         # 方式1：通过节点关联的tree获取黑板（已实现）
         logging.info("通过self.tree获取的黑板本地数据" + str(self.tree.blackboard.local_data))
 
-        time.sleep(0.5)
+        self.wait(0.5)
         return Status.SUCCESS  # 注意：原代码缺少返回值，需补充
 
 
 class CreateBouncingBallAnime(Action):
     def execute(self, blackboard: Blackboard) -> Status:
-        import maya.cmds as cmds
-        import math
-        # 设置帧率为24fps
-        cmds.currentUnit(time='film')
-
-        # 清除场景中可能存在的同名物体
-        if cmds.objExists("ball"):
-            cmds.delete("ball")
-
-        # 创建小球
-        ball = cmds.polySphere(r=1, name="ball")[0]
-
-        # 创建参考平面
-        if not cmds.objExists("reference_plane"):
-            plane = cmds.polyPlane(w=20, h=20, name="reference_plane")[0]
-            cmds.setAttr(plane + ".translateY", 0)  # 放置在0位置作为参考
+        from .curves import bake, frame_range, sine_wave
 
         # 动画参数
         fps = 24  # 帧率
@@ -167,34 +160,68 @@ class CreateBouncingBallAnime(Action):
         float_range = 10  # 浮动范围（正负10个单位）
         speed = 2  # 浮动速度（周期数/秒）
 
-        # 计算每帧的位置并设置关键帧
-        for frame in range(total_frames + 1):
-            # 计算时间（秒）
-            time = frame / fps
+        # 一次算出整条曲线：正弦函数范围是[-1, 1]，乘以浮动范围得到[-10, 10]
+        frames = frame_range(0, total_frames)
+        y_positions = bake(sine_wave(float_range, speed), frames, fps)
+
+        # 'bake_target' 为 usd 时直接写成 stage 上的时间采样，不经过 Maya
+        if blackboard.get('bake_target') == 'usd':
+            if not blackboard.get('stage') or not blackboard.get('ROOT'):
+                return Status.FAILURE
+            from .curves import author_usd_curve
+            stage = blackboard.get('stage')
+            ball = UsdGeom.Xform.Define(stage, blackboard.get('ROOT').GetPath().AppendChild('ball'))
+            # 重复执行时沿用已有的 translate，AddTranslateOp 不能重复添加
+            translate = next((op for op in ball.GetOrderedXformOps() if op.GetOpName() == 'xformOp:translate'),
+                             None) or ball.AddTranslateOp()
+            positions = np.zeros((len(frames), 3))
+            positions[:, 1] = y_positions
+            author_usd_curve(stage.GetRootLayer(), translate.GetAttr().GetPath(), Sdf.ValueTypeNames.Double3,
+                             frames, positions)
+            stage.SetTimeCodesPerSecond(fps)
+            stage.SetStartTimeCode(frames[0])
+            stage.SetEndTimeCode(frames[-1])
+        else:
+            from .curves import write_maya_curve
+            # 设置帧率为24fps
+            cmds.currentUnit(time='film')
+
+            # 清除场景中可能存在的同名物体
+            if cmds.objExists("ball"):
+                cmds.delete("ball")
+
+            # 创建小球
+            ball = cmds.polySphere(r=1, name="ball")[0]
+
+            # 创建参考平面
+            if not cmds.objExists("reference_plane"):
+                plane = cmds.polyPlane(w=20, h=20, name="reference_plane")[0]
+                cmds.setAttr(plane + ".translateY", 0)  # 放置在0位置作为参考
+
+            # 整条曲线一次写入，自动切线保证运动平滑
+            write_maya_curve(ball, 'translateY', frames, y_positions)
 
-            # 使用正弦函数计算Y轴位置，实现平滑浮动
-            # 正弦函数范围是[-1, 1]，乘以浮动范围得到[-10, 10]
-            y_position = math.sin(time * speed * math.pi) * float_range
+        logging.info(f"小球上下浮动动画创建完成！浮动范围: ±{float_range}单位，持续时间: {duration_seconds}秒")
 
-            # 设置位置并添加关键帧
-            cmds.setAttr(ball + ".translateY", y_position)
-            cmds.setKeyframe(ball, attribute='translateY', time=frame)
+        return Status.SUCCESS
 
-        # 优化动画曲线使运动更平滑
-        cmds.select(ball)
-        cmds.filterCurve()
 
-        logging.info(f"小球上下浮动动画创建完成！浮动范围: ±{float_range}单位，持续时间: {duration_seconds}秒")
+def _set_animation_ids(blackboard, action, animation_id):
+    """'<类名>_animation_id' 用于取消动画；'<类名>_job_id' 沿用原来的键，指向驱动动画的 scriptJob
 
-        return Status.SUCCESS
+    调度器由所有实时动画共用，kill 这个 scriptJob 会停止全部动画。
+    """
+    from .scheduler import get_scheduler
+    name = action.__class__.__name__
+    blackboard.set(f"{name}_animation_id", animation_id)
+    blackboard.set(f"{name}_job_id", get_scheduler().job_id)
 
 
 class EnergyPulseAction(Action):
     """能量脉冲动画 - 实时缩放并变色"""
 
     def execute(self, blackboard: Blackboard) -> Status:
-        import maya.cmds as cmds
-        import math
+        from .scheduler import Animation, get_scheduler
         # 获取或创建目标物体
         target = blackboard.get("target")
         if not target or not cmds.objExists(target):
@@ -204,42 +231,23 @@ class EnergyPulseAction(Action):
 
         # 动画参数
         duration = 2.0  # 动画持续2秒
-        start_time = time.time()
         initial_scale = cmds.getAttr(f"{target}.scale")[0][0]
-        job_id = None  # 用于保存脚本任务ID
-
-        # 实时更新函数
-        def update():
-            elapsed = time.time() - start_time
-            if elapsed >= duration:
-                # 动画结束，清理任务
-                cmds.scriptJob(kill=job_id, force=True)
-                # 恢复初始状态
-                cmds.setAttr(f"{target}.scale", initial_scale, initial_scale, initial_scale)
-                cmds.setAttr(f"{target}.overrideColorR", 1)
-                cmds.setAttr(f"{target}.overrideColorG", 1)
-                cmds.setAttr(f"{target}.overrideColorB", 1)
-                return False  # 停止任务
-
-            # 计算进度（0-1）
-            progress = elapsed / duration
-
-            # 脉冲缩放（正弦函数实现呼吸效果）
-            scale_factor = 1 + math.sin(progress * math.pi * 6) * 0.5
-            cmds.setAttr(f"{target}.scale",
-                         initial_scale * scale_factor,
-                         initial_scale * scale_factor,
-                         initial_scale * scale_factor)
-
-            # 颜色变化（从蓝到红）
-            cmds.setAttr(f"{target}.overrideColorR", progress)
-            cmds.setAttr(f"{target}.overrideColorB", 1 - progress)
-
-            return True  # 继续执行
-
-        # 创建每帧更新的脚本任务
-        job_id = cmds.scriptJob(everyFrame=update, protected=True)
-        blackboard.set(f"{self.__class__.__name__}_job_id", job_id)
+
+        # 脉冲缩放（正弦函数实现呼吸效果）
+        def scale(seconds):
+            return initial_scale * (1 + np.sin(seconds / duration * np.pi * 6) * 0.5)
+
+        channels = {f"{target}.scale{axis}": scale for axis in 'XYZ'}
+        # 颜色变化（从蓝到红）
+        channels[f"{target}.overrideColorR"] = lambda seconds: seconds / duration
+        channels[f"{target}.overrideColorB"] = lambda seconds: 1 - seconds / duration
+        # 动画结束后恢复初始状态
+        restore = {f"{target}.scale{axis}": initial_scale for axis in 'XYZ'}
+        restore.update({f"{target}.overrideColor{c}": 1.0 for c in 'RGB'})
+
+        # 所有实时动画共用一个调度器，每次刷新批量写入
+        animation_id = get_scheduler().add(Animation(f"能量脉冲 {target}", duration, channels, restore))
+        _set_animation_ids(blackboard, self, animation_id)
 
         logging.info(f"启动能量脉冲动画: {target}")
         return Status.SUCCESS  # 表示动画正在运行
@@ -249,50 +257,35 @@ class TrajectoryAction(Action):
     """轨迹运动动画 - 实时沿路径移动"""
 
     def execute(self, blackboard: Blackboard) -> Status:
-        import maya.cmds as cmds
-        import math
+        from .scheduler import Animation, get_scheduler
         # 获取或创建目标物体
         target = blackboard.get("target")
         if not target or not cmds.objExists(target):
             target = cmds.polyCone(name="projectile")[0]
             blackboard.set("target", target)
 
-        # 记录初始位置
+        # 记录初始位置（世界空间）
         start_pos = cmds.xform(target, q=True, translation=True, worldSpace=True)
-        start_time = time.time()
         duration = 3.0  # 持续3秒
-        job_id = None
-
-        # 实时更新函数
-        def update():
-            elapsed = time.time() - start_time
-            if elapsed >= duration:
-                cmds.scriptJob(kill=job_id, force=True)
-                return False
-
-            progress = elapsed / duration
-            # 计算8字轨迹（双纽线数学公式）
-            theta = progress * math.pi * 4
-            radius = 10
-            x = radius * math.sin(theta)
-            z = radius * math.sin(theta) * math.cos(theta)
-            y = start_pos[1] + math.sin(theta) * 3  # 上下浮动
-
-            # 更新位置
-            cmds.xform(target, translation=[
-                start_pos[0] + x,
-                start_pos[1] + y,
-                start_pos[2] + z
-            ], worldSpace=True)
-
-            # 面向运动方向
-            cmds.xform(target, rotation=[0, theta * 180 / math.pi, 0], worldSpace=True)
-
-            return True
-
-        # 创建实时更新任务
-        job_id = cmds.scriptJob(everyFrame=update, protected=True)
-        blackboard.set(f"{self.__class__.__name__}_job_id", job_id)
+        radius = 10
+
+        # 计算8字轨迹（双纽线数学公式）
+        def theta(seconds):
+            return seconds / duration * np.pi * 4
+
+        channels = {
+            f"{target}.translateX": lambda s: start_pos[0] + radius * np.sin(theta(s)),
+            f"{target}.translateY": lambda s: start_pos[1] + np.sin(theta(s)) * 3,  # 上下浮动
+            f"{target}.translateZ": lambda s: start_pos[2] + radius * np.sin(theta(s)) * np.cos(theta(s)),
+            # 面向运动方向，X/Z 旋转归零
+            f"{target}.rotateX": lambda s: 0.0,
+            f"{target}.rotateY": lambda s: np.degrees(theta(s)),
+            f"{target}.rotateZ": lambda s: 0.0,
+        }
+
+        # 位置和朝向按世界空间写入
+        animation_id = get_scheduler().add(Animation(f"轨迹运动 {target}", duration, channels, world_space=True))
+        _set_animation_ids(blackboard, self, animation_id)
 
         logging.info(f"启动轨迹运动动画: {target}")
         return Status.SUCCESS
@@ -302,8 +295,7 @@ class QuantumJitterAction(Action):
     """量子抖动动画 - 实时随机位置抖动"""
 
     def execute(self, blackboard: Blackboard) -> Status:
-        import maya.cmds as cmds
-        import math
+        from .scheduler import Animation, get_scheduler
         # 获取或创建目标物体
         target = blackboard.get("target")
         if not target or not cmds.objExists(target):
@@ -313,41 +305,28 @@ class QuantumJitterAction(Action):
 
         # 动画参数
         start_pos = cmds.xform(target, q=True, translation=True, worldSpace=True)
-        start_time = time.time()
         duration = 2.5  # 持续2.5秒
         jitter_range = 3.0  # 抖动范围
-        job_id = None
-
-        # 实时更新函数
-        def update():
-            elapsed = time.time() - start_time
-            if elapsed >= duration:
-                cmds.scriptJob(kill=job_id, force=True)
-                # 回到初始位置
-                cmds.xform(target, translation=start_pos, worldSpace=True)
-                cmds.setAttr(f"{target}.overrideOpacity", 1.0)
-                return False
-
-            progress = elapsed / duration
-            # 随时间减小抖动范围
-            current_range = jitter_range * (1 - progress)
 
-            # 随机抖动位置
-            x = start_pos[0] + (math.sin(elapsed * 10) * current_range * 0.5)
-            y = start_pos[1] + (math.cos(elapsed * 8) * current_range * 0.5)
-            z = start_pos[2] + (math.sin(elapsed * 12) * current_range * 0.5)
-
-            cmds.xform(target, translation=[x, y, z], worldSpace=True)
+        # 随时间减小抖动范围
+        def jitter(axis, frequency, wave):
+            return lambda s: start_pos[axis] + wave(s * frequency) * jitter_range * (1 - s / duration) * 0.5
 
+        channels = {
+            f"{target}.translateX": jitter(0, 10, np.sin),
+            f"{target}.translateY": jitter(1, 8, np.cos),
+            f"{target}.translateZ": jitter(2, 12, np.sin),
             # 闪烁效果
-            opacity = 0.7 + math.sin(elapsed * 20) * 0.3
-            cmds.setAttr(f"{target}.overrideOpacity", opacity)
-
-            return True
-
-        # 创建实时更新任务
-        job_id = cmds.scriptJob(everyFrame=update, protected=True)
-        blackboard.set(f"{self.__class__.__name__}_job_id", job_id)
+            f"{target}.overrideOpacity": lambda s: 0.7 + np.sin(s * 20) * 0.3,
+        }
+        # 回到初始位置
+        restore = {f"{target}.translate{axis}": start_pos[i] for i, axis in enumerate('XYZ')}
+        restore[f"{target}.overrideOpacity"] = 1.0
+
+        # 位置按世界空间抖动和恢复
+        animation_id = get_scheduler().add(Animation(f"量子抖动 {target}", duration, channels, restore,
+                                                     world_space=True))
+        _set_animation_ids(blackboard, self, animation_id)
 
         logging.info(f"启动量子抖动动画: {target}")
         return Status.SUCCESS
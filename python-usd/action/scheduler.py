@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""实时动画调度器：所有实时动画共用一个 scriptJob 回调，每次回调批量推进并一次写入全部属性
+
+动画在登记时用 NumPy 预先算好整条曲线，回调里只做插值；
+写入通过一个 MDGModifier 合并提交，代替逐个 setAttr / xform。
+"""
+import itertools
+import logging
+import time
+
+import numpy as np
+
+# 预计算曲线的采样密度（每秒采样数）
+DEFAULT_SAMPLES_PER_SECOND = 120
+
+
+class Animation(object):
+    """duration 秒的实时动画
+
+    channels 为 {属性: fn(秒数组) -> 值数组}，属性写成 'node.attr' 形式的标量属性，值使用界面单位；
+    restore 为结束或取消时写回的 {属性: 值}，为空时保留最后一帧。
+    world_space 为 True 时 translateX/Y/Z、rotateX/Y/Z 通道（以及 restore 中的同名属性）按世界空间写入，
+    与 cmds.xform(worldSpace=True) 相同。
+    """
+
+    __slots__ = ('name', 'duration', 'plugs', 'times', 'table', 'restore', 'world_space', 'start', 'id', 'binding',
+                 'restore_binding')
+
+    def __init__(self, name, duration, channels, restore=None, samples_per_second=DEFAULT_SAMPLES_PER_SECOND,
+                 world_space=False):
+        self.name = name
+        self.duration = float(duration)
+        self.world_space = world_space
+        self.plugs = list(channels)
+        self.times = np.linspace(0.0, self.duration, max(2, int(self.duration * samples_per_second) + 1))
+        # (通道数, 采样数)，一次插值得到所有通道的值
+        self.table = np.vstack([np.broadcast_to(np.asarray(fn(self.times), dtype=np.float64), self.times.shape)
+                                for fn in channels.values()]) if channels else np.zeros((0, len(self.times)))
+        self.restore = dict(restore or {})
+        self.start = None
+        self.id = None
+        self.binding = None
+        self.restore_binding = None
+
+    def values_at(self, elapsed):
+        """elapsed 秒时所有通道的值"""
+        position = min(max(elapsed, 0.0), self.duration) / (self.duration or 1.0) * (len(self.times) - 1)
+        index = min(int(position), len(self.times) - 2)
+        weight = position - index
+        return self.table[:, index] * (1.0 - weight) + self.table[:, index + 1] * weight
+
+
+class MayaPlugWriter(object):
+    """把属性解析为 MPlug 并缓存单位换算，写入时合并到一个 MDGModifier
+
+    世界空间的 translate/rotate 通道按节点分组，通过 MFnTransform 在同一次写入中设置。
+    """
+
+    def bind(self, plugs, world_space=False):
+        import maya.api.OpenMaya as om
+        plain, world = [], {}
+        for index, plug in enumerate(plugs):
+            node, _, attr = plug.rpartition('.')
+            if world_space and attr[:-1] in ('translate', 'rotate') and attr[-1:] in ('X', 'Y', 'Z'):
+                channels = world.setdefault(node, {'translate': [None] * 3, 'rotate': [None] * 3})
+                channels[attr[:-1]]['XYZ'.index(attr[-1])] = index
+            else:
+                plain.append(index)
+        selection = om.MSelectionList()
+        for index in plain:
+            selection.add(plugs[index])
+        bound, scales, handles = [], [], []
+        for index in range(len(plain)):
+            plug = selection.getPlug(index)
+            # MPlug 使用内部单位（厘米、弧度），在这里把界面单位的换算系数算好
+            unit = om.MFnUnitAttribute(plug.attribute()).unitType() \
+                if plug.attribute().hasFn(om.MFn.kUnitAttribute) else None
+            if unit == om.MFnUnitAttribute.kDistance:
+                scales.append(om.MDistance.uiToInternal(1.0))
+            elif unit == om.MFnUnitAttribute.kAngle:
+                scales.append(om.MAngle.uiToInternal(1.0))
+            else:
+                scales.append(1.0)
+            bound.append(plug)
+            handles.append(om.MObjectHandle(plug.node()))
+        transforms = []
+        for node, channels in world.items():
+            selection = om.MSelectionList()
+            selection.add(node)
+            path = selection.getDagPath(0)
+            transforms.append((om.MFnTransform(path), channels['translate'], channels['rotate']))
+            handles.append(om.MObjectHandle(path.node()))
+        return bound, np.asarray(scales), handles, np.asarray(plain, dtype=np.int64), transforms
+
+    def is_valid(self, binding):
+        return all(handle.isValid() for handle in binding[2])
+
+    def _write_world(self, fn, translate, rotate, values):
+        """没有给出的轴保持当前的世界空间值"""
+        import maya.api.OpenMaya as om
+        if any(index is not None for index in translate):
+            current = fn.translation(om.MSpace.kWorld)
+            scale = om.MDistance.uiToInternal(1.0)
+            fn.setTranslation(om.MVector([current[axis] if index is None else values[index] * scale
+                                          for axis, index in enumerate(translate)]), om.MSpace.kWorld)
+        if any(index is not None for index in rotate):
+            current = fn.rotation(om.MSpace.kWorld, asQuaternion=True).asEulerRotation()
+            scale = om.MAngle.uiToInternal(1.0)
+            euler = om.MEulerRotation([current[axis] if index is None else values[index] * scale
+                                       for axis, index in enumerate(rotate)])
+            fn.setRotation(euler.asQuaternion(), om.MSpace.kWorld)
+
+    def write(self, items):
+        """items 为 [(binding, 值数组)]，一次提交"""
+        import maya.api.OpenMaya as om
+        modifier = om.MDGModifier()
+        for (plugs, scales, _, plain, transforms), values in items:
+            values = np.asarray(values, dtype=np.float64)
+            for plug, value in zip(plugs, (values[plain] * scales).tolist()):
+                modifier.newPlugValueDouble(plug, value)
+            if transforms:
+                listed = values.tolist()
+                for fn, translate, rotate in transforms:
+                    self._write_world(fn, translate, rotate, listed)
+        modifier.doIt()
+
+
+class FakePlugWriter(object):
+    """内存中的属性写入器，接口与 MayaPlugWriter 相同，用于脱离 Maya 测试"""
+
+    def __init__(self):
+        self.values = {}
+        self.writes = 0
+
+    def bind(self, plugs, world_space=False):
+        return list(plugs)
+
+    def is_valid(self, binding):
+        return True
+
+    def write(self, items):
+        self.writes += 1
+        for plugs, values in items:
+            self.values.update(zip(plugs, np.asarray(values).tolist()))
+
+
+class AnimationScheduler(object):
+    """所有实时动画共用一个 timeChange scriptJob，没有动画时自动注销
+
+    按帧驱动：时间轴每前进一帧推进一次，Maya 空闲时不会反复回调占用 CPU；
+    动画进度按 clock 计时，与播放速度无关。
+
+    tick() 推进全部动画并一次写入；每次 tick 的耗时记录在 stats() 中。
+    """
+
+    def __init__(self, writer=None, clock=time.perf_counter, install_job=True):
+        self.writer = writer or MayaPlugWriter()
+        self.clock = clock
+        self.install_job = install_job
+        self.job_id = None
+        self._animations = {}
+        self._ids = itertools.count(1)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._ticks = 0
+        self._updates = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._last_seconds = 0.0
+
+    @property
+    def active(self):
+        return len(self._animations)
+
+    def add(self, animation):
+        """登记动画并立即开始，返回动画 id"""
+        animation.binding = self.writer.bind(animation.plugs, animation.world_space)
+        animation.restore_binding = self.writer.bind(list(animation.restore), animation.world_space) \
+            if animation.restore else None
+        animation.start = self.clock()
+        animation.id = next(self._ids)
+        self._animations[animation.id] = animation
+        self._start_job()
+        return animation.id
+
+    def cancel(self, animation_id, restore=True):
+        """取消动画，restore 为 True 时写回初始值"""
+        animation = self._animations.pop(animation_id, None)
+        if animation is None:
+            return False
+        if restore and animation.restore_binding is not None and self.writer.is_valid(animation.restore_binding):
+            self.writer.write([(animation.restore_binding, np.asarray(list(animation.restore.values()), dtype=np.float64))])
+        logging.info(f"取消动画: {animation.name}")
+        if not self._animations:
+            self._stop_job()
+        return True
+
+    def cancel_all(self, restore=True):
+        for animation_id in list(self._animations):
+            self.cancel(animation_id, restore)
+
+    def tick(self, now=None):
+        """推进全部动画，合并写入，结束的动画写回初始值并移除"""
+        if not self._animations:
+            return
+        start = time.perf_counter()
+        now = self.clock() if now is None else now
+        items, finished = [], []
+        for animation in list(self._animations.values()):
+            if not self.writer.is_valid(animation.binding):
+                logging.warning(f"动画目标已被删除: {animation.name}")
+                del self._animations[animation.id]
+                continue
+            elapsed = now - animation.start
+            if elapsed >= animation.duration:
+                finished.append(animation)
+                if animation.restore_binding is not None:
+                    items.append((animation.restore_binding,
+                                  np.asarray(list(animation.restore.values()), dtype=np.float64)))
+                    continue
+            items.append((animation.binding, animation.values_at(elapsed)))
+        if items:
+            self.writer.write(items)
+        for animation in finished:
+            del self._animations[animation.id]
+            logging.info(f"动画结束: {animation.name}")
+
+        seconds = time.perf_counter() - start
+        self._ticks += 1
+        self._updates += len(items)
+        self._total_seconds += seconds
+        self._max_seconds = max(self._max_seconds, seconds)
+        self._last_seconds = seconds
+        if not self._animations:
+            self._stop_job()
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'ticks': self._ticks,
+            'updates': self._updates,
+            'mean_ms': round(self._total_seconds / self._ticks * 1000, 4) if self._ticks else 0.0,
+            'max_ms': round(self._max_seconds * 1000, 4),
+            'last_ms': round(self._last_seconds * 1000, 4),
+        }
+
+    def _start_job(self):
+        if self.job_id is not None or not self.install_job:
+            return
+        import maya.cmds as cmds
+        self._reset_stats()
+        self.job_id = cmds.scriptJob(timeChange=self.tick, protected=True)
+
+    def _stop_job(self):
+        stats = self.stats()
+        logging.info(f"动画调度结束: {stats['ticks']} 次刷新, 平均 {stats['mean_ms']}ms, 最长 {stats['max_ms']}ms")
+        if self.job_id is None:
+            return
+        import maya.cmds as cmds
+        job_id, self.job_id = self.job_id, None
+        if cmds.scriptJob(exists=job_id):
+            cmds.scriptJob(kill=job_id, force=True)
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """场景内共用的调度器"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AnimationScheduler()
+    return _scheduler
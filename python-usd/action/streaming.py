@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""流式导出：逐个提取网格，写入并释放后再提取下一个，内存占用与选择集大小无关"""
+import logging
+import threading
+import weakref
+
+from .mesh_source import extract_geometry
+
+
+def _peak_rss():
+    """进程的内存峰值（字节），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的单位是字节，Linux 是 KB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MeshStream(object):
+    """逐个产出 GeometryBuffer 的可迭代对象
+
+    同时未释放的网格数量不超过 max_inflight，消费方写完一个网格后调用 release() 并不再持有它。
+    block 为 False 时超过上限直接报错，用于单线程消费；多线程消费时设为 True 等待释放。
+    峰值按提取时实际仍在内存中的网格统计，消费方释放名额后仍持有引用也会计入。
+    """
+
+    def __init__(self, source, meshes, max_inflight=1, block=False):
+        self.source = source
+        self.meshes = list(meshes)
+        self.max_inflight = max(1, int(max_inflight))
+        self.block = block
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        # {网格: 字节数}，网格被回收后自动移除
+        self._live = weakref.WeakKeyDictionary()
+        self.extracted = 0
+        self.peak_inflight_count = 0
+        self.peak_inflight_bytes = 0
+
+    def __len__(self):
+        return len(self.meshes)
+
+    def __iter__(self):
+        for mesh in self.meshes:
+            if not self._slots.acquire(blocking=self.block):
+                raise RuntimeError(f"未释放的网格超过上限 {self.max_inflight}，请在写入后调用 release()")
+            with self._lock:
+                # 提取期间仍在内存中的网格
+                live_count, live_bytes = len(self._live), sum(self._live.values())
+            geo = extract_geometry(self.source, mesh)
+            with self._lock:
+                self._inflight[id(geo)] = geo.nbytes
+                self._live[geo] = geo.nbytes
+                self.extracted += 1
+                self.peak_inflight_count = max(self.peak_inflight_count, live_count + 1)
+                self.peak_inflight_bytes = max(self.peak_inflight_bytes, live_bytes + geo.nbytes)
+            yield geo
+            # 生成器恢复后立即丢掉引用，提取下一个网格时这一个已经可以回收
+            geo = None
+
+    def release(self, geo):
+        """标记网格已写入，释放一个名额"""
+        with self._lock:
+            self._inflight.pop(id(geo))
+        self._slots.release()
+
+    def stats(self):
+        return {
+            'meshes': self.extracted,
+            'max_inflight': self.max_inflight,
+            'peak_inflight_count': self.peak_inflight_count,
+            'peak_inflight_bytes': self.peak_inflight_bytes,
+            'peak_rss_bytes': _peak_rss(),
+        }
+
+
+def log_stream_stats(stats):
+    logging.info(f"流式导出 {stats['meshes']} 个网格, 同时在内存中最多 {stats['peak_inflight_count']} 个, "
+                 f"几何数据峰值 {stats['peak_inflight_bytes']} 字节, 进程内存峰值 {stats['peak_rss_bytes']} 字节")
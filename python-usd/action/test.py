@@ -9,73 +9,31 @@ logging.basicConfig(
     format='%(levelname)s: %(message)s'
 )
 
-import maya.cmds as cmds
 import os
-from pxr import Usd, UsdGeom, Gf, Sdf
 
+from .registry import lazy_import
 
-def extract_geometry_info(mesh):
+# 第一次用到时才导入，加载模块时不会引入 Maya 和 USD
+cmds = lazy_import('maya.cmds')
+Usd = lazy_import('pxr.Usd')
+UsdGeom = lazy_import('pxr.UsdGeom')
+mesh_source = lazy_import(f"{__package__}.mesh_source")
+writer = lazy_import(f"{__package__}.writer")
+layers = lazy_import(f"{__package__}.layers")
+
+
+def extract_geometry_info(mesh, source=None):
     """提取单个网格的几何信息"""
+    source = mesh_source.get_mesh_source(source)
     # 确保是多边形网格
-    if not cmds.objectType(mesh, isType='mesh'):
+    try:
+        source.resolve_meshes([mesh])
+    except ValueError:
         cmds.warning(f"{mesh}不是多边形网格")
         return None
 
-    # 提取顶点位置
-    points = cmds.xform(f"{mesh}.vtx[*]", query=True, translation=True, worldSpace=True)
-    points = [Gf.Vec3f(points[i], points[i + 1], points[i + 2]) for i in range(0, len(points), 3)]
-
-    # 提取面信息
-    face_count = cmds.polyEvaluate(mesh, face=True)
-    face_vertex_counts = []
-    face_vertex_indices = []
-
-    for face in range(face_count):
-        # 获取每个面的顶点索引
-        vtx_indices = cmds.polyInfo(f"{mesh}.f[{face}]", faceToVertex=True)[0]
-        vtx_indices = list(map(int, vtx_indices.split()[-1:][0].split(',')))
-        face_vertex_counts.append(len(vtx_indices))
-        face_vertex_indices.extend(vtx_indices)
-
-    # 提取法线
-    normals = []
-    # 获取顶点数量来确定法线数量
-    vertex_count = cmds.polyEvaluate(mesh, vertex=True)
-
-    try:
-        # 尝试获取第一个顶点的法线来判断是否存在法线数据
-        first_normal = cmds.polyNormalPerVertex(f"{mesh}.vtx[0]", query=True, xyz=True)
-        if first_normal:
-            # 逐顶点提取法线
-            for i in range(vertex_count):
-                normal = cmds.polyNormalPerVertex(f"{mesh}.vtx[{i}]", query=True, xyz=True)
-                if normal:  # 确保成功获取法线
-                    normals.append(Gf.Vec3f(normal[0], normal[1], normal[2]))
-    except:
-        # 如果获取法线失败，视为没有法线数据
-        cmds.warning(f"{mesh}没有可用的顶点法线数据")
-
-    # 提取UV
-    uvs = []
-    try:
-        # 检查是否存在UV集
-        uv_sets = cmds.polyUVSet(mesh, query=True, allUVSets=True)
-        if uv_sets and len(uv_sets) > 0:
-            uv_count = cmds.polyEvaluate(mesh, uv=True)
-            for i in range(uv_count):
-                uv = cmds.polyEditUV(f"{mesh}.map[{i}]", query=True, u=True, v=True)
-                uvs.append(Gf.Vec2f(uv[0], uv[1]))
-    except:
-        cmds.warning(f"{mesh}没有可用的UV数据")
-
-    return {
-        'points': points,
-        'face_vertex_counts': face_vertex_counts,
-        'face_vertex_indices': face_vertex_indices,
-        'normals': normals,
-        'uvs': uvs,
-        'name': mesh
-    }
+    # 批量提取顶点、面拓扑、法线和UV
+    return mesh_source.extract_geometry(source, mesh)
 
 
 def write_geometry_to_usd(geo_info, file_path):
@@ -87,43 +45,7 @@ def write_geometry_to_usd(geo_info, file_path):
     root_xform = UsdGeom.Xform.Define(stage, "/Root")
 
     # 创建网格
-    mesh = UsdGeom.Mesh.Define(stage, f"/Root/{geo_info['name']}")
-
-    # 设置点
-    mesh.CreatePointsAttr(geo_info['points'])
-
-    # 设置面拓扑
-    mesh.CreateFaceVertexCountsAttr(geo_info['face_vertex_counts'])
-    mesh.CreateFaceVertexIndicesAttr(geo_info['face_vertex_indices'])
-
-    # 设置法线 - 修复部分
-    if geo_info['normals']:
-        # 创建法线属性
-        normals_attr = mesh.CreateNormalsAttr(geo_info['normals'])
-
-        # 替代方法设置法线插值：使用SetNormalsInterpolation
-        # 检查是否有此方法，有则使用
-        if hasattr(mesh, 'SetNormalsInterpolation'):
-            mesh.SetNormalsInterpolation(UsdGeom.Tokens.vertex)
-        else:
-            # 更通用的方法：直接设置属性
-            interpolation_attr = mesh.GetNormalsInterpolationAttr()
-            if not interpolation_attr.IsDefined():
-                interpolation_attr = mesh.CreateNormalsInterpolationAttr()
-            interpolation_attr.Set(UsdGeom.Tokens.vertex)
-
-    # 设置UV
-    if geo_info['uvs']:
-        # 创建UV集
-        uv_set = UsdGeom.PrimvarsAPI(mesh).CreatePrimvar(
-            "st",
-            Sdf.ValueTypeNames.Float2Array,
-            UsdGeom.Tokens.varying
-        )
-        uv_set.Set(geo_info['uvs'])
-
-        # 创建UV绑定
-        mesh.CreatePrimvar("uvSet", Sdf.ValueTypeNames.Token).Set("st")
+    writer.author_mesh(stage, f"/Root/{geo_info.name}", geo_info)
 
     # 保存USD文件
     stage.Save()
@@ -131,8 +53,14 @@ def write_geometry_to_usd(geo_info, file_path):
     return True
 
 
-def export_geo_details_to_usd(file_path=None):
-    """主函数：导出选中模型的详细几何信息到USD"""
+def export_geo_details_to_usd(file_path=None, mode='single', max_workers=None, progress=None):
+    """主函数：导出选中模型的详细几何信息到USD
+
+    mode 为 'single' 时所有网格写入同一个 stage；为 'layers' 时每个网格一个 layer，
+    由进程池并行写出，再由根 layer 引用。单个网格失败不影响其它网格。
+    progress 默认为 layers.log_progress。
+    """
+    progress = progress or layers.log_progress
     # 检查选择
     selected = cmds.ls(selection=True, long=True)
     if not selected:
@@ -151,34 +79,40 @@ def export_geo_details_to_usd(file_path=None):
     if not os.path.exists(dir_name):
         os.makedirs(dir_name)
 
-    try:
-        # 处理每个选中的物体
-        for obj in selected:
-            # 获取形状节点（如果是变换节点）
-            if cmds.objectType(obj, isType='transform'):
-                shapes = cmds.listRelatives(obj, shapes=True, type='mesh')
-                if shapes:
-                    for shape in shapes:
-                        geo_info = extract_geometry_info(shape)
-                        if geo_info:
-                            write_geometry_to_usd(geo_info, file_path)
-            else:
-                geo_info = extract_geometry_info(obj)
-                if geo_info:
-                    write_geometry_to_usd(geo_info, file_path)
-
-        return True
+    # 处理每个选中的物体，获取形状节点（如果是变换节点）
+    shapes = []
+    for obj in selected:
+        if cmds.objectType(obj, isType='transform'):
+            shapes.extend(cmds.listRelatives(obj, shapes=True, type='mesh') or [])
+        else:
+            shapes.append(obj)
+
+    geos, failed = [], {}
+    for shape in shapes:
+        try:
+            geo_info = extract_geometry_info(shape)
+        except Exception as e:
+            failed[shape] = str(e)
+            continue
+        if geo_info:
+            geos.append(geo_info)
 
+    try:
+        if mode == 'layers':
+            result = layers.export_mesh_layers(geos, file_path, max_workers, progress)
+        else:
+            result = layers.write_meshes_to_usd(geos, file_path, progress)
     except Exception as e:
         cmds.warning(f"导出失败: {str(e)}")
         return False
 
+    failed.update(result['failed'])
+    for shape, error in failed.items():
+        cmds.warning(f"{shape}导出失败: {error}")
+    return not failed
+
 
 class Test(Action):
     def execute(self, blackboard: Blackboard) -> Status:
         export_geo_details_to_usd()
         return Status.SUCCESS
-
-
-
-
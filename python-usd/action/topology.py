@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""面拓扑解析：一次性把整个网格的 polyInfo 输出解析为数组"""
+import numpy as np
+
+# 替换掉 'FACE' 关键字后作为每个面的起始标记，顶点和面编号都不会是负数
+_FACE_MARKER = -1
+
+
+def parse_face_to_vertex(lines):
+    """解析 cmds.polyInfo(f"{mesh}.f[*]", faceToVertex=True) 的全部输出
+
+    每行格式为 'FACE 0: 0 1 3 2'，返回 (face_vertex_counts, face_vertex_indices)
+    两个 int32 数组，整个过程没有逐面的 Python 循环。
+    """
+    if not lines:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    text = ''.join(lines).replace('FACE', f' {_FACE_MARKER} ').replace(':', ' ')
+    # 文本模式的 fromstring 在 C 层完成分词和整数转换
+    tokens = np.fromstring(text, dtype=np.int64, sep=' ')
+
+    markers = np.flatnonzero(tokens == _FACE_MARKER)
+    face_ids = tokens[markers + 1]
+    if not np.array_equal(face_ids, np.arange(len(markers))):
+        raise ValueError("polyInfo 返回的面编号不连续")
+
+    # 相邻两个标记之间的距离减去标记本身和面编号就是该面的顶点数
+    face_vertex_counts = np.diff(np.append(markers, len(tokens))) - 2
+    keep = np.ones(len(tokens), dtype=bool)
+    keep[markers] = False
+    keep[markers + 1] = False
+    return face_vertex_counts.astype(np.int32), tokens[keep].astype(np.int32)
+
+
+def validate_topology(face_vertex_counts, face_vertex_indices, vertex_count):
+    """检查面拓扑是否自洽、索引是否越界，不合法时抛出 ValueError"""
+    if len(face_vertex_counts) and face_vertex_counts.min() < 3:
+        raise ValueError("存在顶点数少于3的面")
+    if int(face_vertex_counts.sum()) != len(face_vertex_indices):
+        raise ValueError(f"面顶点数之和 {int(face_vertex_counts.sum())} 与索引数量 {len(face_vertex_indices)} 不一致")
+    if len(face_vertex_indices) and (face_vertex_indices.min() < 0 or face_vertex_indices.max() >= vertex_count):
+        raise ValueError(f"面顶点索引超出范围 [0, {vertex_count})")
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""节点级追踪：记录每次 execute 的墙钟时间、CPU 时间、内存变化、返回状态和 Maya/USD 调用次数
+
+结果可以导出为 Chrome / Perfetto 能打开的 trace 文件，也可以按动作汇总。
+没有启用 Tracer 时不安装任何包装，没有额外开销。
+
+pxr 的函数是 Boost.Python 对象，sys.setprofile 看不到它们的调用，
+所以 Maya/USD 调用次数通过在启用期间临时包装这些模块的函数和方法来统计。
+"""
+import collections
+import functools
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from behavior_tree.core import Action
+
+from .registry import lazy_modules
+
+# 统计调用次数的库：{库名: 模块列表}，启用时会导入能导入的模块
+DEFAULT_LIBRARIES = {
+    'usd': ('pxr.Usd', 'pxr.UsdGeom', 'pxr.Sdf', 'pxr.Vt', 'pxr.UsdUtils'),
+    'maya': ('maya.cmds', 'maya.api.OpenMaya', 'maya.api.OpenMayaAnim'),
+}
+
+_local = threading.local()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _action_classes():
+    """已加载的全部 Action 子类"""
+    pending, seen = [Action], []
+    while pending:
+        for cls in pending.pop().__subclasses__():
+            if cls not in seen:
+                seen.append(cls)
+                pending.append(cls)
+    return seen
+
+
+def _counting(fn, library):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, 'stack', None)
+        if stack:
+            stack[-1][library] += 1
+        return fn(*args, **kwargs)
+    wrapper._counted = fn
+    return wrapper
+
+
+class Tracer(object):
+    """with Tracer() as tracer: ... 期间执行的所有动作都会被记录
+
+    memory 为 True 时用 tracemalloc 统计内存变化（有明显开销）；
+    count_calls 为 True 时统计 libraries 中各库的调用次数。
+    """
+
+    def __init__(self, memory=False, count_calls=True, libraries=None):
+        self.memory = memory
+        self.count_calls = count_calls
+        self.libraries = DEFAULT_LIBRARIES if libraries is None else libraries
+        self.events = []
+        self._patched = []
+        self._classes = set()
+        # {id(原函数): 包装}，同一函数被多个模块导出时共用一个包装
+        self._wrappers = {}
+        self._origin = None
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._origin = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        for cls in _action_classes():
+            if 'execute' in cls.__dict__:
+                self._patch(cls, 'execute', self._traced(cls.__dict__['execute']))
+        if self.count_calls:
+            for library, module_names in self.libraries.items():
+                for module_name in module_names:
+                    self._patch_module(module_name, library)
+
+    def stop(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+        self._classes = set()
+        self._wrappers = {}
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _patch(self, owner, name, replacement):
+        original = owner.__dict__[name]
+        setattr(owner, name, replacement)
+        self._patched.append((owner, name, original))
+
+    def _counting(self, fn, library):
+        """同一个原函数只包装一次，已经是包装的返回 None"""
+        if hasattr(fn, '_counted'):
+            return None
+        wrapper = self._wrappers.get(id(fn))
+        if wrapper is None:
+            wrapper = self._wrappers[id(fn)] = _counting(fn, library)
+        return wrapper
+
+    def _patch_module(self, module_name, library):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            return
+        # LazyModule 导入后复制了模块属性，同样需要替换
+        proxies = lazy_modules(module_name)
+        for name, value in list(vars(module).items()):
+            if name.startswith('_'):
+                continue
+            if isinstance(value, type):
+                self._patch_class(value, library)
+            elif callable(value):
+                wrapper = self._counting(value, library)
+                if wrapper is None:
+                    continue
+                self._patch(module, name, wrapper)
+                for proxy in proxies:
+                    if proxy.__dict__.get(name) is value:
+                        self._patch(proxy, name, wrapper)
+
+    def _patch_class(self, cls, library):
+        if cls in self._classes:
+            return
+        self._classes.add(cls)
+        for name, value in list(cls.__dict__.items()):
+            if name.startswith('_'):
+                continue
+            if isinstance(value, (staticmethod, classmethod)):
+                wrapper = self._counting(value.__func__, library)
+                replacement = type(value)(wrapper) if wrapper is not None else None
+            elif callable(value) and not isinstance(value, type):
+                replacement = self._counting(value, library)
+            else:
+                continue
+            if replacement is None:
+                continue
+            try:
+                self._patch(cls, name, replacement)
+            except (AttributeError, TypeError):
+                # 部分扩展类型不允许修改
+                pass
+
+    def _traced(self, execute):
+        tracer = self
+
+        @functools.wraps(execute)
+        def traced(node, blackboard):
+            calls = collections.Counter()
+            stack = _stack()
+            stack.append(calls)
+            memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+            cpu = time.thread_time()
+            start = time.perf_counter()
+            status = None
+            try:
+                status = execute(node, blackboard)
+                return status
+            finally:
+                wall = time.perf_counter() - start
+                cpu = time.thread_time() - cpu
+                stack.pop()
+                tracer._record({
+                    'name': type(node).__name__,
+                    'node': getattr(node, 'name', None),
+                    'start': start - tracer._origin,
+                    'wall': wall,
+                    'cpu': cpu,
+                    'memory': tracemalloc.get_traced_memory()[0] - memory if memory is not None else None,
+                    'status': getattr(status, 'name', str(status)),
+                    'calls': dict(calls),
+                    'thread': threading.get_ident(),
+                })
+        return traced
+
+    def _record(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def chrome_trace(self):
+        """Chrome / Perfetto 的 trace 格式，每次 execute 是一个完整事件（ph='X'）"""
+        pid = os.getpid()
+        threads = {}
+        trace_events = []
+        for event in self.events:
+            tid = threads.setdefault(event['thread'], len(threads) + 1)
+            args = {'node': event['node'], 'status': event['status'], 'cpu_ms': round(event['cpu'] * 1000, 3)}
+            if event['memory'] is not None:
+                args['memory_delta'] = event['memory']
+            args.update({f"{library}_calls": count for library, count in event['calls'].items()})
+            trace_events.append({
+                'name': event['name'], 'cat': 'action', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round(event['start'] * 1e6, 3), 'dur': round(event['wall'] * 1e6, 3), 'args': args,
+            })
+        for thread, tid in threads.items():
+            name = 'main' if thread == threading.main_thread().ident else f"thread-{tid}"
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        logging.info(f"trace 已保存: {path}")
+        return path
+
+    def summary(self):
+        """按动作类汇总：调用次数、总/平均/最长墙钟时间、CPU 时间、内存变化、状态和库调用次数"""
+        summary = {}
+        for event in self.events:
+            item = summary.setdefault(event['name'], {
+                'count': 0, 'wall': 0.0, 'wall_max': 0.0, 'cpu': 0.0, 'memory': 0,
+                'statuses': collections.Counter(), 'calls': collections.Counter(),
+            })
+            item['count'] += 1
+            item['wall'] += event['wall']
+            item['wall_max'] = max(item['wall_max'], event['wall'])
+            item['cpu'] += event['cpu']
+            item['memory'] += event['memory'] or 0
+            item['statuses'][event['status']] += 1
+            item['calls'].update(event['calls'])
+        for item in summary.values():
+            item['wall_mean'] = item['wall'] / item['count']
+            item['statuses'] = dict(item['statuses'])
+            item['calls'] = dict(item['calls'])
+        return dict(sorted(summary.items(), key=lambda pair: -pair[1]['wall']))
+
+    def log_summary(self):
+        for name, item in self.summary().items():
+            calls = ', '.join(f"{library} {count}" for library, count in item['calls'].items()) or '无'
+            logging.info(f"{name}: {item['count']} 次, 总计 {item['wall']:.4f}s, 最长 {item['wall_max']:.4f}s, "
+                         f"CPU {item['cpu']:.4f}s, 状态 {item['statuses']}, 调用 {calls}")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Jcen
+"""把 GeometryBuffer 写入 USD，数组直接转换为 Vt 数组，不逐元素构造 Python 对象
+
+author_mesh 走 UsdGeom 高层接口；author_meshes_sdf 直接在 layer 上创建 spec，
+所有网格在同一个 Sdf.ChangeBlock 中写入，只触发一次变更通知，两者输出完全相同。
+"""
+from pxr import Sdf, UsdGeom, Vt
+
+from .primvars import dedup_values, dedup_report
+
+
+def _indexed_primvar(values, vt_type):
+    """去重得到 (唯一值, 索引, 统计)"""
+    unique_values, indices = dedup_values(values)
+    return (vt_type.FromNumpy(unique_values), Vt.IntArray.FromNumpy(indices),
+            dedup_report(values, unique_values, indices))
+
+
+def _indexed_primvars(geo):
+    """网格的索引 primvar：[(名称, 类型, 唯一值, 索引)] 以及每个 primvar 的去重统计"""
+    primvars, report = [], {}
+    # 法线和UV都写成 faceVarying，硬边和UV接缝处同一顶点的多个值都会保留
+    if len(geo.normals):
+        values, indices, report['normals'] = _indexed_primvar(geo.normals, Vt.Vec3fArray)
+        primvars.append(('normals', Sdf.ValueTypeNames.Normal3fArray, values, indices))
+    if len(geo.uvs):
+        values, indices, report['st'] = _indexed_primvar(geo.uvs, Vt.Vec2fArray)
+        primvars.append(('st', Sdf.ValueTypeNames.TexCoord2fArray, values, indices))
+    return primvars, report
+
+
+def author_mesh(stage, path, geo, cache=None):
+    """在 stage 的 path 处定义网格并写入 geo 的全部数据
+
+    法线和UV写成 faceVarying 的索引 primvar，返回每个 primvar 的去重统计。
+    传入 GeometryCache 时内容相同的网格直接从缓存复制。
+    """
+    if cache is not None:
+        return cache.author(stage.GetEditTarget().GetLayer(), path, geo, lambda: author_mesh(stage, path, geo))
+    mesh = UsdGeom.Mesh.Define(stage, path)
+
+    # 设置点
+    mesh.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(geo.points))
+
+    # 设置面拓扑
+    mesh.CreateFaceVertexCountsAttr(Vt.IntArray.FromNumpy(geo.face_vertex_counts))
+    mesh.CreateFaceVertexIndicesAttr(Vt.IntArray.FromNumpy(geo.face_vertex_indices))
+
+    # 设置法线和UV
+    primvars, report = _indexed_primvars(geo)
+    for name, type_name, values, indices in primvars:
+        primvar = UsdGeom.PrimvarsAPI(mesh).CreatePrimvar(name, type_name, UsdGeom.Tokens.faceVarying)
+        primvar.Set(values)
+        primvar.SetIndices(indices)
+
+    if len(geo.uvs):
+        # 创建UV绑定
+        UsdGeom.PrimvarsAPI(mesh).CreatePrimvar("uvSet", Sdf.ValueTypeNames.Token).Set("st")
+    return report
+
+
+def _attribute_spec(prim_spec, name, type_name, value, interpolation=None):
+    attr = Sdf.AttributeSpec(prim_spec, name, type_name, Sdf.VariabilityVarying, declaresCustom=False)
+    attr.default = value
+    if interpolation:
+        attr.SetInfo('interpolation', interpolation)
+    return attr
+
+
+def author_mesh_spec(layer, path, geo, cache=None):
+    """直接在 layer 上创建网格 spec，调用方负责放在 Sdf.ChangeBlock 中"""
+    if cache is not None:
+        return cache.author(layer, path, geo, lambda: author_mesh_spec(layer, path, geo))
+    prim_spec = Sdf.CreatePrimInLayer(layer, path)
+    prim_spec.specifier = Sdf.SpecifierDef
+    prim_spec.typeName = 'Mesh'
+
+    _attribute_spec(prim_spec, UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray,
+                    Vt.Vec3fArray.FromNumpy(geo.points))
+    _attribute_spec(prim_spec, UsdGeom.Tokens.faceVertexCounts, Sdf.ValueTypeNames.IntArray,
+                    Vt.IntArray.FromNumpy(geo.face_vertex_counts))
+    _attribute_spec(prim_spec, UsdGeom.Tokens.faceVertexIndices, Sdf.ValueTypeNames.IntArray,
+                    Vt.IntArray.FromNumpy(geo.face_vertex_indices))
+
+    primvars, report = _indexed_primvars(geo)
+    for name, type_name, values, indices in primvars:
+        _attribute_spec(prim_spec, f"primvars:{name}", type_name, values, UsdGeom.Tokens.faceVarying)
+        _attribute_spec(prim_spec, f"primvars:{name}:indices", Sdf.ValueTypeNames.IntArray, indices)
+
+    if len(geo.uvs):
+        _attribute_spec(prim_spec, "primvars:uvSet", Sdf.ValueTypeNames.Token, "st")
+    return report
+
+
+def author_meshes_sdf(layer, root_path, geos, on_authored=None, cache=None):
+    """在一个 Sdf.ChangeBlock 中把全部网格写到 root_path 下，返回 {网格名: 去重统计}
+
+    on_authored(geo) 在每个网格写完后调用，流式导出用它释放网格。
+    """
+    reports = {}
+    with Sdf.ChangeBlock():
+        for geo in geos:
+            reports[geo.name] = author_mesh_spec(layer, f"{root_path}/{geo.name}", geo, cache)
+            if on_authored:
+                on_authored(geo)
+            # 不再持有引用，流式导出时提取下一个网格前这个网格就可以被回收
+            del geo
+    return reports
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+import sys
+
+# 测试直接导入 action 包
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
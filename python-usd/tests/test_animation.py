@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Sdf, Usd
+
+from action import animation
+from action.animation import SampleTrack, export_animation
+from action.mesh_source import FakeMeshSource
+
+
+def _track(values, start=1):
+    track = SampleTrack()
+    for frame, value in enumerate(values, start):
+        track.add(frame, np.array([value], dtype=np.float32))
+    return track
+
+
+def test_repeated_frames_are_skipped_but_hold_is_kept():
+    track = _track([0, 0, 0, 1, 1])
+    # 第3帧是相同帧段的最后一帧，值变化时补上，线性插值不会在 1~4 帧之间漂移
+    assert track.frames == [1, 3, 4]
+    assert not track.constant
+    assert [float(track.value_at(frame)[0]) for frame in range(1, 6)] == [0, 0, 0, 1, 1]
+
+
+def test_constant_track():
+    track = _track([2, 2, 2])
+    assert track.constant
+    assert track.frames == [1]
+
+
+def test_samples_are_clamped_to_clip_range():
+    track = _track([0, 1, 2, 2, 2, 5])
+    samples = [(frame, float(value[0])) for frame, value in track.samples(2, 5)]
+    assert samples == [(2, 1.0), (3, 2.0), (5, 2.0)]
+
+
+def test_discard_keeps_the_sample_in_effect():
+    track = _track([0, 1, 1, 1, 2, 3])
+    track.discard_before(4)
+    assert track.frames == [4, 5, 6] and track.count == 5
+    assert float(track.value_at(4)[0]) == 1
+
+
+class CountingSource(FakeMeshSource):
+    """记录每帧读取点的次数"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = {}
+
+    def read_points(self, mesh):
+        self.reads[self.time] = self.reads.get(self.time, 0) + 1
+        return super().read_points(mesh)
+
+
+def _source():
+    source = CountingSource()
+    source.add_grid('wave', 2, 2)
+    source.add_grid('still', 1, 1)
+    # 第 30 帧之前静止，之后上下移动
+    source.deformers['wave'] = lambda frame, points: points + (0.0, max(0.0, frame - 30) % 7, 0.0)
+    return source
+
+
+def _expected(frame):
+    source = _source()
+    source.set_time(frame)
+    return FakeMeshSource.read_points(source, 'wave')
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    """记录导出过程中单个属性在内存中保存的最大采样数"""
+    peak = [0]
+    add = SampleTrack.add
+
+    def counting_add(self, frame, value):
+        add(self, frame, value)
+        peak[0] = max(peak[0], len(self.frames))
+
+    monkeypatch.setattr(SampleTrack, 'add', counting_add)
+    return peak
+
+
+@pytest.mark.parametrize('clip_frames', [None, 12])
+def test_export_matches_every_frame_with_bounded_memory(tmp_path, monkeypatch, tracked, clip_frames):
+    monkeypatch.setattr(animation, 'FLUSH_FRAMES', 10)
+    source = _source()
+    usd_path = str(tmp_path / 'shot.usda')
+    stage = Usd.Stage.CreateNew(usd_path)
+    stage.DefinePrim('/Root', 'Xform')
+    frames = list(range(1, 101))
+    stats = export_animation(source, ['wave', 'still'], stage.GetRootLayer(), '/Root', frames,
+                             clip_frames, str(tmp_path / 'shot_clips'), str(tmp_path))
+    stage.GetRootLayer().Save()
+
+    # 每帧只读取一次，第一帧不重复读取
+    assert source.reads == {float(frame): 2 for frame in frames}
+    assert tracked[0] <= (clip_frames or 10) + 2
+    assert (stats['animated_attributes'], stats['constant_attributes']) == (1, 3)
+    assert stats['clips'] == (9 if clip_frames else 0)
+
+    stage = Usd.Stage.Open(usd_path)
+    points = stage.GetPrimAtPath('/Root/wave').GetAttribute('points')
+    for frame in frames:
+        np.testing.assert_allclose(np.asarray(points.Get(frame)), _expected(frame))
+    still = stage.GetPrimAtPath('/Root/still').GetAttribute('points')
+    assert not still.GetNumTimeSamples() and still.Get() is not None
+
+
+def test_clips_are_written_as_each_clip_completes(tmp_path):
+    source = _source()
+    clip_dir = tmp_path / 'clips'
+    written = []
+
+    def set_time(frame):
+        written.append((frame, sorted(path.name for path in clip_dir.glob('clip.*'))))
+        FakeMeshSource.set_time(source, frame)
+
+    source.set_time = set_time
+    layer = Sdf.Layer.CreateAnonymous()
+    Sdf.CreatePrimInLayer(layer, '/Root')
+    export_animation(source, ['wave'], layer, '/Root', range(1, 61), 10, str(clip_dir), str(tmp_path))
+    # 读取第 42 帧之前，第 41 帧结束的前 4 个 clip 已经写出
+    assert dict(written)[42.0] == [f"clip.{index:04d}.usdc" for index in range(4)]
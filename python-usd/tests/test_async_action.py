@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('behavior_tree')
+
+from behavior_tree.core import Status
+
+from action.async_action import AsyncAction
+
+
+def _tick_until_done(action, blackboard=None, limit=5.0):
+    deadline = time.monotonic() + limit
+    status = action.execute(blackboard or {})
+    while status == Status.RUNNING:
+        assert time.monotonic() < deadline, "动作没有结束"
+        time.sleep(0.005)
+        status = action.execute(blackboard or {})
+    return status
+
+
+class Waiting(AsyncAction):
+    """每次运行记录是否被取消，同时统计并发运行数"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = threading.Semaphore(0)
+        self.outcomes = []
+        self.active = 0
+        self.max_active = 0
+        self._counter = threading.Lock()
+
+    def run(self, blackboard):
+        with self._counter:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.started.release()
+        try:
+            # 与常见写法一样轮询 cancelled
+            deadline = time.monotonic() + blackboard.get('seconds', 0.5)
+            while not self.cancelled and time.monotonic() < deadline:
+                time.sleep(0.01)
+            cancelled = self.cancelled
+            self.outcomes.append(cancelled)
+            return not cancelled
+        finally:
+            with self._counter:
+                self.active -= 1
+
+
+def test_running_until_done_then_result():
+    action = Waiting(name='wait')
+    assert action.execute({'seconds': 0.05}) == Status.RUNNING
+    assert action.running
+    assert _tick_until_done(action) == Status.SUCCESS
+    assert action.outcomes == [False]
+    assert not action.running
+
+
+def test_cancel_reaches_old_run_and_retick_does_not_overlap():
+    action = Waiting(name='wait')
+    blackboard = {'seconds': 0.5}
+    assert action.execute(blackboard) == Status.RUNNING
+    assert action.started.acquire(timeout=2)
+    start = time.monotonic()
+    assert action.cancel()
+    assert _tick_until_done(action, blackboard) == Status.SUCCESS
+    # 旧的运行立即看到取消，新的运行等满时间后成功
+    assert action.outcomes == [True, False]
+    assert action.max_active == 1
+    assert time.monotonic() - start < 1.5
+
+
+def test_timeout_fails_and_cancels():
+    action = Waiting(name='wait', timeout=0.05)
+    assert _tick_until_done(action, {'seconds': 2.0}) == Status.FAILURE
+    assert action.started.acquire(timeout=2)
+    deadline = time.monotonic() + 2
+    while not action.outcomes and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert action.outcomes == [True]
+
+
+class Sleeping(AsyncAction):
+    async def run(self, blackboard):
+        await asyncio.sleep(0.01)
+        return Status.FAILURE if self.cancelled else blackboard['status']
+
+
+def test_async_run_result_is_returned():
+    assert _tick_until_done(Sleeping(name='sleep'), {'status': Status.SUCCESS}) == Status.SUCCESS
+    assert _tick_until_done(Sleeping(name='sleep'), {'status': Status.FAILURE}) == Status.FAILURE
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Sdf
+
+from action.cache import GeometryCache
+from action.mesh_source import FakeMeshSource
+from action.writer import author_mesh_spec
+
+
+def _author(cache, layer, geo):
+    path = f"/Root/{geo.name}"
+    return cache.author(layer, path, geo, lambda: author_mesh_spec(layer, path, geo))
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    source = FakeMeshSource()
+    a, b, c = (source.meshes[source.add_grid(name, 2, 2, size)] for name, size in (('a', 1.0), ('b', 2.0), ('c', 3.0)))
+    cache = GeometryCache(str(tmp_path), max_entries=2)
+    layer = Sdf.Layer.CreateAnonymous()
+    for geo in (a, b, a, c):
+        _author(cache, layer, geo)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 3, 1, 2)
+    # b 最久没有使用
+    _author(cache, Sdf.Layer.CreateAnonymous(), b)
+    assert cache.stats()['misses'] == 4
+    assert len([name for name in os.listdir(str(tmp_path)) if name.endswith('.usdc')]) == 2
+
+
+def test_entries_survive_reopen(tmp_path):
+    source = FakeMeshSource()
+    geo = source.meshes[source.add_grid('grid', 2, 2)]
+    cache = GeometryCache(str(tmp_path))
+    report = _author(cache, Sdf.Layer.CreateAnonymous(), geo)
+    reopened = GeometryCache(str(tmp_path))
+    assert reopened.stats()['entries'] == 1
+    layer = Sdf.Layer.CreateAnonymous()
+    # 命中时返回写入时的去重统计
+    assert _author(reopened, layer, geo) == report and report['normals']['unique'] == 1
+    assert reopened.stats()['hits'] == 1
+    assert layer.GetPrimAtPath('/Root/grid').typeName == 'Mesh'
+
+
+def test_processes_sharing_a_directory_keep_each_others_entries(tmp_path):
+    source = FakeMeshSource()
+    a, b, c = (source.meshes[source.add_grid(name, 2, 2, size)] for name, size in (('a', 1.0), ('b', 2.0), ('c', 3.0)))
+    # 两个实例代表同时打开缓存目录的两个农场进程
+    first, second = GeometryCache(str(tmp_path)), GeometryCache(str(tmp_path))
+    _author(first, Sdf.Layer.CreateAnonymous(), a)
+    _author(second, Sdf.Layer.CreateAnonymous(), b)
+    # 另一个进程写入的条目可以直接命中
+    _author(first, Sdf.Layer.CreateAnonymous(), b)
+    assert first.stats()['hits'] == 1
+    assert GeometryCache(str(tmp_path)).stats()['entries'] == 2
+
+    # 淘汰时也计入其它进程写入的条目
+    limited = GeometryCache(str(tmp_path), max_entries=2)
+    _author(limited, Sdf.Layer.CreateAnonymous(), c)
+    assert limited.stats()['entries'] == 2 and limited.evictions == 1
+    assert GeometryCache(str(tmp_path)).stats()['entries'] == 2
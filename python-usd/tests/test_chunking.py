@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+import pytest
+
+pytest.importorskip('pxr')
+
+from action.chunking import extract_chunk, split_faces
+from action.mesh_source import FakeMeshSource
+
+
+def _grid(rows=8, cols=8):
+    source = FakeMeshSource()
+    return source.meshes[source.add_grid('grid', rows, cols)]
+
+
+def test_split_faces_partitions_all_faces():
+    geo = _grid()
+    groups = split_faces(geo, 16)
+    assert len(groups) == 4
+    assert all(len(faces) <= 16 for faces in groups)
+    assert all(np.array_equal(faces, np.sort(faces)) for faces in groups)
+    np.testing.assert_array_equal(np.sort(np.concatenate(groups)), np.arange(geo.face_count))
+
+
+def test_split_faces_small_mesh_is_one_group():
+    geo = _grid(2, 2)
+    groups = split_faces(geo, 16)
+    assert len(groups) == 1
+    np.testing.assert_array_equal(groups[0], np.arange(4))
+
+
+def test_extract_chunk_reindexes_points():
+    geo = _grid()
+    faces = split_faces(geo, 16)[0]
+    chunk = extract_chunk(geo, faces, 'chunk')
+    assert chunk.face_count == len(faces)
+    assert chunk.face_vertex_indices.max() == chunk.point_count - 1
+    # 面顶点对应的点与原网格一致
+    offsets = np.concatenate(([0], np.cumsum(geo.face_vertex_counts)))
+    positions = np.concatenate([np.arange(offsets[face], offsets[face + 1]) for face in faces])
+    np.testing.assert_array_equal(chunk.points[chunk.face_vertex_indices],
+                                  geo.points[geo.face_vertex_indices[positions]])
+    np.testing.assert_array_equal(chunk.uvs, geo.uvs[positions])
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import json
+import os
+import pickle
+
+import pytest
+
+from action import compiler
+from action.compiler import CompiledTree, compile_tree, load_compiled
+from action.registry import registry_signature
+
+
+def _tree(tmp_path, json_file='', children=None):
+    tree = {
+        'name': 'Blackboard', 'type': 'Blackboard', 'x': 1.0, 'y': 2.0, 'json_file': json_file,
+        'custom_properties': {'usd_path': 'a.usda'},
+        'children': children if children is not None else [
+            {'name': 'check', 'type': 'Action', 'class': 'ModelCheck', 'x': 0, 'y': 0, 'children': []},
+        ],
+    }
+    path = tmp_path / 'tree.json'
+    path.write_text(json.dumps(tree), encoding='utf-8')
+    return str(path)
+
+
+class Resolver(object):
+    """记录被查找的类名"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, class_name):
+        self.calls.append(class_name)
+        return 'action.sample_action'
+
+
+def test_compile_strips_editor_fields_and_merges_blackboard(tmp_path):
+    (tmp_path / 'data.json').write_text(json.dumps({'project': 'demo'}), encoding='utf-8')
+    compiled = compile_tree(_tree(tmp_path, json_file='data.json'))
+    assert compiled.classes == {'ModelCheck': 'action.sample_action'}
+    assert 'x' not in compiled.tree and 'y' not in compiled.tree['children'][0]
+    assert compiled.blackboard == {'usd_path': 'a.usda', 'project': 'demo'}
+
+
+def test_json_file_is_relative_to_the_tree(tmp_path, monkeypatch):
+    (tmp_path / 'data.json').write_text(json.dumps({'project': 'demo'}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path.parent)
+    assert compile_tree(_tree(tmp_path, json_file='data.json')).blackboard['project'] == 'demo'
+
+
+def test_errors_are_reported_together(tmp_path):
+    path = _tree(tmp_path, children=[{'name': 'a', 'type': 'Action'}, {'name': 'b', 'type': 'Action', 'class': 'Nope'},
+                                     {'name': 'c'}])
+    with pytest.raises(ValueError) as info:
+        compile_tree(path)
+    message = str(info.value)
+    assert 'class' in message and 'Nope' in message and 'type' in message
+
+
+def test_cache_hit_and_dependency_invalidation(tmp_path):
+    data = tmp_path / 'data.json'
+    data.write_text(json.dumps({'project': 'a'}), encoding='utf-8')
+    path = _tree(tmp_path, json_file='data.json')
+    resolver = Resolver()
+    assert load_compiled(path, resolver=resolver).blackboard['project'] == 'a'
+    assert load_compiled(path, resolver=resolver).blackboard['project'] == 'a'
+    assert resolver.calls == ['ModelCheck']
+
+    data.write_text(json.dumps({'project': 'b'}), encoding='utf-8')
+    assert load_compiled(path, resolver=resolver).blackboard['project'] == 'b'
+    assert resolver.calls == ['ModelCheck'] * 2
+
+
+class _Broken(object):
+    """反序列化时调用 CompiledTree() 缺少参数"""
+
+    def __reduce__(self):
+        return CompiledTree, ()
+
+
+@pytest.mark.parametrize('payload', [
+    b'not a pickle',
+    # 引用的模块已经不存在
+    b'cmissing_module_for_test\nThing\n.',
+    # 引用的类已经改名
+    b'caction.compiler\nRenamedTree\n.',
+    pickle.dumps(_Broken()),
+    pickle.dumps({'tree': {}}),
+], ids=['garbage', 'missing-module', 'renamed-class', 'bad-arguments', 'wrong-type'])
+def test_unreadable_cache_is_recompiled(tmp_path, payload):
+    path = _tree(tmp_path)
+    resolver = Resolver()
+    load_compiled(path, resolver=resolver)
+    cache_files = os.listdir(tmp_path / '.bt_cache')
+    assert len(cache_files) == 1
+    (tmp_path / '.bt_cache' / cache_files[0]).write_bytes(payload)
+
+    compiled = load_compiled(path, resolver=resolver)
+    assert isinstance(compiled, CompiledTree) and compiled.classes == {'ModelCheck': 'action.sample_action'}
+    assert resolver.calls == ['ModelCheck'] * 2
+
+
+def test_registry_change_invalidates_cache(tmp_path, monkeypatch):
+    path = _tree(tmp_path)
+    calls = []
+    monkeypatch.setattr(compiler, 'find_action', lambda name: calls.append(name) or 'action.sample_action')
+    monkeypatch.setattr(compiler, 'registry_signature', lambda: 'before')
+    load_compiled(path)
+    load_compiled(path)
+    monkeypatch.setattr(compiler, 'registry_signature', lambda: 'after')
+    load_compiled(path)
+    assert calls == ['ModelCheck'] * 2
+
+
+def test_registry_signature_tracks_module_files(tmp_path):
+    (tmp_path / 'one.py').write_text('class A: pass\n', encoding='utf-8')
+    before = registry_signature(str(tmp_path))
+    assert registry_signature(str(tmp_path)) == before
+    (tmp_path / 'two.py').write_text('class B: pass\n', encoding='utf-8')
+    added = registry_signature(str(tmp_path))
+    assert added != before
+    (tmp_path / 'one.py').write_text('class A:\n    pass\n', encoding='utf-8')
+    assert registry_signature(str(tmp_path)) != added
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import pytest
+
+pytest.importorskip('behavior_tree')
+pytest.importorskip('pxr')
+
+from action.create import CreateUsd, SetRootPrim, GetGeometryInfo, WriteRootPrim
+from action.memo import VersionedBlackboard
+from action.mesh_source import FakeMeshSource
+
+ACTIONS = (CreateUsd, SetRootPrim, GetGeometryInfo, WriteRootPrim)
+
+
+def _tick(actions, blackboard):
+    from behavior_tree.core import Status
+    for action in actions:
+        assert action.execute(blackboard) == Status.SUCCESS, type(action).__name__
+
+
+@pytest.mark.parametrize('settings', [
+    {},
+    {'authoring_mode': 'sdf'},
+    {'chunk_faces': 8},
+    {'instancing': 'references'},
+], ids=['usd', 'sdf', 'chunk', 'instancing'])
+def test_retick_with_changed_selection_replaces_root_children(settings, tmp_path):
+    source = FakeMeshSource()
+    meshes = [source.add_grid(name, 4, 4) for name in ('a', 'b')]
+    blackboard = VersionedBlackboard()
+    for key, value in dict(settings, usd_path=str(tmp_path / 'out.usda'), mesh_source=source,
+                           geo_selected=meshes).items():
+        blackboard.set(key, value)
+    actions = [cls(name=cls.__name__) for cls in ACTIONS]
+    _tick(actions, blackboard)
+    stage = blackboard.get('stage')
+    assert stage.GetPrimAtPath('/Root/b')
+
+    blackboard.set('geo_selected', ['a'])
+    _tick(actions, blackboard)
+    # 同一个 stage 重新写入
+    assert blackboard.get('stage') is stage
+    assert [prim.GetName() for prim in stage.GetPrimAtPath('/Root').GetChildren()] == ['a']
+    assert stage.GetPrimAtPath('/Root/a').GetTypeName() in ('Mesh', 'Xform')
+
+
+def test_payload_layout_does_not_leak_into_later_exports(tmp_path):
+    source = FakeMeshSource()
+    blackboard = VersionedBlackboard()
+    for key, value in dict(usd_path=str(tmp_path / 'out.usdc'), mesh_source=source, export_layout='payload',
+                           geo_selected=[source.add_grid('a', 2, 2)]).items():
+        blackboard.set(key, value)
+    actions = [cls(name=cls.__name__) for cls in ACTIONS]
+    _tick(actions, blackboard)
+    assert blackboard.get('usd_keep_composition') is True
+    blackboard.set('export_layout', None)
+    _tick(actions, blackboard)
+    assert not blackboard.get('usd_keep_composition')
+    assert blackboard.get('usd_flatten') is None
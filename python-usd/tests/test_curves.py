@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Gf, Sdf, Usd
+
+from action.curves import author_usd_curve, bake, frame_range, sine_wave
+
+
+def test_bake_and_frame_range():
+    frames = frame_range(0, 2, 0.5)
+    np.testing.assert_array_equal(frames, [0.0, 0.5, 1.0, 1.5, 2.0])
+    values = bake(sine_wave(2.0, 1.0, 1.0), frames, fps=2.0)
+    np.testing.assert_allclose(values, 1.0 + np.sin(frames / 2.0 * np.pi) * 2.0)
+    # 常量函数扩展到每一帧
+    assert bake(lambda seconds: 3.0, frames).shape == (5,)
+
+
+def test_usd_curve_round_trip():
+    layer = Sdf.Layer.CreateAnonymous()
+    frames = frame_range(0, 48)
+    values = np.column_stack((np.zeros(len(frames)), bake(sine_wave(10.0, 2.0), frames), frames / 7.0))
+    assert author_usd_curve(layer, '/Root/ball.xformOp:translate', Sdf.ValueTypeNames.Double3, frames, values) == 49
+    assert layer.ListTimeSamplesForPath('/Root/ball.xformOp:translate') == frames.tolist()
+    stage = Usd.Stage.Open(layer)
+    attr = stage.GetPrimAtPath('/Root/ball').GetAttribute('xformOp:translate')
+    assert attr.GetTypeName() == Sdf.ValueTypeNames.Double3
+    for frame, value in zip(frames.tolist(), values.tolist()):
+        # 双精度完全一致
+        assert attr.Get(frame) == Gf.Vec3d(*value)
+
+
+def test_usd_curve_replaces_previous_samples():
+    layer = Sdf.Layer.CreateAnonymous()
+    author_usd_curve(layer, '/ball.y', Sdf.ValueTypeNames.Double, [0, 1, 2, 3], [0.0, 1.0, 2.0, 3.0])
+    author_usd_curve(layer, '/ball.y', Sdf.ValueTypeNames.Double, [10, 20], [5.5, -1.25])
+    assert layer.ListTimeSamplesForPath('/ball.y') == [10.0, 20.0]
+    assert layer.QueryTimeSample('/ball.y', 20) == -1.25
+
+
+def test_bouncing_ball_to_usd_can_run_twice():
+    pytest.importorskip('behavior_tree')
+    from behavior_tree.core import Status
+    from pxr import UsdGeom
+    from action.sample_action import CreateBouncingBallAnime
+    stage = Usd.Stage.CreateInMemory()
+    blackboard = {'bake_target': 'usd', 'stage': stage, 'ROOT': stage.DefinePrim('/Root', 'Xform')}
+    action = CreateBouncingBallAnime(name='ball')
+    assert action.execute(blackboard) == Status.SUCCESS
+    assert action.execute(blackboard) == Status.SUCCESS
+    ops = UsdGeom.Xform(stage.GetPrimAtPath('/Root/ball')).GetOrderedXformOps()
+    assert [op.GetOpName() for op in ops] == ['xformOp:translate']
+    assert ops[0].Get(24)[1] == pytest.approx(np.sin(2 * np.pi) * 10)
+    assert (stage.GetStartTimeCode(), stage.GetEndTimeCode()) == (0, 120)
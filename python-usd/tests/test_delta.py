@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Sdf, Usd
+
+from action.delta import diff_layers
+
+
+def _layer(prims):
+    """prims 为 {prim 路径: {属性名: 浮点值}}"""
+    layer = Sdf.Layer.CreateAnonymous()
+    for path, attrs in prims.items():
+        prim_spec = Sdf.CreatePrimInLayer(layer, path)
+        prim_spec.specifier = Sdf.SpecifierDef
+        for name, value in attrs.items():
+            Sdf.AttributeSpec(prim_spec, name, Sdf.ValueTypeNames.Float).default = value
+    return layer
+
+
+def test_delta_over_old_matches_new():
+    old = _layer({'/Root': {}, '/Root/A': {'x': 1.0, 'y': 1.0}, '/Root/B': {'x': 1.0}, '/Root/D': {'x': 3.0}})
+    new = _layer({'/Root': {}, '/Root/A': {'x': 2.0}, '/Root/C': {'x': 4.0}, '/Root/D': {'x': 3.0}})
+    delta, stats = diff_layers(old, new)
+    assert stats == {'prims_rewritten': 1, 'prims_added': 1, 'prims_removed': 1, 'properties_rewritten': 2}
+    # 没有变化的 prim 不写进 delta
+    assert not delta.GetPrimAtPath('/Root/D')
+
+    root = Sdf.Layer.CreateAnonymous()
+    root.subLayerPaths = [delta.identifier, old.identifier]
+    stage = Usd.Stage.Open(root)
+    assert stage.GetPrimAtPath('/Root/A').GetAttribute('x').Get() == 2.0
+    assert stage.GetPrimAtPath('/Root/A').GetAttribute('y').Get() is None
+    assert not stage.GetPrimAtPath('/Root/B').IsActive()
+    assert stage.GetPrimAtPath('/Root/C').GetAttribute('x').Get() == 4.0
+    assert stage.GetPrimAtPath('/Root/D').GetAttribute('x').Get() == 3.0
+
+
+def test_identical_layers_give_empty_delta():
+    prims = {'/Root': {}, '/Root/A': {'x': 1.0}}
+    delta, stats = diff_layers(_layer(prims), _layer(prims))
+    assert not delta.pseudoRoot.nameChildren
+    assert stats['prims_rewritten'] == stats['properties_rewritten'] == 0
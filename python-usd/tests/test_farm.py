@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+
+import pytest
+
+from action.farm import _normalize_jobs
+
+
+def test_same_scene_name_in_different_directories(tmp_path):
+    jobs = _normalize_jobs(['a/x.mb', 'b/x.mb', {'scene': 'c/y.mb'}], str(tmp_path))
+    assert [job['id'] for job in jobs] == [0, 1, 2]
+    assert [job['name'] for job in jobs] == ['x', 'x_1', 'y']
+    assert len({job['usd_path'] for job in jobs}) == 3
+    assert jobs[1]['usd_path'] == os.path.join(str(tmp_path), 'x_1.usdc')
+
+
+def test_duplicate_output_path_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _normalize_jobs([{'scene': 'a/x.mb', 'usd_path': 'out.usdc'},
+                         {'scene': 'b/y.mb', 'usd_path': './out.usdc'}], str(tmp_path))
+    with pytest.raises(ValueError):
+        _normalize_jobs([{'scene': 'a/x.mb', 'name': 'x'}, {'scene': 'b/x.mb', 'name': 'x'}], str(tmp_path))
+
+
+def test_worker_crash_is_retried_and_reported(tmp_path):
+    pytest.importorskip('behavior_tree')
+    pytest.importorskip('pxr')
+    from action.farm import run_farm
+    report_path = str(tmp_path / 'report.json')
+    scene = {'meshes': 2, 'rows': 2, 'cols': 2}
+    report = run_farm([{'name': 'ok', 'scene': scene}, {'name': 'crash', 'scene': {'crash': True}},
+                       {'name': 'after', 'scene': scene}],
+                      'fake', max_workers=2, retries=1, output_dir=str(tmp_path), report_path=report_path)
+    assert os.path.exists(report_path)
+    results = {result['name']: result for result in report['results']}
+    # 同时运行的任务单独重跑，不受崩溃的任务影响
+    for name in ('ok', 'after'):
+        assert results[name]['status'] == 'succeeded'
+        assert results[name]['attempts'] == 1
+        assert os.path.exists(results[name]['usd_path'])
+    assert results['crash']['status'] == 'failed'
+    assert results['crash']['attempts'] == 2
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+import zipfile
+
+import pytest
+
+from action.formats import output_path
+
+
+@pytest.mark.parametrize('path, fmt, expected', [
+    ('shot.usda', None, ('shot.usda', 'usda')),
+    ('shot.usd', None, ('shot.usd', 'usdc')),
+    ('shot.usd', 'usda', ('shot.usd', 'usda')),
+    ('shot.usd', 'usdz', ('shot.usdz', 'usdz')),
+    ('shot.usda', 'usdc', ('shot.usdc', 'usdc')),
+    ('shot', None, ('shot.usdc', 'usdc')),
+    ('shot.USDA', None, ('shot.USDA', 'usda')),
+])
+def test_output_path(path, fmt, expected):
+    assert output_path(path, fmt) == expected
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError):
+        output_path('shot.usd', 'abc')
+
+
+@pytest.fixture
+def stage():
+    pytest.importorskip('pxr')
+    from pxr import Usd, UsdGeom
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, '/Root')
+    UsdGeom.Cube.Define(stage, '/Root/cube').CreateSizeAttr(2.0)
+    return stage
+
+
+@pytest.mark.parametrize('name, fmt, header', [
+    ('out.usda', None, b'#usda'),
+    ('out.usdc', None, b'PXR-USDC'),
+    ('out.usd', 'usda', b'#usda'),
+    ('out.usd', None, b'PXR-USDC'),
+])
+def test_save_stage_writes_requested_format(stage, tmp_path, name, fmt, header):
+    from action.formats import save_stage
+    metrics = save_stage(stage, str(tmp_path / 'sub' / name), fmt)
+    assert metrics['path'] == str(tmp_path / 'sub' / name)
+    assert metrics['bytes'] == os.path.getsize(metrics['path']) and metrics['seconds'] >= 0
+    with open(metrics['path'], 'rb') as f:
+        assert f.read(len(header)) == header
+
+
+def test_save_stage_usdz_packs_without_leftovers(stage, tmp_path):
+    from pxr import Usd
+    from action.formats import save_stage
+    metrics = save_stage(stage, str(tmp_path / 'out.usda'), 'usdz')
+    assert metrics['path'] == str(tmp_path / 'out.usdz') and metrics['format'] == 'usdz'
+    assert os.listdir(str(tmp_path)) == ['out.usdz']
+    with zipfile.ZipFile(metrics['path']) as package:
+        # usdz 要求包内文件不压缩
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in package.infolist())
+    assert Usd.Stage.Open(metrics['path']).GetPrimAtPath('/Root/cube').GetAttribute('size').Get() == 2.0
+
+
+def test_save_stage_without_flatten_keeps_references(stage, tmp_path):
+    from pxr import Sdf, Usd
+    from action.formats import save_stage
+    asset = Sdf.Layer.CreateNew(str(tmp_path / 'asset.usda'))
+    Sdf.CreatePrimInLayer(asset, '/Asset').specifier = Sdf.SpecifierDef
+    asset.Save()
+    root = Sdf.Layer.CreateNew(str(tmp_path / 'shot.usda'))
+    Sdf.CreatePrimInLayer(root, '/Root').referenceList.Prepend(Sdf.Reference('./asset.usda', '/Asset'))
+    root.Save()
+
+    layered = save_stage(Usd.Stage.Open(root), str(tmp_path / 'layered.usda'), flatten=False)
+    flat = save_stage(Usd.Stage.Open(root), str(tmp_path / 'flat.usda'))
+    assert Sdf.Layer.FindOrOpen(layered['path']).GetPrimAtPath('/Root').referenceList.prependedItems
+    assert not Sdf.Layer.FindOrOpen(flat['path']).GetPrimAtPath('/Root').referenceList.prependedItems
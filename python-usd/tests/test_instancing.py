@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+import pytest
+
+pytest.importorskip('pxr')
+
+from action.geometry import GeometryBuffer
+from action.instancing import find_instances, rigid_align, rigid_signature
+from action.mesh_source import FakeMeshSource
+
+
+def _rotation(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([(c, 0.0, s), (0.0, 1.0, 0.0), (-s, 0.0, c)])
+
+
+def _copy(geo, name, rotation, translation, scale=1.0):
+    return GeometryBuffer(name, geo.points.astype(np.float64) * scale @ rotation.T + translation,
+                          geo.face_vertex_counts, geo.face_vertex_indices,
+                          geo.normals.astype(np.float64) @ rotation.T, geo.uvs)
+
+
+@pytest.fixture
+def grid():
+    source = FakeMeshSource()
+    return source.meshes[source.add_grid('grid', 4, 3)]
+
+
+def test_rigid_copy_has_same_signature_and_aligns(grid):
+    rotation, translation = _rotation(0.7), np.array((5.0, -2.0, 1.0))
+    copy = _copy(grid, 'copy', rotation, translation)
+    assert rigid_signature(copy) == rigid_signature(grid)
+    found_rotation, found_translation, error = rigid_align(grid.points, copy.points)
+    np.testing.assert_allclose(found_rotation, rotation, atol=1e-5)
+    np.testing.assert_allclose(found_translation, translation, atol=1e-5)
+    assert error < 1e-5
+
+
+def test_scaled_copy_is_not_an_instance(grid):
+    scaled = _copy(grid, 'scaled', np.identity(3), np.zeros(3), scale=2.0)
+    assert rigid_signature(scaled) != rigid_signature(grid)
+    groups = find_instances([grid, _copy(grid, 'copy', _rotation(1.2), np.ones(3)), scaled])
+    assert [[geo.name for geo, _, _ in group.instances] for group in groups] == [['grid', 'copy'], ['scaled']]
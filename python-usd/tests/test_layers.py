@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Usd
+
+from action import layers
+from action.layers import export_mesh_layers, write_meshes_to_usd
+from action.mesh_source import FakeMeshSource, extract_geometry
+
+
+@pytest.mark.parametrize('arc', ['references', 'payload'])
+def test_export_mesh_layers_accepts_generator(tmp_path, arc):
+    source = FakeMeshSource()
+    meshes = [source.add_grid(f"grid_{index}", 2, 2, 1.0 + index) for index in range(3)]
+    file_path = str(tmp_path / 'root.usda')
+    result = export_mesh_layers((extract_geometry(source, mesh) for mesh in meshes), file_path, max_workers=2,
+                                progress=None, arc=arc)
+    assert result == {'written': meshes, 'failed': {}}
+    stage = Usd.Stage.Open(file_path)
+    assert [prim.GetName() for prim in stage.GetPrimAtPath('/Root').GetChildren()] == meshes
+    for mesh in meshes:
+        assert os.path.exists(os.path.join(str(tmp_path), 'root_meshes', f"{mesh}.usdc"))
+
+
+def test_failed_mesh_is_removed_and_others_written(tmp_path, monkeypatch):
+    source = FakeMeshSource()
+    geos = [extract_geometry(source, source.add_grid(name, 2, 2)) for name in ('a', 'bad', 'c')]
+    author = layers.author_mesh_spec
+
+    def author_or_fail(layer, path, geo):
+        author(layer, path, geo)
+        if geo.name == 'bad':
+            raise ValueError('写入失败')
+
+    monkeypatch.setattr(layers, 'author_mesh_spec', author_or_fail)
+    file_path = str(tmp_path / 'all.usda')
+    assert write_meshes_to_usd(geos, file_path, progress=None) == {'written': ['a', 'c'], 'failed': {'bad': '写入失败'}}
+    stage = Usd.Stage.Open(file_path)
+    assert [prim.GetName() for prim in stage.GetPrimAtPath('/Root').GetChildren()] == ['a', 'c']
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import weakref
+
+import numpy as np
+import pytest
+
+pytest.importorskip('behavior_tree')
+pytest.importorskip('pxr')
+
+from behavior_tree.core import Action, Status
+
+from action.create import GetGeometryInfo
+from action.memo import VersionedBlackboard, memoize
+from action.mesh_source import FakeMeshSource
+
+
+@memoize(reads=('size',), writes=('buffer',))
+class Produce(Action):
+    runs = 0
+
+    def execute(self, blackboard):
+        type(self).runs += 1
+        blackboard.set('buffer', np.zeros(blackboard.get('size')))
+        return Status.SUCCESS
+
+
+def test_memo_skips_and_does_not_keep_outputs():
+    Produce.runs = 0
+    blackboard = VersionedBlackboard()
+    blackboard.set('size', 8)
+    action = Produce(name='produce')
+    assert action.execute(blackboard) == Status.SUCCESS
+    assert action.execute(blackboard) == Status.SUCCESS
+    assert Produce.runs == 1
+
+    # 输出被替换后记忆不再持有原来的值，下一次重新执行
+    buffer = weakref.ref(blackboard.get('buffer'))
+    blackboard.set('buffer', None)
+    assert buffer() is None
+    action.execute(blackboard)
+    assert Produce.runs == 2
+    assert blackboard.get('buffer') is not None
+
+    blackboard.set('size', 4)
+    action.execute(blackboard)
+    assert Produce.runs == 3
+    assert len(blackboard.get('buffer')) == 4
+
+
+def test_edited_mesh_is_extracted_again():
+    source = FakeMeshSource()
+    blackboard = VersionedBlackboard()
+    blackboard.update({'mesh_source': source, 'geo_selected': [source.add_grid('grid', 2, 2)]})
+    action = GetGeometryInfo(name='info')
+    assert action.execute(blackboard) == Status.SUCCESS
+    geo_list = blackboard.get('GeoList')
+    revision = blackboard.revision('GeoList')
+
+    # 内容没有变化时保留原来的 GeoList
+    assert action.execute(blackboard) == Status.SUCCESS
+    assert blackboard.get('GeoList') is geo_list
+    assert blackboard.revision('GeoList') == revision
+
+    # 选择不变、网格被修改
+    source.deformers['grid'] = lambda frame, points: points + 1.0
+    assert action.execute(blackboard) == Status.SUCCESS
+    assert blackboard.revision('GeoList') != revision
+    np.testing.assert_allclose(blackboard.get('GeoList')[0].points, geo_list[0].points + 1.0)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from action.mesh_source import CmdsMeshSource, extract_geometry
+
+FAKE_CMDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'benchmarks', 'fake_maya', 'maya',
+                         'cmds.py')
+
+
+@pytest.fixture
+def cmds():
+    spec = importlib.util.spec_from_file_location('fake_cmds', FAKE_CMDS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _check(cmds, node):
+    shape = cmds.listRelatives(node, shapes=True)[0]
+    truth = cmds._meshes[shape]
+    geo = extract_geometry(CmdsMeshSource(cmds), shape)
+    np.testing.assert_allclose(geo.points, truth['points'], rtol=1e-6)
+    np.testing.assert_array_equal(geo.face_vertex_counts, truth['counts'])
+    np.testing.assert_array_equal(geo.face_vertex_indices, truth['indices'])
+    np.testing.assert_allclose(geo.normals, truth['normals'], rtol=1e-6)
+    np.testing.assert_allclose(geo.uvs, truth['uvs'][truth['uv_ids']], rtol=1e-6)
+    return geo
+
+
+def test_sphere_with_uv_seam_and_hard_normals(cmds):
+    node = cmds.add_sphere('sphere', 200)
+    truth = cmds._meshes[f"{node}Shape"]
+    # 接缝处一个顶点有多个UV，同一顶点在不同面上的法线不同
+    assert len(truth['uvs']) > len(truth['points'])
+    geo = _check(cmds, node)
+    assert len(np.unique(geo.uvs[geo.face_vertex_indices == geo.face_vertex_indices[0]], axis=0)) > 1
+
+
+def test_split_uvs_on_shared_edge(cmds):
+    # 两个四边面共用一条边，两侧的UV编号不同且不按顶点顺序
+    points = [(0, 0, 0), (1, 0, 0), (2, 0, 0), (0, 0, 1), (1, 0, 1), (2, 0, 1)]
+    indices = [0, 1, 4, 3, 1, 2, 5, 4]
+    normals = [(0, 1, 0)] * 4 + [(0, 0, 1)] * 4
+    uvs = [(0.5, 0.5), (0.0, 0.0), (0.1, 0.0), (0.1, 0.1), (0.0, 0.1), (0.6, 0.5), (0.6, 0.6), (0.5, 0.6)]
+    uv_ids = [1, 2, 3, 4, 0, 5, 6, 7]
+    node = cmds.add_mesh('quads', points, [4, 4], indices, normals, uvs, uv_ids)
+    _check(cmds, node)
+
+
+def test_missing_uvs_returns_empty(cmds):
+    points = [(0, 0, 0), (1, 0, 0), (0, 0, 1)]
+    # 第三个面顶点使用的UV不存在，相当于没有分配UV
+    node = cmds.add_mesh('tri', points, [3], [0, 1, 2], [(0, 1, 0)] * 3, [(0.0, 0.0), (1.0, 0.0)], [0, 1, 5])
+    assert CmdsMeshSource(cmds).read_uvs(f"{node}Shape").shape == (0, 2)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('behavior_tree')
+
+from behavior_tree.core import Action, Blackboard, Status
+
+from action import parallel
+from action.parallel import Parallel
+
+
+class Result(Action):
+    """等待 delay 秒后返回 status，前 running 次执行返回 RUNNING"""
+
+    def __init__(self, **kwargs):
+        super().__init__(name=kwargs.get('name'), blackboard=kwargs.get('blackboard'))
+        self.status = 'SUCCESS'
+        self.delay = 0.0
+        self.running = 0
+        self.key = None
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self.calls = 0
+
+    def execute(self, blackboard):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.running:
+            return Status.RUNNING
+        if self.key:
+            blackboard.set(self.key, self.name)
+        return Status[self.status]
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(parallel, 'resolve_action', {'Result': Result}.__getitem__)
+
+
+def _child(status='SUCCESS', **props):
+    return dict(props, **{'class': 'Result', 'status': status})
+
+
+def _tick_until_done(node, blackboard, limit=5.0):
+    deadline = time.monotonic() + limit
+    ticks = 1
+    status = node.execute(blackboard)
+    while status == Status.RUNNING:
+        assert time.monotonic() < deadline, "并行节点没有结束"
+        ticks += 1
+        status = node.execute(blackboard)
+    return status, ticks
+
+
+@pytest.mark.parametrize('statuses, success_policy, failure_policy, expected', [
+    (['SUCCESS', 'SUCCESS'], 'all', 'one', Status.SUCCESS),
+    (['SUCCESS', 'FAILURE'], 'all', 'one', Status.FAILURE),
+    (['SUCCESS', 'FAILURE'], 'one', 'all', Status.SUCCESS),
+    (['FAILURE', 'FAILURE'], 'one', 'all', Status.FAILURE),
+    # 两个策略都不满足
+    (['SUCCESS', 'FAILURE'], 'all', 'all', Status.FAILURE),
+    (['FAILURE', 'FAILURE'], 'all', 'all', Status.FAILURE),
+    (['SUCCESS', 'SUCCESS'], 'all', 'all', Status.SUCCESS),
+])
+def test_policies(statuses, success_policy, failure_policy, expected):
+    node = Parallel(children=[_child(status) for status in statuses],
+                    success_policy=success_policy, failure_policy=failure_policy)
+    assert _tick_until_done(node, Blackboard())[0] == expected
+
+
+def test_slow_child_yields_running_without_blocking():
+    node = Parallel(children=[_child(delay=0.5), _child()])
+    start = time.perf_counter()
+    assert node.execute(Blackboard()) == Status.RUNNING
+    assert time.perf_counter() - start < 0.4
+    status, ticks = _tick_until_done(node, Blackboard())
+    assert status == Status.SUCCESS and ticks > 1
+
+
+def test_running_child_is_resubmitted_only_after_it_returns():
+    node = Parallel(children=[_child(running=2), _child(delay=0.3)])
+    assert node.execute(Blackboard()) == Status.RUNNING
+    children = node._nodes
+    assert _tick_until_done(node, Blackboard())[0] == Status.SUCCESS
+    # 返回 RUNNING 的子动作再次执行，仍在执行的子动作不会被重复提交
+    assert [child.calls for child in children] == [3, 1]
+
+
+def test_scoped_writes_are_committed_in_child_order():
+    blackboard = Blackboard()
+    node = Parallel(children=[_child(name='first', key='owner', delay=0.2), _child(name='second', key='owner')],
+                    blackboard_mode='scoped')
+    assert _tick_until_done(node, blackboard)[0] == Status.SUCCESS
+    assert blackboard['owner'] == 'second'
+
+
+class _CountingPool(ThreadPoolExecutor):
+    """代替进程池，统计提交次数"""
+    submitted = []
+
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers=max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(args[0])
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_process_children_are_submitted_once(monkeypatch):
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor', _CountingPool)
+    monkeypatch.setattr(_CountingPool, 'submitted', [])
+    monkeypatch.setattr(parallel, 'PROCESS_TICK_INTERVAL', 0.01)
+    blackboard = Blackboard()
+    node = Parallel(executor='process',
+                    children=[_child(name='fast', key='fast'), _child(name='slow', key='slow', delay=0.3, running=3)])
+    status, ticks = _tick_until_done(node, blackboard)
+    assert status == Status.SUCCESS and ticks > 1
+    assert _CountingPool.submitted == ['Result', 'Result']
+    assert (blackboard['fast'], blackboard['slow']) == ('fast', 'slow')
+
+
+def test_locked_blackboard_append_is_thread_safe():
+    blackboard = parallel.LockedBlackboard(Blackboard())
+    threads = [threading.Thread(target=lambda: [blackboard.append('items', 1) for _ in range(200)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(blackboard.get('items')) == 1600
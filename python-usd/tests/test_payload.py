@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Sdf, Usd, UsdGeom
+
+from action.layers import author_payloads
+from action.mesh_source import FakeMeshSource
+from action.streaming import MeshStream
+
+
+def _export(tmp_path, count, group_size):
+    source = FakeMeshSource()
+    meshes = [source.add_grid(f"grid_{index}", 2, 3, 1.0 + index) for index in range(count)]
+    stream = MeshStream(source, meshes)
+    file_path = str(tmp_path / 'shot.usda')
+    layer = Sdf.Layer.CreateNew(file_path)
+    Sdf.CreatePrimInLayer(layer, '/Root').specifier = Sdf.SpecifierDef
+    reports, stats = author_payloads(layer, '/Root', stream, str(tmp_path / 'shot_meshes'), str(tmp_path),
+                                     group_size, on_authored=stream.release)
+    layer.Save()
+    return source, meshes, stream, file_path, reports, stats
+
+
+def test_groups_are_payloads_with_interface(tmp_path):
+    source, meshes, stream, file_path, reports, stats = _export(tmp_path, 5, 2)
+    assert sorted(reports) == meshes
+    assert (stats['groups'], stats['meshes']) == (3, 5)
+    # 组内网格边读取边写入，同时只持有一个
+    assert stream.stats()['peak_inflight_count'] == 1
+
+    stage = Usd.Stage.Open(file_path, Usd.Stage.LoadNone)
+    root = stage.GetPrimAtPath('/Root')
+    assert Usd.ModelAPI(root).GetKind() == 'assembly'
+    groups = root.GetAllChildren()
+    assert [prim.GetName() for prim in groups] == ['group_0000', 'group_0001', 'group_0002']
+    first = groups[0]
+    # 不加载 payload 也能读到包围盒和统计
+    assert not first.IsLoaded() and not first.GetAllChildren()
+    assert Usd.ModelAPI(first).GetKind() == 'component'
+    assert list(first.GetCustomDataByKey('meshes')) == meshes[:2]
+    assert first.GetCustomDataByKey('points') == sum(source.meshes[mesh].point_count for mesh in meshes[:2])
+    assert first.GetCustomDataByKey('faces') == 12
+    points = np.concatenate([source.meshes[mesh].points for mesh in meshes[:2]])
+    np.testing.assert_allclose(np.asarray(first.GetAttribute('extentsHint').Get()),
+                               [points.min(axis=0), points.max(axis=0)])
+
+    stage.Load(first.GetPath())
+    children = stage.GetPrimAtPath('/Root/group_0000').GetChildren()
+    assert [prim.GetName() for prim in children] == meshes[:2]
+    assert children[0].IsA(UsdGeom.Mesh) and children[0].GetAttribute('extent').Get()
+    assert not stage.GetPrimAtPath('/Root/group_0001').IsLoaded()
+
+
+def test_single_mesh_groups_are_named_after_the_mesh(tmp_path):
+    _, meshes, _, file_path, _, stats = _export(tmp_path, 3, 1)
+    assert stats['groups'] == 3
+    layer = Sdf.Layer.FindOrOpen(file_path)
+    root = layer.GetPrimAtPath('/Root')
+    assert [prim.name for prim in root.nameChildren] == meshes
+    # asset 路径相对于根 layer 所在目录
+    assert root.nameChildren['grid_0'].payloadList.prependedItems[0].assetPath == './shot_meshes/grid_0.usdc'
+    assert os.path.exists(str(tmp_path / 'shot_meshes' / 'grid_0.usdc'))
+
+    stage = Usd.Stage.Open(file_path)
+    assert [prim.GetName() for prim in stage.GetPrimAtPath('/Root/grid_2').GetChildren()] == ['grid_2']
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import threading
+
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Usd
+
+from action import pipeline
+from action.mesh_source import FakeMeshSource
+from action.pipeline import ExportPipeline
+
+
+class CountingSource(FakeMeshSource):
+    """统计提取过的网格，fail_on 对应的网格提取时报错"""
+
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.fail_on = fail_on
+        self.extracted = []
+
+    def read_topology(self, mesh):
+        if mesh == self.fail_on:
+            raise ValueError(f"{mesh} 提取失败")
+        self.extracted.append(mesh)
+        return super().read_topology(mesh)
+
+
+def _setup(count=6, fail_on=None):
+    source = CountingSource(fail_on)
+    meshes = [source.add_grid(f"grid_{index}", 3, 3) for index in range(count)]
+    stage = Usd.Stage.CreateInMemory()
+    stage.DefinePrim('/Root', 'Xform')
+    return source, meshes, stage
+
+
+def test_pipeline_authors_and_saves_every_mesh(tmp_path):
+    source, meshes, stage = _setup()
+    usd_path = str(tmp_path / 'out.usda')
+    export = ExportPipeline(stage, '/Root', usd_path, max_inflight=2)
+    stats = export.run(source, meshes)
+    assert stats['meshes'] == 6 and stats['peak_inflight_count'] <= 2
+    assert sorted(export.dedup) == meshes
+    assert export.save_metrics['format'] == 'usda'
+    saved = Usd.Stage.Open(usd_path)
+    assert [prim.GetName() for prim in saved.GetPrimAtPath('/Root').GetChildren()] == meshes
+
+
+def test_writer_error_stops_extraction(monkeypatch, tmp_path):
+    source, meshes, stage = _setup(20)
+    author_mesh = pipeline.author_mesh
+
+    def failing(stage, path, geo):
+        if geo.name == 'grid_1':
+            raise RuntimeError("写入失败")
+        return author_mesh(stage, path, geo)
+
+    monkeypatch.setattr(pipeline, 'author_mesh', failing)
+    usd_path = tmp_path / 'out.usda'
+    with pytest.raises(RuntimeError, match="写入失败"):
+        ExportPipeline(stage, '/Root', str(usd_path), max_inflight=1).run(source, meshes)
+    # 写入线程出错后主线程不再提取剩下的网格，也不保存
+    assert len(source.extracted) < 20
+    assert not usd_path.exists()
+    assert not [thread for thread in threading.enumerate() if thread.name == 'usd-writer']
+
+
+def test_extraction_error_is_raised_after_writer_exits(tmp_path):
+    source, meshes, stage = _setup(fail_on='grid_3')
+    usd_path = tmp_path / 'out.usda'
+    with pytest.raises(ValueError, match='grid_3'):
+        ExportPipeline(stage, '/Root', str(usd_path)).run(source, meshes)
+    assert not usd_path.exists()
+    assert not [thread for thread in threading.enumerate() if thread.name == 'usd-writer']
+    # 出错之前提取的网格已经写入
+    assert [prim.GetName() for prim in stage.GetPrimAtPath('/Root').GetChildren()] == meshes[:3]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+
+from action.primvars import dedup_report, dedup_values
+
+
+def test_dedup_keeps_first_occurrence_order():
+    values = np.array([(0, 1, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 0, 0)], dtype=np.float32)
+    unique_values, indices = dedup_values(values)
+    np.testing.assert_array_equal(unique_values, [(0, 1, 0), (1, 0, 0), (0, 0, 1)])
+    np.testing.assert_array_equal(indices, [0, 1, 0, 2, 1])
+    assert indices.dtype == np.int32
+    np.testing.assert_array_equal(unique_values[indices], values)
+
+
+def test_dedup_compares_bytes():
+    # -0.0 与 0.0 的字节不同，不合并
+    values = np.array([(0.0, 0.0), (-0.0, 0.0)], dtype=np.float32)
+    unique_values, _ = dedup_values(values)
+    assert len(unique_values) == 2
+
+
+def test_dedup_empty():
+    unique_values, indices = dedup_values(np.empty((0, 2), dtype=np.float32))
+    assert len(unique_values) == 0 and len(indices) == 0
+    assert dedup_report(unique_values, unique_values, indices)['ratio'] == 1.0
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from action import registry
+from action.registry import LazyModule, discover_actions, find_action, lazy_import
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SAMPLE = os.path.join(PACKAGE_DIR, '..', 'examples', 'sample.json')
+# 加载行为树允许的最长耗时（秒），只用来发现明显的退化
+IMPORT_BUDGET = 1.0
+
+
+def _write(directory, name, source):
+    (directory / f"{name}.py").write_text(textwrap.dedent(source), encoding='utf-8')
+
+
+def test_discover_follows_bases_across_modules(tmp_path):
+    _write(tmp_path, 'base', '''
+        from behavior_tree.core import Action
+        class Exporter(Action):
+            pass
+        class _Hidden(Action):
+            pass
+        class Helper(object):
+            pass
+    ''')
+    _write(tmp_path, 'nodes', '''
+        import behavior_tree.core as core
+        from .base import Exporter
+        class UsdExport(Exporter):
+            pass
+        class Check(core.Condition):
+            pass
+    ''')
+    found = discover_actions(str(tmp_path), 'pkg')
+    assert found == {'Exporter': 'pkg.base', 'UsdExport': 'pkg.nodes', 'Check': 'pkg.nodes'}
+
+
+def test_duplicate_names_prefer_listed_modules(tmp_path):
+    _write(tmp_path, 'aaa', 'class Export(Action):\n    pass\n')
+    _write(tmp_path, 'create', 'class Export(Action):\n    pass\n')
+    assert discover_actions(str(tmp_path), 'pkg') == {'Export': 'pkg.create'}
+
+
+def test_find_action_uses_the_package_registry():
+    assert find_action('ModelCheck') == 'action.sample_action'
+    assert find_action('WriteRootPrim') == 'action.create'
+    assert find_action('Parallel') == 'action.parallel'
+    with pytest.raises(ValueError):
+        find_action('NoSuchAction')
+
+
+def test_lazy_import_defers_until_attribute_access(tmp_path, monkeypatch):
+    _write(tmp_path, 'lazy_target_for_test', 'VALUE = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(registry, '_lazy_modules', [])
+    module = lazy_import('lazy_target_for_test')
+    assert isinstance(module, LazyModule)
+    assert 'lazy_target_for_test' not in sys.modules
+    assert module.VALUE == 42
+    assert 'lazy_target_for_test' in sys.modules
+    # 已经导入的模块直接返回
+    assert lazy_import('lazy_target_for_test') is sys.modules['lazy_target_for_test']
+    monkeypatch.delitem(sys.modules, 'lazy_target_for_test')
+
+
+_PROBE = '''
+import importlib, json, sys, tempfile, time
+sys.path.insert(0, {package_dir!r})
+start = time.perf_counter()
+from action.compiler import load_compiled
+compiled = load_compiled({path!r}, tempfile.mkdtemp())
+for module_name in sorted(set(compiled.classes.values())):
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        # 没有安装 behavior_tree 时只检查编译阶段
+        pass
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                   'heavy': sorted(name for name in sys.modules if name.split('.')[0] in ('pxr', 'maya'))}}))
+'''
+
+
+def test_loading_the_sample_tree_stays_within_import_budget():
+    code = _PROBE.format(package_dir=os.path.abspath(PACKAGE_DIR), path=os.path.abspath(SAMPLE))
+    # 新的解释器中检查，不受本进程已导入的模块影响
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result['heavy'] == []
+    assert result['seconds'] < IMPORT_BUDGET
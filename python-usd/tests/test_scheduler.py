@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Jcen
+from action.scheduler import Animation, AnimationScheduler, FakePlugWriter
+
+
+def test_animation_runs_and_restores():
+    writer = FakePlugWriter()
+    scheduler = AnimationScheduler(writer, clock=lambda: 0.0, install_job=False)
+    animation = Animation('move', 1.0, {'node.translateX': lambda t: t * 10.0}, restore={'node.translateX': -1.0},
+                          world_space=True)
+    scheduler.add(animation)
+    scheduler.tick(0.5)
+    assert abs(writer.values['node.translateX'] - 5.0) < 1e-9
+    scheduler.tick(2.0)
+    assert writer.values['node.translateX'] == -1.0
+    assert scheduler.active == 0
+    assert scheduler.stats()['ticks'] == 2
+
+
+class _ScriptJobs(object):
+    """记录 scriptJob 调用的 maya.cmds 替身"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def scriptJob(self, exists=None, kill=None, force=False, **kwargs):
+        if exists is not None:
+            return exists in self.jobs
+        if kill is not None:
+            del self.jobs[kill]
+            return None
+        self.jobs[len(self.jobs) + 1] = kwargs
+        return len(self.jobs)
+
+
+def test_job_is_frame_driven_and_removed_when_idle(monkeypatch):
+    import sys
+    import types
+    cmds = _ScriptJobs()
+    maya = types.ModuleType('maya')
+    maya.cmds = cmds
+    monkeypatch.setitem(sys.modules, 'maya', maya)
+    monkeypatch.setitem(sys.modules, 'maya.cmds', cmds)
+
+    scheduler = AnimationScheduler(FakePlugWriter(), clock=lambda: 0.0)
+    scheduler.add(Animation('a', 1.0, {'node.tx': lambda t: t}))
+    scheduler.add(Animation('b', 2.0, {'node.ty': lambda t: t}))
+    # 多个动画共用一个按帧触发的回调，不使用会一直触发的 idleEvent
+    assert list(cmds.jobs.values()) == [{'timeChange': scheduler.tick, 'protected': True}]
+    scheduler.tick(1.5)
+    assert scheduler.job_id is not None
+    scheduler.tick(2.5)
+    assert scheduler.job_id is None and not cmds.jobs
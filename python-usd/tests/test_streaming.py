@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import pytest
+
+pytest.importorskip('pxr')
+
+from pxr import Sdf
+
+from action.mesh_source import FakeMeshSource
+from action.streaming import MeshStream
+from action.writer import author_meshes_sdf
+
+
+def _stream(count=4, max_inflight=1):
+    source = FakeMeshSource()
+    meshes = [source.add_grid(f"grid_{index}", 4, 4) for index in range(count)]
+    return MeshStream(source, meshes, max_inflight)
+
+
+def test_author_meshes_keeps_one_mesh_alive():
+    stream = _stream()
+    reports = author_meshes_sdf(Sdf.Layer.CreateAnonymous(), '/Root', stream, stream.release)
+    assert len(reports) == 4
+    stats = stream.stats()
+    assert stats['meshes'] == 4
+    assert stats['peak_inflight_count'] == 1
+    assert stats['peak_inflight_bytes'] == max(geo.nbytes for geo in stream.source.meshes.values())
+
+
+def test_peak_counts_references_kept_after_release():
+    stream = _stream(3)
+    kept = []
+    for geo in stream:
+        stream.release(geo)
+        kept.append(geo)
+    assert stream.stats()['peak_inflight_count'] == 3
+
+
+def test_exceeding_max_inflight_raises():
+    stream = _stream(2)
+    iterator = iter(stream)
+    next(iterator)
+    with pytest.raises(RuntimeError):
+        next(iterator)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import numpy as np
+import pytest
+
+from action.topology import parse_face_to_vertex, validate_topology
+
+
+def test_parse_mixed_faces():
+    lines = ["FACE      0:      0      1      3      2 \n", "FACE      1:      2      3      4 \n"]
+    counts, indices = parse_face_to_vertex(lines)
+    assert counts.dtype == np.int32 and indices.dtype == np.int32
+    np.testing.assert_array_equal(counts, [4, 3])
+    np.testing.assert_array_equal(indices, [0, 1, 3, 2, 2, 3, 4])
+
+
+def test_parse_empty_and_gap():
+    counts, indices = parse_face_to_vertex([])
+    assert len(counts) == 0 and len(indices) == 0
+    with pytest.raises(ValueError):
+        parse_face_to_vertex(["FACE 0: 0 1 2\n", "FACE 2: 1 2 3\n"])
+
+
+@pytest.mark.parametrize('counts, indices, vertex_count', [
+    ([2], [0, 1], 3),
+    ([3], [0, 1], 3),
+    ([3], [0, 1, 3], 3),
+    ([3], [0, -1, 2], 3),
+])
+def test_validate_rejects_bad_topology(counts, indices, vertex_count):
+    with pytest.raises(ValueError):
+        validate_topology(np.array(counts), np.array(indices), vertex_count)
+
+
+def test_validate_accepts_valid_topology():
+    validate_topology(np.array([4, 3]), np.array([0, 1, 3, 2, 2, 3, 4]), 5)
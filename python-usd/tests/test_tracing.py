@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Jcen
+import json
+import sys
+import textwrap
+import threading
+
+import pytest
+
+pytest.importorskip('behavior_tree')
+
+from behavior_tree.core import Action, Status
+
+from action.tracing import Tracer
+
+
+@pytest.fixture
+def libraries(tmp_path, monkeypatch):
+    """trace_lib_a 定义函数和类，trace_lib_b 重新导出它们"""
+    (tmp_path / 'trace_lib_a.py').write_text(textwrap.dedent('''
+        def f():
+            return 'f'
+
+        class Shape(object):
+            def area(self):
+                return 1.0
+
+            @staticmethod
+            def unit():
+                return Shape()
+    '''), encoding='utf-8')
+    (tmp_path / 'trace_lib_b.py').write_text('from trace_lib_a import f, Shape\ng = f\n', encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import trace_lib_a
+    import trace_lib_b
+    yield trace_lib_a, trace_lib_b
+    for name in ('trace_lib_a', 'trace_lib_b'):
+        sys.modules.pop(name, None)
+
+
+class UsesLibraries(Action):
+    def execute(self, blackboard):
+        import trace_lib_a
+        import trace_lib_b
+        trace_lib_a.f()
+        trace_lib_b.f()
+        trace_lib_b.g()
+        trace_lib_b.Shape.unit().area()
+        return Status.SUCCESS
+
+
+class Outer(Action):
+    def execute(self, blackboard):
+        import trace_lib_a
+        trace_lib_a.f()
+        UsesLibraries(name='inner').execute(blackboard)
+        return Status.FAILURE
+
+
+def test_execute_is_traced_and_summarised(libraries):
+    with Tracer(libraries={'lib': ('trace_lib_a', 'trace_lib_b')}) as tracer:
+        assert Outer(name='outer').execute({}) == Status.FAILURE
+        UsesLibraries(name='again').execute({})
+
+    events = {event['node']: event for event in tracer.events}
+    assert [event['node'] for event in tracer.events] == ['inner', 'outer', 'again']
+    # 嵌套动作中的调用只计入最内层的动作
+    assert events['inner']['calls'] == {'lib': 5} and events['outer']['calls'] == {'lib': 1}
+    assert (events['outer']['status'], events['inner']['status']) == ('FAILURE', 'SUCCESS')
+    assert events['outer']['wall'] >= events['inner']['wall']
+
+    summary = tracer.summary()
+    assert summary['UsesLibraries']['count'] == 2
+    assert summary['UsesLibraries']['calls'] == {'lib': 10}
+    assert summary['UsesLibraries']['statuses'] == {'SUCCESS': 2}
+
+
+def test_reexported_functions_are_wrapped_once(libraries):
+    lib_a, lib_b = libraries
+    original = lib_a.f
+    # 同一个模块出现在两个库中也只包装一次
+    with Tracer(libraries={'lib': ('trace_lib_a', 'trace_lib_b'), 'again': ('trace_lib_b',)}) as tracer:
+        assert lib_a.f is lib_b.f is lib_b.g
+        assert lib_a.f._counted is original
+        UsesLibraries(name='node').execute({})
+    assert tracer.events[0]['calls'] == {'lib': 5}
+    # 结束后全部恢复
+    assert lib_a.f is lib_b.f is lib_b.g is original
+    assert not hasattr(lib_a.Shape.__dict__['area'], '_counted')
+
+
+def test_chrome_trace_names_threads(libraries, tmp_path):
+    with Tracer(count_calls=False, memory=True) as tracer:
+        UsesLibraries(name='main').execute({})
+        thread = threading.Thread(target=UsesLibraries(name='worker').execute, args=({},))
+        thread.start()
+        thread.join()
+    path = tracer.save_chrome_trace(str(tmp_path / 'trace.json'))
+    with open(path, 'r', encoding='utf-8') as f:
+        trace = json.load(f)
+    complete = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    names = {event['args']['name'] for event in trace['traceEvents'] if event['ph'] == 'M'}
+    assert [event['args']['node'] for event in complete] == ['main', 'worker']
+    assert complete[0]['tid'] != complete[1]['tid'] and 'memory_delta' in complete[0]['args']
+    assert names == {'main', 'thread-2'}